@@ -0,0 +1,204 @@
+from typing import Literal, Sequence
+
+import numpy as np
+
+"""
+Columnar aggregation of weight maps and item prices with NumPy (app/services/aggregation.py).
+
+The values of a batch are loaded into one float64 array and every statistic is one vectorised call over it, instead
+of a Python loop over dict[int, float] or Item objects. Two input formats:
+    - JSON: a weight map {"key": weight, ...} or price columns {"price": [...], "tax": [...]}. The JSON is parsed to
+      Python objects once and copied into the arrays, the statistics don't touch them anymore.
+    - binary (Content-Type: application/octet-stream): raw little-endian float64 buffers, no parsing at all, the
+      array is a view of the request body. A weight map is the weights alone (the keys are the positions 0..n-1) or
+      n int64 keys followed by the n weights. Price columns are the n prices followed by the n taxes.
+
+Top-k uses argpartition, O(n) instead of sorting the whole batch. A missing tax is NaN in the binary format (null in
+JSON) and counts as 0.
+"""
+
+FLOAT64 = np.dtype("<f8")
+INT64 = np.dtype("<i8")
+
+
+class AggregationError(ValueError):
+    """
+    The batch can't be aggregated, the message is meant for the client.
+    """
+
+
+def _buffer(body: bytes, dtype: np.dtype, count: int = -1, offset: int = 0) -> np.ndarray:
+    return np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+
+
+def _finite(values: np.ndarray, name: str) -> np.ndarray:
+    if not np.isfinite(values).all():
+        raise AggregationError(f"{name} must be finite numbers (index {int(np.argmin(np.isfinite(values)))})")
+    return values
+
+
+def _finite_total(total: float, name: str) -> float:
+    # Finite inputs can still overflow to inf once summed, e.g. 1e308 + 1e308
+    if not np.isfinite(total):
+        raise AggregationError(f"{name} overflows float64")
+    return total
+
+
+def weights_from_mapping(weights: dict) -> tuple[list, np.ndarray]:
+    """
+    :param weights: parsed JSON object, key -> weight
+    :return: the keys, and the weights as a float64 array in the same order
+    """
+    if not isinstance(weights, dict):
+        raise AggregationError("The weights must be a JSON object of key -> number")
+    try:
+        values = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+    except (TypeError, ValueError):
+        raise AggregationError("The weights must be numbers")
+    return list(weights), _finite(values, "weights")
+
+
+def weights_from_buffer(body: bytes, with_keys: bool = False) -> tuple[np.ndarray | None, np.ndarray]:
+    """
+    :param body: float64 weights, or int64 keys then float64 weights when with_keys
+    :return: the keys (None when they are the positions) and the weights, both views of body
+    """
+    width = 16 if with_keys else 8
+    if len(body) % width:
+        raise AggregationError(f"The binary body must be a multiple of {width} bytes")
+    count = len(body) // width
+    if not with_keys:
+        return None, _finite(_buffer(body, FLOAT64), "weights")
+    return _buffer(body, INT64, count), _finite(_buffer(body, FLOAT64, count, offset=count * 8), "weights")
+
+
+def summarize_weights(values: np.ndarray, keys: Sequence | np.ndarray | None = None, top_k: int = 10) -> dict:
+    """
+    :param keys: key of each weight, None for the positions
+    :return: count, total, mean, min, max and the top_k largest weights, largest first
+    """
+    count = values.size
+    if not count:
+        return {"count": 0, "total": 0.0, "mean": None, "min": None, "max": None, "top": []}
+    with np.errstate(over="ignore"):
+        total = _finite_total(float(values.sum()), "The total of the weights")
+    top_k = min(top_k, count)
+    if top_k:
+        top = np.argpartition(values, count - top_k)[count - top_k:]
+        top = top[np.argsort(values[top], kind="stable")[::-1]]
+    else:
+        top = np.empty(0, dtype=np.intp)
+    if keys is None:
+        top_keys = top.tolist()
+    elif isinstance(keys, np.ndarray):
+        top_keys = keys[top].tolist()
+    else:
+        top_keys = [keys[i] for i in top.tolist()]
+    return {
+        "count": count,
+        "total": total,
+        "mean": total / count,
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "top": [{"key": key, "weight": weight} for key, weight in zip(top_keys, values[top].tolist())],
+    }
+
+
+def normalize(values: np.ndarray, method: Literal["sum", "max"] = "sum") -> np.ndarray:
+    """
+    :param method: "sum" divides by the total (the weights then sum to 1), "max" by the largest absolute weight
+    :return: a new array
+    """
+    if not values.size:
+        return values.copy()
+    with np.errstate(over="ignore"):
+        divisor = values.sum() if method == "sum" else np.abs(values).max()
+    _finite_total(divisor, "The total of the weights")
+    if divisor == 0:
+        raise AggregationError(f"Can't normalise weights whose {method} is 0")
+    return values / divisor
+
+
+def prices_from_columns(columns: dict) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :param columns: parsed JSON {"price": [...], "tax": [...]}, tax is optional and may have nulls
+    :return: price and tax arrays, the missing taxes are NaN
+    """
+    if not isinstance(columns, dict) or not isinstance(columns.get("price"), list):
+        raise AggregationError('The body must be a JSON object {"price": [...], "tax": [...]}')
+    tax = columns.get("tax")
+    if tax is not None and (not isinstance(tax, list) or len(tax) != len(columns["price"])):
+        raise AggregationError("tax must be a list as long as price")
+    try:
+        price = np.array(columns["price"], dtype=np.float64)
+        # None -> NaN
+        tax = np.array(tax, dtype=np.float64) if tax is not None else np.full(price.size, np.nan)
+    except (TypeError, ValueError):
+        raise AggregationError("price and tax must be lists of numbers")
+    if price.ndim != 1 or tax.ndim != 1:
+        raise AggregationError("price and tax must be lists of numbers")
+    return _check_prices(price, tax)
+
+
+def prices_from_buffer(body: bytes, with_tax: bool = True) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :param body: n float64 prices, followed by n float64 taxes (NaN for none) when with_tax
+    :return: price and tax arrays, views of body
+    """
+    width = 16 if with_tax else 8
+    if len(body) % width:
+        raise AggregationError(f"The binary body must be a multiple of {width} bytes")
+    count = len(body) // width
+    price = _buffer(body, FLOAT64, count)
+    tax = _buffer(body, FLOAT64, count, offset=count * 8) if with_tax else np.full(count, np.nan)
+    return _check_prices(price, tax)
+
+
+def _check_prices(price: np.ndarray, tax: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    _finite(price, "price")
+    if not (price > 0).all():
+        # Same rule as Item.price
+        raise AggregationError(f"price must be greater than zero (index {int(np.argmin(price > 0))})")
+    if np.isinf(tax).any():
+        raise AggregationError(f"tax must be finite numbers (index {int(np.argmax(np.isinf(tax)))})")
+    return price, tax
+
+
+def price_with_tax(price: np.ndarray, tax: np.ndarray) -> np.ndarray:
+    """
+    price + tax of every item (what create_item computes for one), a missing tax (NaN) counts as 0.
+    """
+    with np.errstate(over="ignore"):
+        return _finite(price + np.nan_to_num(tax, nan=0.0), "price + tax")
+
+
+def summarize_prices(price: np.ndarray, tax: np.ndarray) -> dict:
+    """
+    :return: count, totals of price, tax and price with tax, and mean/min/max of the price with tax
+    """
+    count = price.size
+    if not count:
+        return {"count": 0, "with_tax": 0, "total_price": 0.0, "total_tax": 0.0, "total_price_with_tax": 0.0,
+                "mean_price_with_tax": None, "min_price_with_tax": None, "max_price_with_tax": None}
+    taxed = price_with_tax(price, tax)
+    with np.errstate(over="ignore"):
+        total_price = _finite_total(float(price.sum()), "total_price")
+        total_tax = _finite_total(float(np.nansum(tax)), "total_tax")
+        total = _finite_total(float(taxed.sum()), "total_price_with_tax")
+    return {
+        "count": count,
+        "with_tax": int(np.count_nonzero(~np.isnan(tax))),
+        "total_price": total_price,
+        "total_tax": total_tax,
+        "total_price_with_tax": total,
+        "mean_price_with_tax": total / count,
+        "min_price_with_tax": float(taxed.min()),
+        "max_price_with_tax": float(taxed.max()),
+    }
+
+
+def to_buffer(values: np.ndarray) -> bytes:
+    """
+    :return: the array as raw little-endian float64, the binary format of the requests
+    """
+    return values.astype(FLOAT64, copy=False).tobytes()
@@ -0,0 +1,15 @@
+from dependency_timing import DependencyTimingRoute
+from fast_body import JSONBodyRoute
+from metrics import TimedRoute
+from negotiation import NegotiatedRoute
+from response_cache import CachedRoute
+from serializers import PrecompiledRoute
+
+
+class AppRoute(TimedRoute, DependencyTimingRoute, CachedRoute, NegotiatedRoute, PrecompiledRoute, JSONBodyRoute):
+    """
+    Route class of every router, times the handlers (and dependencies when DEPENDENCY_TIMING is on) for /metrics and
+    enables @cache_response, @content_negotiation, @precompiled_response and @json_body on the routes.
+    NegotiatedRoute comes before PrecompiledRoute and JSONBodyRoute: its endpoint wrapper sees the returned value
+    before it's encoded as JSON, and its handler decodes MessagePack bodies before @json_body looks at them.
+    """
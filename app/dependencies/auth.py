@@ -0,0 +1,91 @@
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+
+from schemas import BaseUser, TokenData
+from utiles import get_user, update_user
+from repositories import user_repository
+from dependency_cache import app_scoped
+from hashing import password_hasher
+from token_cache import token_cache
+from jwt_keys import KeyRing, key_ring
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+
+
+@app_scoped
+def signing_keys() -> KeyRing:
+    """
+    JWT key ring, loaded (key files parsed, JWKS rendered) once at startup.
+    """
+    key_ring.load()
+    return key_ring
+
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)],
+                           keys: Annotated[KeyRing, Depends(signing_keys)]):
+    # PWD CONCEPT
+    # user = fake_decode_token(token)
+    # if not user:
+    #     raise HTTPException(
+    #         status_code=status.HTTP_401_UNAUTHORIZED,
+    #         detail="Invalid authentication credentials",
+    #         headers={"WWW-Authenticate": "Bearer"},
+    #     )
+    # return user
+
+#     JWT CONCEPT
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached.user
+    # jwt is imported on the first token that isn't cached, not at startup
+    from jwt.exceptions import InvalidTokenError
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = keys.decode(token)
+        username = payload.get("sub")
+        if username is None:
+            raise credentials_exception
+        token_data = TokenData(username=username)
+    except InvalidTokenError:
+        raise credentials_exception
+    user = await get_user(user_repository, username=token_data.username)
+    if user is None:
+        raise credentials_exception
+    token_cache.put(token, payload, user)
+    return user
+
+
+async def get_current_active_user(
+    current_user: Annotated[BaseUser, Depends(get_current_user)],
+):
+    if current_user.disabled:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+async def verify_password(plain_password, hashed_password):
+    # bcrypt runs in the password_hasher pool so the event loop keeps serving other requests
+    return await password_hasher.verify(plain_password, hashed_password)
+
+
+async def get_password_hash(password):
+    return await password_hasher.hash(password)
+
+async def authenticate_user(fake_db, username: str, password: str):
+    user = await get_user(fake_db, username)
+    if not user:
+        return False
+    valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not valid:
+        return False
+    if new_hash is not None:
+        # Stored hash is from an older scheme/cost (or a fake one), replace it now that we know the password
+        await update_user(fake_db, username, {"hashed_password": new_hash})
+        user.hashed_password = new_hash
+    return user
@@ -1,2 +1,119 @@
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.exception_handlers import (
+    http_exception_handler,
+    request_validation_exception_handler,
+)
+from fastapi.exceptions import RequestValidationError
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
+from app import __app_name__, __version__
+from app.core.routing import AppRoute
+from app.middlewares import add_middlewares
+from app.services import aggregation, auth, bodies, bulk, dependency, errors, files, forms, params, responses, root
+from metrics import gauges
+from dependency_cache import warm_app_scoped
+from exceptions import UnicornException
+from hashing import password_hasher
+from token_cache import token_cache
+from rate_limit import login_limiter
+from response_cache import response_cache
+from compression import compressed_cache
+from cors import preflight_cache
+from openapi_cache import install_openapi_cache
+from varaibles import (OPENAPI_PRERENDER, PWD_HASH_CALIBRATE, PWD_HASH_VERIFY_BUDGET, PWD_HASH_MIN_ROUNDS,
+                       PWD_HASH_MAX_ROUNDS)
+import database
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_app_scoped()
+    if PWD_HASH_CALIBRATE:
+        await password_hasher.calibrate(PWD_HASH_VERIFY_BUDGET, PWD_HASH_MIN_ROUNDS, PWD_HASH_MAX_ROUNDS)
+    if OPENAPI_PRERENDER:
+        openapi_cache.prepare()
+    yield
+    # Close the pooled DB connections and hashing workers on shutdown
+    password_hasher.shutdown()
+    await database.dispose_engines()
+
+
+app = FastAPI(title=__app_name__, version=__version__, lifespan=lifespan)
+app.router.route_class = AppRoute
+if OPENAPI_PRERENDER:
+    openapi_cache = install_openapi_cache(app)
+
+gauges.update({
+    "token_cache_hits": lambda: token_cache.hits,
+    "token_cache_misses": lambda: token_cache.misses,
+    "token_cache_size": lambda: len(token_cache),
+    "response_cache_hits": lambda: response_cache.hits,
+    "response_cache_misses": lambda: response_cache.misses,
+    "password_hash_pending": lambda: password_hasher.pending,
+    "password_hash_rounds": lambda: password_hasher.policy.rounds,
+    "login_rate_limited": lambda: login_limiter.rejected,
+    "compressed_cache_hits": lambda: compressed_cache.hits,
+    "compressed_cache_bytes": lambda: compressed_cache.size,
+    "cors_preflight_cache_hits": lambda: preflight_cache.hits,
+    "cors_preflight_cache_misses": lambda: preflight_cache.misses,
+})
+# app = FastAPI(dependencies=[Depends(verify_token), Depends(verify_key)])
+# By adding dependencies in the app itself will declare the dependencies as global.
+# So it will be available in whole application.
+# They run once per request even if a route lists them again, and header_secrets behind them is app_scoped.
+
+# Routers are matched in this order, keep it when adding one with paths overlapping another router
+for service in (root, params, files, forms, bodies, bulk, aggregation, responses, errors, dependency, auth):
+    app.include_router(service.router)
+
+add_middlewares(app)
+
+@app.exception_handler(UnicornException)
+async def unicorn_exception_handler(request: Request, exc: UnicornException):
+    """
+    Custom exception handler of the class UnicorException
+    :param request:
+    :param exc:
+    :return:
+    """
+    return JSONResponse(
+        status_code=418,
+        content={"message": f"Oops! {exc.name} did something. There goes a rainbow..."},
+    )
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    """
+    Override request validation exceptions
+    :param request:
+    :param exc:
+    :return: exception along with request body that sent on API - content=jsonable_encoder({"detail": exc.errors(), "body": exc.body})
+    """
+    print("This is the first handler, RequestValidationError")
+    return PlainTextResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        content=jsonable_encoder({"detail": exc.errors(), "body": exc.body}),)
+
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request, exc):
+    """
+    Override the HTTPException error handler
+    :param request:
+    :param exc:
+    :return:
+    """
+    print("This is the first handler, StarletteHTTPException")
+    return PlainTextResponse(str(exc.detail), status_code=exc.status_code, headers=getattr(exc, "headers", None))
+
+@app.exception_handler(StarletteHTTPException)
+async def custom_http_exception_handler(request, exc):
+    print(f"OMG! An HTTP error!: {repr(exc)}")
+    return await http_exception_handler(request, exc)
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request, exc):
+    print(f"OMG! The client sent invalid data!: {exc}")
+    return await request_validation_exception_handler(request, exc)
@@ -0,0 +1,39 @@
+from fastapi import FastAPI
+
+from compression import CompressionMiddleware
+from cors import CachedCORSMiddleware
+from metrics import TimingMiddleware
+from varaibles import origins, CORS_MAX_AGE
+
+"""
+When you add multiple middlewares using either @app.middleware() decorator or app.add_middleware()
+method, each new middleware wraps the application, forming a stack. The last middleware added is the outermost, 
+and the first is the innermost.
+app.add_middleware(MiddlewareA)
+app.add_middleware(MiddlewareB)
+
+This results in the following execution order:
+
+Request: MiddlewareB → MiddlewareA → route
+
+Response: route → MiddlewareA → MiddlewareB
+"""
+
+
+def add_middlewares(app: FastAPI):
+    # Innermost, so X-Process-Time and the request histogram include the compression
+    app.add_middleware(CompressionMiddleware)
+
+    # @app.middleware("http") with call_next wraps every response in a stream, TimingMiddleware is a plain ASGI
+    # middleware that records the per route latency histograms served on /metrics and still sets X-Process-Time.
+    app.add_middleware(TimingMiddleware)
+
+    # This will allow cors orign, preflights are answered from a cache (cors.py)
+    app.add_middleware(
+        CachedCORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        max_age=CORS_MAX_AGE,
+    )
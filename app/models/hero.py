@@ -0,0 +1,11 @@
+from sqlmodel import Field, SQLModel
+
+# SQLModel table of the SQLModel tutorial. It used to be in schemas.py, where sqlmodel's Field shadowed pydantic's
+# and every request schema paid for importing sqlmodel.
+
+
+class Hero(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    name: str = Field(index=True)
+    age: int | None = Field(default=None, index=True)
+    secret_name: str
@@ -0,0 +1,151 @@
+from typing import Annotated, Callable, Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from pydantic_core import from_json, to_json
+from starlette.concurrency import run_in_threadpool
+
+from app.core.routing import AppRoute
+from schemas import PricesSummary, Tags, WeightsSummary
+from varaibles import AGGREGATION_MAX_BODY_SIZE, AGGREGATION_MAX_TOP_K, AGGREGATION_THREADPOOL_SIZE
+
+"""
+Batch aggregation of weight maps and item price/tax columns, computed with NumPy (aggregation.py).
+
+Every route takes JSON or the binary format (Content-Type: application/octet-stream, raw little-endian float64
+buffers, see aggregation.py) and the routes returning a whole column answer in the format of the request. aggregation
+(and numpy) are imported by the first request, `import main` doesn't pay for them, and without numpy the routes
+answer 501.
+
+    curl -X POST localhost:8000/aggregate/weights/?top_k=3 -H "Content-Type: application/octet-stream" \
+        --data-binary @weights.f64
+"""
+
+router = APIRouter(route_class=AppRoute)
+
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+
+def _aggregation():
+    try:
+        import aggregation
+    except ImportError:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                            detail="Aggregation needs numpy: pip install numpy")
+    return aggregation
+
+
+async def _read(request: Request) -> tuple[bytes, bool]:
+    """
+    :return: the body and whether it is in the binary format
+    """
+    content_length = request.headers.get("content-length", "")
+    # Content-Length first so an announced huge body isn't read at all
+    if (content_length.isdigit() and int(content_length) > AGGREGATION_MAX_BODY_SIZE) or \
+            len(body := await request.body()) > AGGREGATION_MAX_BODY_SIZE:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                            detail=f"At most {AGGREGATION_MAX_BODY_SIZE} bytes per request")
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    return body, media_type == BINARY_MEDIA_TYPE
+
+
+async def _run(body: bytes, compute: Callable):
+    """
+    Parse and aggregate, in the thread pool for large bodies (NumPy releases the GIL). Bad batches are a 422.
+    """
+    aggregation = _aggregation()
+    try:
+        if len(body) >= AGGREGATION_THREADPOOL_SIZE:
+            return await run_in_threadpool(compute, aggregation)
+        return compute(aggregation)
+    except aggregation.AggregationError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(exc))
+
+
+def _json(body: bytes):
+    try:
+        return from_json(body)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=f"Invalid JSON: {exc}")
+
+
+def _weights(aggregation, body: bytes, binary: bool, keys: bool):
+    if binary:
+        return aggregation.weights_from_buffer(body, with_keys=keys)
+    return aggregation.weights_from_mapping(_json(body))
+
+
+def _prices(aggregation, body: bytes, binary: bool, tax: bool):
+    if binary:
+        return aggregation.prices_from_buffer(body, with_tax=tax)
+    return aggregation.prices_from_columns(_json(body))
+
+
+@router.post("/aggregate/weights/", response_model=WeightsSummary, tags=[Tags.aggregation])
+async def aggregate_weights(request: Request,
+                            top_k: Annotated[int, Query(ge=0, le=AGGREGATION_MAX_TOP_K)] = 10,
+                            keys: Annotated[bool, Query()] = False):
+    """
+    Total, mean, min, max and top-k of a weight map.
+    Body: JSON {"key": weight, ...}, or binary float64 weights (the keys are the positions).
+    :param top_k: number of largest weights returned
+    :param keys: binary body only, n int64 keys come before the n weights
+    """
+    body, binary = await _read(request)
+
+    def compute(aggregation):
+        weight_keys, values = _weights(aggregation, body, binary, keys)
+        return aggregation.summarize_weights(values, weight_keys, top_k)
+
+    return await _run(body, compute)
+
+
+@router.post("/aggregate/weights/normalized", response_class=Response, tags=[Tags.aggregation])
+async def normalize_weights(request: Request, method: Literal["sum", "max"] = "sum",
+                            keys: Annotated[bool, Query()] = False):
+    """
+    The weights divided by their total (sum) or by the largest absolute weight (max).
+    Same body as /aggregate/weights/. A JSON map gets the normalised JSON map back, a binary body the normalised
+    float64 weights, in the same order and without the keys.
+    """
+    body, binary = await _read(request)
+
+    def compute(aggregation):
+        weight_keys, values = _weights(aggregation, body, binary, keys)
+        normalized = aggregation.normalize(values, method)
+        if binary:
+            return aggregation.to_buffer(normalized)
+        return to_json(dict(zip(weight_keys, normalized.tolist())))
+
+    content = await _run(body, compute)
+    return Response(content, media_type=BINARY_MEDIA_TYPE if binary else "application/json")
+
+
+@router.post("/aggregate/prices/", response_model=PricesSummary, tags=[Tags.aggregation])
+async def aggregate_prices(request: Request, tax: Annotated[bool, Query()] = True):
+    """
+    Totals of price, tax and price with tax of a batch of items, mean/min/max of the price with tax.
+    Body: JSON {"price": [...], "tax": [...]} (tax optional, nulls allowed), or binary float64 prices followed by the
+    taxes (NaN when an item has none).
+    :param tax: binary body only, false when it is the prices alone
+    """
+    body, binary = await _read(request)
+
+    def compute(aggregation):
+        return aggregation.summarize_prices(*_prices(aggregation, body, binary, tax))
+
+    return await _run(body, compute)
+
+
+@router.post("/aggregate/prices/with-tax", response_class=Response, tags=[Tags.aggregation])
+async def prices_with_tax(request: Request, tax: Annotated[bool, Query()] = True):
+    """
+    price + tax of every item, same body as /aggregate/prices/. JSON gets a JSON list back, binary the float64 column.
+    """
+    body, binary = await _read(request)
+
+    def compute(aggregation):
+        taxed = aggregation.price_with_tax(*_prices(aggregation, body, binary, tax))
+        return aggregation.to_buffer(taxed) if binary else to_json(taxed.tolist())
+
+    content = await _run(body, compute)
+    return Response(content, media_type=BINARY_MEDIA_TYPE if binary else "application/json")
@@ -0,0 +1,77 @@
+from datetime import timedelta
+from typing import Annotated
+
+from fastapi import APIRouter, Request, Response, status, HTTPException, Depends
+from fastapi.security import OAuth2PasswordRequestForm
+
+from app.core.routing import AppRoute
+from app.dependencies.auth import oauth2_scheme, get_current_active_user, authenticate_user, signing_keys
+from schemas import BaseUser, Tags, Token
+from utiles import create_access_token
+from varaibles import ACCESS_TOKEN_EXPIRE_MINUTES, JWKS_MAX_AGE
+from repositories import user_repository
+from hashing import last_hash_latency
+from rate_limit import login_rate_limit
+from jwt_keys import KeyRing
+from response_cache import etag_matches
+
+router = APIRouter(route_class=AppRoute)
+
+
+@router.get("/auth/login/", tags=[Tags.auth])
+async def login_auth(token: Annotated[str, Depends(oauth2_scheme)]):
+    """
+    This will help you to auth using OAuth2
+    :param token:
+    :return:
+    """
+    return token
+
+@router.post("/token", tags=[Tags.auth], dependencies=[Depends(login_rate_limit)])
+async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
+    # Same check as /jwt/token, the fakehashed passwords are accepted once and migrated to the hashing policy
+    user = await authenticate_user(user_repository, form_data.username, form_data.password)
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect username or password")
+
+    return {"access_token": user.username, "token_type": "bearer"}
+
+@router.post("/jwt/token", tags=[Tags.auth], dependencies=[Depends(login_rate_limit)])
+async def login_for_access_token(
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()], response: Response,) -> Token:
+    user = await authenticate_user(user_repository, form_data.username, form_data.password)
+    hash_latency = last_hash_latency.get()
+    if hash_latency is not None:
+        response.headers["X-Hash-Time"] = str(hash_latency)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user.username}, expires_delta=access_token_expires
+    )
+    return Token(access_token=access_token, token_type="bearer")
+
+
+
+@router.get("/users/me", tags=[Tags.auth])
+async def read_users_me(
+    current_user: Annotated[BaseUser, Depends(get_current_active_user)],
+):
+    return current_user
+
+
+@router.get("/.well-known/jwks.json", tags=[Tags.auth])
+async def jwks(request: Request, keys: Annotated[KeyRing, Depends(signing_keys)]):
+    """
+    Public keys of the access tokens, other services verify our tokens locally with them (match the token's kid).
+    Rendered once per key change, served as is.
+    """
+    body, etag = keys.jwks
+    headers = {"etag": etag, "cache-control": f"public, max-age={JWKS_MAX_AGE}"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
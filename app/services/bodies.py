@@ -0,0 +1,204 @@
+from datetime import datetime, time, timedelta
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Path, Body
+from fastapi.encoders import jsonable_encoder
+
+from app.core.routing import AppRoute
+from fast_body import json_body
+from negotiation import content_negotiation
+from schemas import Image, Item, Offer, User
+from repositories import item_repository
+from response_cache import response_cache
+
+router = APIRouter(route_class=AppRoute)
+
+
+@router.post("/create/items/")
+@content_negotiation
+async def create_item(item: Item):
+    """
+    This is used to understand post method. Also Request body using class
+    :param item:
+    :return: item
+    """
+    item_dict = item.dict()
+    if item.tax is not None:
+        price_with_tax = item.price + item.tax
+        item_dict.update({"price_with_tax": price_with_tax})
+    return item_dict
+
+@router.put("/update/items/{item_id}")
+@content_negotiation
+async def update_item(item_id: int, item: Item, q: str or None = None):
+    """
+    This is to understand put method.
+    :param item_id: int
+    :param item: class of Item
+    :param q:
+    :return:
+    """
+    result = {"item_id": item_id, **item.dict()}
+    if q:
+        result.update({"q": q})
+    return result
+
+@router.put("/mix/body/path/query/{item_id}")
+async def multi_body_param(item_id: Annotated[int, Path(title="The ID of the item to get", ge=0, le=1000)],
+                           item: Item, user: User, q: str | None = None,):
+    result = {
+        "item_id": item_id,
+        "item": item,
+        "user": user
+    }
+    if q:
+        result.update({"q": q})
+    return result
+
+@router.put("/mix/body/path/query/singular/value/{item_id}/")
+async  def single_body_param(item_id: int, item: Item, user: User, importance: Annotated[int, Body()]):
+    """
+    Can pass other params in body other than pydantic model using Body()
+    :param item_id:
+    :param item:
+    :param user:
+    :param importance: this will treat as a body param
+    :return:
+    """
+    return {
+        "item_id": item_id,
+        "item": item,
+        "user": user,
+        "importance": importance
+    }
+
+@router.put("/mix/body/path/query/singular/value/embed/{item_id}/")
+async  def single_body_param(item_id: int, item: Annotated[Item, Body(embed=True, examples=[
+                {
+                    "name": "Foo",
+                    "description": "A very nice Item",
+                    "price": 35.4,
+                    "tax": 3.2,
+                }], openapi_examples={
+                "normal": {
+                    "summary": "A normal example",
+                    "description": "A **normal** item works correctly.",
+                    "value": {
+                        "name": "Foo",
+                        "description": "A very nice Item",
+                        "price": 35.4,
+                        "tax": 3.2,
+                    },
+                },
+                "converted": {
+                    "summary": "An example with converted data",
+                    "description": "FastAPI can convert price `strings` to actual `numbers` automatically",
+                    "value": {
+                        "name": "Bar",
+                        "price": "35.4",
+                    },
+                },
+                "invalid": {
+                    "summary": "Invalid data is rejected with an error",
+                    "value": {
+                        "name": "Baz",
+                        "price": "thirty five point four",
+                    },
+                },
+            },)]):
+    """
+    Can pass other params in body other than pydantic model using Body()
+    examples : For json schema example (For an older version)
+    openapi_examples:  for OpenApi Schema example. (For an older version)
+    :param item_id:
+    :param item: here we can add key for the item like { "item": { Item dict } }
+    By default, FastAPI will then expect its body directly.
+    But if you want it to expect a JSON with a key 'item'
+    :return:
+    """
+    return {
+        "item_id": item_id,
+        "item": item
+    }
+
+@router.post("/images/multiple/")
+@content_negotiation
+@json_body
+async def create_multiple_images(images: list[Image]):
+    """
+    The list is validated straight from the request bytes (@json_body), see fast_body.py
+    """
+    return images
+
+@router.post("/offers/")
+@content_negotiation
+@json_body
+async def create_offer(offer: Offer):
+    """
+    Arbitrarily deeply nested body: Offer -> list[Item] -> list[Image].
+    Validated from the request bytes (@json_body).
+    :param offer:
+    :return: summary of the offer
+    """
+    return {"name": offer.name, "price": offer.price, "items": len(offer.items),
+            "images": sum(len(item.images or ()) for item in offer.items)}
+
+@router.post("/index-weights/")
+@content_negotiation
+@json_body
+async def create_index_weights(weights: dict[int, float]):
+    """
+    declare a body as a dict with keys of some type and values of some other type.
+    :param weights: accept any dict as long as it has int keys with float values
+    Keep in mind that JSON only supports str as keys.
+    But Pydantic has automatic data conversion.
+    This means that, even though your API clients can only send strings as keys, as long as those strings contain pure
+    integers, Pydantic will convert them and validate them.
+    And the dict you receive as weights will actually have int keys and float values.
+    :return:
+    """
+    return weights
+
+
+@router.put("/items/additional/datatypes/{item_id}")
+async def read_items(
+    item_id: UUID,
+    start_datetime: Annotated[datetime, Body()],
+    end_datetime: Annotated[datetime, Body()],
+    process_after: Annotated[timedelta, Body()],
+    repeat_at: Annotated[time | None, Body()] = None,
+):
+    """
+    Date, datetime and timedelta will be in ISO8601 format
+    """
+    start_process = start_datetime + process_after
+    duration = end_datetime - start_process
+    return {
+        "item_id": item_id,
+        "start_datetime": start_datetime,
+        "end_datetime": end_datetime,
+        "process_after": process_after,
+        "repeat_at": repeat_at,
+        "start_process": start_process,
+        "duration": duration,
+    }
+
+@router.patch("/patch/items/{item_id}", response_model=Item)
+@content_negotiation
+async def update_item(item_id: str, item: Item):
+    """
+    To understand http patch.
+    Used for partial update.
+
+    :param item_id:
+    :param item:
+    :return:
+    """
+    stored_item_data = await item_repository.get(item_id)
+    stored_item_model = Item(**stored_item_data)
+    update_data = item.model_dump(exclude_unset=True) # item.dict() deprecated
+    updated_item = stored_item_model.model_copy(update=update_data) # item.copy() deprecated
+    await item_repository.put(item_id, jsonable_encoder(updated_item))
+    response_cache.invalidate_tag("items")
+    return updated_item
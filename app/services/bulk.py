@@ -0,0 +1,213 @@
+import json
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+
+from app.core.routing import AppRoute
+from fast_body import json_decode_error
+from negotiation import FORMATS, BinaryFormat, content_negotiation, decode_body, request_format
+from schemas import Item, BulkItem, BulkItemUpdate, BulkItemResult, BulkItemsResponse, Tags
+from varaibles import BULK_MAX_BODY_SIZE, BULK_MAX_ITEMS
+from repositories import item_repository
+from response_cache import response_cache
+
+"""
+Bulk versions of /create/items/ and /patch/items/{item_id}.
+
+The body is a JSON array or NDJSON (Content-Type: application/x-ndjson, one object per line), or a MessagePack/CBOR
+array for internal services (negotiation.py, the response follows Accept). A JSON array is validated in one
+validate_json call by pydantic-core, rows are only validated one by one to report the errors when some are invalid.
+Bodies over BULK_MAX_BODY_SIZE are refused before being read and more than BULK_MAX_ITEMS rows before any is
+validated (413).
+The valid rows are written with one item_repository.put_many (one transaction on the SQL backend) and the response
+has one result per row, in the order of the payload:
+
+    {"succeeded": 2, "failed": 1, "results": [{"index": 0, "id": "foo", "status": "created"}, ...]}
+
+With all_or_nothing=true nothing is written if a row fails, the valid rows are "skipped" and the status code is 422.
+"""
+
+router = APIRouter(route_class=AppRoute)
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+# max_length: pydantic-core checks the length of the array before validating its items
+_bulk_items = TypeAdapter(Annotated[list[BulkItem], Field(max_length=BULK_MAX_ITEMS)])
+_bulk_item = TypeAdapter(BulkItem)
+_bulk_item_updates = TypeAdapter(Annotated[list[BulkItemUpdate], Field(max_length=BULK_MAX_ITEMS)])
+_bulk_item_update = TypeAdapter(BulkItemUpdate)
+
+
+def _row_errors(exc: ValidationError) -> list[dict]:
+    return exc.errors(include_url=False, include_context=False, include_input=False)
+
+
+def _validate_each(rows_data: list, one: TypeAdapter) -> list[BaseModel | list[dict]]:
+    rows = []
+    for row in rows_data:
+        try:
+            rows.append(one.validate_python(row))
+        except ValidationError as exc:
+            rows.append(_row_errors(exc))
+    return rows
+
+
+def _too_many() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                         detail=f"At most {BULK_MAX_ITEMS} items per request")
+
+
+def _not_rows(exc: ValidationError) -> bool:
+    # Not an array of objects at all
+    return any(not error["loc"] or not isinstance(error["loc"][0], int) for error in exc.errors())
+
+
+def _body_error(exc: ValidationError, body) -> RequestValidationError:
+    """
+    Same errors as FastAPI for a body that isn't an array: invalid JSON, or locs under "body".
+    """
+    errors = exc.errors(include_url=False)
+    if errors[0]["type"] == "json_invalid":
+        return json_decode_error(body, errors[0]["ctx"]["error"])
+    return RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in _row_errors(exc)],
+                                  body=None)
+
+
+def _validate_many(many: TypeAdapter, validate: str, data) -> list[BaseModel] | None:
+    """
+    :return: the rows, None when some are invalid and have to be validated one by one
+    """
+    try:
+        return getattr(many, validate)(data)
+    except ValidationError as exc:
+        if any(error["type"] == "too_long" and not error["loc"] for error in exc.errors()):
+            raise _too_many()
+        if _not_rows(exc):
+            raise _body_error(exc, data)
+    return None
+
+
+def _validate_rows(body: bytes, ndjson: bool, many: TypeAdapter, one: TypeAdapter,
+                   binary: BinaryFormat | None = None) -> list[BaseModel | list[dict]]:
+    """
+    :param binary: format of a MessagePack/CBOR body
+    :return: per row, the validated model or its validation errors
+    :raises HTTPException: 413 for more than BULK_MAX_ITEMS rows, before validating them
+    """
+    if binary is not None:
+        rows_data = decode_body(binary, body)
+        if (rows := _validate_many(many, "validate_python", rows_data)) is not None:
+            return rows
+        return _validate_each(rows_data, one)
+
+    if ndjson:
+        lines = [line for line in body.splitlines() if line.strip()]
+        if len(lines) > BULK_MAX_ITEMS:
+            raise _too_many()
+        rows = []
+        for line in lines:
+            try:
+                rows.append(one.validate_json(line))
+            except ValidationError as exc:
+                rows.append(_row_errors(exc))
+        return rows
+
+    if (rows := _validate_many(many, "validate_json", body)) is not None:
+        return rows
+    return _validate_each(json.loads(body), one)
+
+
+async def _read_rows(request: Request, many: TypeAdapter, one: TypeAdapter) -> list[BaseModel | list[dict]]:
+    content_length = request.headers.get("content-length", "")
+    # Content-Length first so an announced huge body isn't read at all
+    if (content_length.isdigit() and int(content_length) > BULK_MAX_BODY_SIZE) or \
+            len(body := await request.body()) > BULK_MAX_BODY_SIZE:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                            detail=f"At most {BULK_MAX_BODY_SIZE} bytes per request")
+    content_type = request.headers.get("content-type", "")
+    media_type = content_type.split(";")[0].strip().lower()
+    return _validate_rows(body, media_type in NDJSON_MEDIA_TYPES, many, one, request_format(content_type))
+
+
+def _request_body(one: TypeAdapter) -> dict:
+    """
+    The routes read the body themselves, so the docs only know it from openapi_extra.
+    """
+    # Image, the only nested model, is in the components through Item
+    row = one.json_schema(ref_template="#/components/schemas/{model}")
+    row.pop("$defs", None)
+    rows = {"type": "array", "items": row, "maxItems": BULK_MAX_ITEMS}
+    content = {"application/json": {"schema": rows}, NDJSON_MEDIA_TYPES[0]: {"schema": row}}
+    content.update((media_type, {"schema": rows}) for media_type in FORMATS)
+    return {"requestBody": {"required": True, "content": content}}
+
+
+async def _finish(results: list[BulkItemResult], records: dict, all_or_nothing: bool):
+    failed = sum(result.status not in ("created", "updated") for result in results)
+    if failed and all_or_nothing:
+        for result in results:
+            if result.status in ("created", "updated"):
+                result.status = "skipped"
+        content = BulkItemsResponse(succeeded=0, failed=failed, results=results)
+        return JSONResponse(content.model_dump(mode="json", exclude_none=True), status_code=422)
+    if records:
+        await item_repository.put_many(records)
+        response_cache.invalidate_tag("items")
+    return BulkItemsResponse(succeeded=len(results) - failed, failed=failed, results=results)
+
+
+@router.post("/bulk/items/", response_model=BulkItemsResponse, response_model_exclude_none=True, tags=[Tags.bulk],
+             openapi_extra=_request_body(_bulk_item))
+@content_negotiation
+async def bulk_create_items(request: Request, all_or_nothing: Annotated[bool, Query()] = False):
+    """
+    Create many items in one request. Body: JSON array, NDJSON or MessagePack/CBOR array of Item with an "id".
+    An id that already exists, or appears twice in the payload, is a "conflict".
+    :param all_or_nothing: write nothing if one row fails
+    """
+    rows = await _read_rows(request, _bulk_items, _bulk_item)
+    existing = await item_repository.get_many({row.id for row in rows if isinstance(row, BulkItem)})
+    results, records = [], {}
+    for index, row in enumerate(rows):
+        if not isinstance(row, BulkItem):
+            results.append(BulkItemResult(index=index, status="invalid", errors=row))
+        elif row.id in existing or row.id in records:
+            results.append(BulkItemResult(index=index, id=row.id, status="conflict"))
+        else:
+            records[row.id] = row.model_dump(mode="json", exclude={"id"})
+            results.append(BulkItemResult(index=index, id=row.id, status="created"))
+    return await _finish(results, records, all_or_nothing)
+
+
+@router.patch("/bulk/items/", response_model=BulkItemsResponse, response_model_exclude_none=True, tags=[Tags.bulk],
+              openapi_extra=_request_body(_bulk_item_update))
+@content_negotiation
+async def bulk_update_items(request: Request, all_or_nothing: Annotated[bool, Query()] = False):
+    """
+    Partial update of many items, same merge as /patch/items/{item_id}. Body: JSON array, NDJSON or MessagePack/CBOR
+    array of {"id": ..., <Item fields to change>}. Rows with the same id are applied in order.
+    :param all_or_nothing: write nothing if one row fails
+    """
+    rows = await _read_rows(request, _bulk_item_updates, _bulk_item_update)
+    stored = await item_repository.get_many({row.id for row in rows if isinstance(row, BulkItemUpdate)})
+    results, records = [], {}
+    for index, row in enumerate(rows):
+        if not isinstance(row, BulkItemUpdate):
+            results.append(BulkItemResult(index=index, status="invalid", errors=row))
+            continue
+        current = records.get(row.id, stored.get(row.id))
+        if current is None:
+            results.append(BulkItemResult(index=index, id=row.id, status="not_found"))
+            continue
+        try:
+            # The merged record is validated as a whole Item, e.g. a patch can't remove the name
+            updated = Item.model_validate({**current, **row.model_dump(exclude_unset=True, exclude={"id"})})
+        except ValidationError as exc:
+            results.append(BulkItemResult(index=index, id=row.id, status="invalid", errors=_row_errors(exc)))
+            continue
+        records[row.id] = updated.model_dump(mode="json")
+        results.append(BulkItemResult(index=index, id=row.id, status="updated"))
+    return await _finish(results, records, all_or_nothing)
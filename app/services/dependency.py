@@ -0,0 +1,92 @@
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Depends
+
+from app.core.routing import AppRoute
+from schemas import Tags
+from utiles import common_parameters, verify_key, verify_token, query_or_cookie_extractor, get_username
+from varaibles import CommonQueryParams, STREAM_BATCH_SIZE
+from exceptions import OwnerError
+from repositories import yield_item_repository, fake_item_repository
+from pagination import next_cursor
+from streaming import StreamFormat, stream_format, stream_response
+
+router = APIRouter(route_class=AppRoute)
+
+
+@router.get("/dependency/items/", tags=[Tags.dependency])
+async def dependency_read_items(commons: Annotated[dict, Depends(common_parameters)]):
+    """
+
+    :param commons: this will return a set of parameter. These are the Dependency injection
+    :return:
+    """
+    return commons
+
+
+@router.get("/dependency/users/", tags=[Tags.dependency])
+async def dependency_read_users(commons: Annotated[dict, Depends(common_parameters)]):
+    """
+    :param commons: this will return a set of parameter. These are the Dependency injection
+    :return:
+    """
+    return commons
+
+@router.get("/dependency/class/items/", tags=[Tags.dependency])
+async  def dependency_class_read_items(commons: Annotated[CommonQueryParams, Depends(CommonQueryParams)],
+                                       fmt: Annotated[StreamFormat | None, Depends(stream_format)]):
+    if fmt:
+        # Only the items, from the cursor to the end
+        return stream_response((item async for _, item in fake_item_repository.scan(commons.after, STREAM_BATCH_SIZE)),
+                               fmt)
+    response = {}
+    if commons.q:
+        response.update({"q": commons.q})
+    page = await fake_item_repository.page(after=commons.after, limit=commons.limit,
+                                           offset=0 if commons.cursor else commons.skip)
+    response.update({"items": [item for _, item in page], "next_cursor": next_cursor(page, commons.limit)})
+    return response
+
+@router.get("/dependency/class/users/", tags=[Tags.dependency])
+async  def dependency_class_read_items(commons: Annotated[CommonQueryParams, Depends(CommonQueryParams)],
+                                       fmt: Annotated[StreamFormat | None, Depends(stream_format)]):
+    if fmt:
+        # Only the users, from the cursor to the end
+        return stream_response((user async for _, user in fake_item_repository.scan(commons.after, STREAM_BATCH_SIZE)),
+                               fmt)
+    response = {}
+    if commons.q:
+        response.update({"q": commons.q})
+    page = await fake_item_repository.page(after=commons.after, limit=commons.limit,
+                                           offset=0 if commons.cursor else commons.skip)
+    response.update({"users": [user for _, user in page], "next_cursor": next_cursor(page, commons.limit)})
+    return response
+
+@router.get("/dependency/dependable/items/", tags=[Tags.dependency])
+async def dependency_dependable_read_query(
+    query_or_default: Annotated[str, Depends(query_or_cookie_extractor)],
+):
+    """
+    This is to understand Dependable and dependent in dependency
+    :param query_or_default:
+    :return:
+    """
+    return {"q_or_cookie": query_or_default}
+
+@router.get("/dependency/list/items/", dependencies=[Depends(verify_token), Depends(verify_key)])
+async def dependency_list_read_items():
+    """
+    This is to understand list of dependencies.
+    Here verify_token and verify_key only applicable in this route if you want to apply globally use in the app iteself.
+    :return:
+    """
+    return [{"item": "Foo"}, {"item": "Bar"}]
+
+@router.get("/dependency/yield/item/{item_id}/", tags=[Tags.dependency])
+async def dependency_yield_get_item(item_id: str, username: Annotated[str, Depends(get_username)]):
+    item = await yield_item_repository.get(item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    if item["owner"] != username:
+        raise OwnerError(username)
+    return item
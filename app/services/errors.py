@@ -0,0 +1,41 @@
+from fastapi import APIRouter, HTTPException
+
+from app.core.routing import AppRoute
+from schemas import Tags
+from exceptions import UnicornException
+from repositories import item_repository
+from response_cache import cache_response
+
+router = APIRouter(route_class=AppRoute)
+
+
+@router.get("/exception/items/{item_id}", tags=[Tags.exceptions])
+@cache_response(ttl=60, tags=("items",))
+async def read_item(item_id: str):
+    item = await item_repository.get(item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return {"item": item}
+
+@router.get("/exception/items-header/{item_id}", tags=[Tags.exceptions])
+async def read_item_header(item_id: str):
+    item = await item_repository.get(item_id)
+    if item is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Item not found",
+            headers={"X-Error": "There goes my error"},
+        )
+    return {"item": item}
+
+@router.get("/unicorns/{name}", tags=[Tags.exceptions])
+async def read_unicorn(name: str):
+    if name == "yolo":
+        raise UnicornException(name=name)
+    return {"unicorn_name": name}
+
+@router.get("/custom/exception/items/{item_id}", tags=[Tags.exceptions])
+async def read_item(item_id: int):
+    if item_id == 3:
+        raise HTTPException(status_code=418, detail="Nope! I don't like 3.")
+    return {"item_id": item_id}
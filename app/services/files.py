@@ -0,0 +1,96 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Response, Form, File, UploadFile, Request
+
+from app.core.routing import AppRoute
+from schemas import Tags
+from uploads import store_request_body, store_upload_file
+from file_serving import serve_file
+
+router = APIRouter(route_class=AppRoute)
+
+
+@router.get("/files/{file_path:path}", response_class=Response)
+async def read_file(file_path: str, request: Request):
+    """
+    This is used to send path of something inside the path parameter.
+    Serves the file at file_path below FILES_ROOT, with Range/If-Range, ETag and Last-Modified support, or its
+    pre-compressed .br/.gz/.zst sibling when the client accepts it.
+    :param file_path: and the last part, :path, tells it that the parameter should match any path.
+    :return:
+    """
+    return await serve_file(file_path, request.headers.get("accept-encoding", ""))
+
+@router.post("/files/", tags=[Tags.files])
+async def create_file(file: Annotated[bytes, File()]):
+    """
+    File upload from form.
+    :param file:
+    :return:
+    """
+    return {"file_size": len(file)}
+
+@router.post("/uploadfile/", tags=[Tags.files])
+async def create_upload_file(file: UploadFile, store: bool = False):
+    """
+    Using UploadFile has several advantages over bytes:
+    You don't have to use File() in the default value of the parameter.
+    It uses a "spooled" file:
+    A file stored in memory up to a maximum size limit, and after passing this limit it will be stored in disk.
+    This means that it will work well for large files like images, videos, large binaries, etc. without consuming all the memory.
+    You can get metadata from the uploaded file.
+    It has a file-like async interface.
+    It exposes an actual Python SpooledTemporaryFile object that you can pass directly to other libraries that expect a file-like object.
+
+    :param file:
+    :param store: save the file in UPLOAD_DIR (copied in chunks) and return its size and sha256
+    :return:
+    """
+    if store:
+        return await store_upload_file(file)
+    return {"filename": file.filename}
+
+@router.post("/files/", tags=[Tags.files])
+async def create_files(files: Annotated[list[bytes], File()]):
+    """
+    Multiple files from form
+    :param files:
+    :return:
+    """
+    return {"file_sizes": [len(file) for file in files]}
+
+
+@router.post("/uploadfiles/", tags=[Tags.files])
+async def create_upload_files(files: list[UploadFile], store: bool = False):
+    """
+    Multiple files using Upload files
+    :param files:
+    :param store: save the files in UPLOAD_DIR, see /uploadfile/
+    :return:
+    """
+    if store:
+        return {"files": [await store_upload_file(file) for file in files]}
+    return {"filenames": [file.filename for file in files]}
+
+@router.put("/stream/uploadfile/{filename}", tags=[Tags.files])
+async def stream_upload_file(filename: str, request: Request):
+    """
+    Streaming upload: send the file as the raw body (Content-Type: application/octet-stream), not as a form.
+    The body is never fully in memory, it's hashed and written to UPLOAD_DIR chunk by chunk, so this is the one to
+    use for multi GB files.
+    :param filename: name to store the file under
+    :return: filename, size and sha256 of what was stored
+    """
+    return await store_request_body(request, filename)
+
+@router.post("/form/files/", tags=[Tags.files, Tags.forms])
+async def create_file(
+    file: Annotated[bytes, File()],
+    fileb: Annotated[UploadFile, File()],
+    token: Annotated[str, Form()],
+):
+    return {
+        "file_size": len(file),
+        "token": token,
+        "fileb_content_type": fileb.content_type,
+    }
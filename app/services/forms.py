@@ -0,0 +1,17 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Form
+
+from app.core.routing import AppRoute
+from schemas import FormData, Tags
+
+router = APIRouter(route_class=AppRoute)
+
+
+@router.post("/form/login/", tags=[Tags.forms])
+async def login(username: Annotated[str, Form()], password: Annotated[str, Form()]):
+    return {"username": username}
+
+@router.post("/form/model/login/", tags=[Tags.forms])
+async def login(form_data: Annotated[FormData, Form()]):
+    return {"form_data": form_data}
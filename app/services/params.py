@@ -0,0 +1,265 @@
+import random
+from typing import Annotated
+
+from fastapi import APIRouter, Query, Cookie, Header, Response, HTTPException, Depends
+from pydantic import AfterValidator
+
+from app.core.routing import AppRoute
+from schemas import ModelName, FilterParams, Cookies, CommonHeaders
+from utiles import check_valid_id
+from varaibles import data, STREAM_BATCH_SIZE
+from repositories import fake_item_repository
+from pagination import after_key, next_cursor
+from response_cache import cache_response
+from streaming import StreamFormat, stream_format, stream_response
+
+router = APIRouter(route_class=AppRoute)
+
+
+@router.get("/items/{item_id}")
+async  def read_item(item_id: int, needy: str, q: str or None = None, short: bool = False):
+    """
+    This is used for understanding path parameter in Fast API
+    :param item_id: data_type int. If the type is not defined, then item can be either string or integer
+    :param needy: Required. Act as query param
+    :param q: data_type str. Optional parameter and if not it will be set as None Act as query param
+    :param short data_type bool Optional parameter and if not it will be set as False Act as query param
+    :return: item_id
+    """
+    item = {"item_id": item_id}
+    if q:
+        item.update({"q": q})
+    if not short:
+        item.update(
+            {"description": "This is an amazing item that has a long description"}
+        )
+    return item
+
+@router.get("/models/{model_name}")
+@cache_response(ttl=300)
+async def get_model(model_name: ModelName):
+    """
+    This is used to understand passing values to a class
+    :param model_name: class ModelName
+    :return:
+    """
+    if model_name is ModelName.alexnet:
+        return {"model_name": model_name, "message": "Deep Learning FTW!"}
+
+    if model_name.value == "lenet":
+        return {"model_name": model_name, "message": "LeCNN all the images"}
+
+    return {"model_name": model_name, "message": "Have some residuals"}
+
+@router.get("/items/")
+async def read_items(response: Response, fmt: Annotated[StreamFormat | None, Depends(stream_format)],
+                     skip: int = 0, limit: int = 10, cursor: str | None = None):
+    """
+    This is used for understanding query parameter.
+    The query is the set of key-value pairs that go after the ? in a URL, separated by & characters.
+    Example: /items/?skip=1&item=2
+    :param skip:
+    :param limit:
+    :param cursor: X-Next-Cursor header of the previous page. Used instead of skip so deep pages stay cheap.
+    :param fmt: ?stream=ndjson|json exports every item after the cursor, skip and limit are ignored
+    :return:
+    """
+    try:
+        after = after_key(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if fmt:
+        return stream_response((item async for _, item in fake_item_repository.scan(after, STREAM_BATCH_SIZE)), fmt)
+    page = await fake_item_repository.page(after=after, limit=limit, offset=0 if cursor else skip)
+    next_page = next_cursor(page, limit)
+    if next_page:
+        # Header so the body stays a plain list for existing clients
+        response.headers["X-Next-Cursor"] = next_page
+    return [item for _, item in page]
+
+@router.get("/users/{user_id}/items/{item_id}")
+async def read_user_item(user_id: int, item_id: str, q: str or None = None, short: bool = False):
+    item = {"item_id": item_id, "owner_id": user_id}
+    if q:
+        item.update({"q": q})
+    if not short:
+        item.update(
+            {"description": "This is an amazing item that has a long description"}
+        )
+    return item
+
+@router.get("/annotated/items/")
+async def annotated_items(q: Annotated[str or None, Query(min_length=3, max_length=50)] = None, pattern="^fixedquery$"):
+    """
+    Annotated can be used to add metadata to your parameters
+    Here we are using Query() because this is a query parameter
+    :param q:
+    :return:
+    """
+    results = {"items": [{"item_id": "Foo"}, {"item_id": "Bar"}]}
+    if q:
+        results.update({"q": q})
+    return results
+
+@router.get("/annotated/default/items/")
+async def annotated_default_items(q: Annotated[str, Query(min_length=3)] = "fixedquery"):
+    """
+
+    :param q: default value is fixedquery.
+    Also used
+    - q: Annotated[str, Query()] = "rick"
+    - q: str = Query(default="rick")
+    :return:
+    """
+    results = {"items": [{"item_id": "Foo"}, {"item_id": "Bar"}]}
+    if q:
+        results.update({"q": q})
+    return results
+
+@router.get("/query/parameter/list/items/")
+async def query_param_list_items(q: Annotated[list[str] | None, Query()] = None):
+    """
+    Help to pass a list of data for param
+    :param q: http://localhost:8000/items/?q=foo&q=bar
+    :return:
+    """
+    query_items = {"q": q}
+    return query_items
+
+@router.get("/query/parameter/list/default/items/")
+async def query_param_list_default_items(q: Annotated[list[str], Query()] = ["foo", "bar"]):
+    """
+    Help for list of param in query with default value.
+    :param q:
+    :return:
+    """
+    query_items = {"q": q}
+    return query_items
+
+@router.get("/query/parameter/list/list/default/items/")
+async def query_param_list_list_items(q: Annotated[list, Query()] = []):
+    """
+    Help to pass as a list in any type
+    :param q: list
+    :return:
+    """
+    query_items = {"q": q}
+    return query_items
+
+@router.get("/annotated/metadata/items/")
+async def annotated_metadata_items(q: Annotated[
+        str | None,
+        Query(
+            title="Query string",
+            description="Query string for the items to search in the database that have a good match",
+            min_length=3,
+            max_length=50,
+            pattern="^fixedquery$",
+            deprecated=True,
+        ),
+    ] = None,):
+    """
+    Annotated can be used to add metadata to your parameters
+    title : for title
+    description: for description
+    deprecated: You have to leave it there a while because there are clients using it, but you want the docs to clearly
+    show it as deprecated.
+    :param q:
+    :return:
+    """
+    results = {"items": [{"item_id": "Foo"}, {"item_id": "Bar"}]}
+    if q:
+        results.update({"q": q})
+    return results
+
+@router.get("/annotated/alias/items/")
+async def annotated_alias_items(q: Annotated[str | None, Query(alias="item-query")] = None):
+    """
+    alias: But item-query is not a valid Python variable name.
+    The closest would be item_query.
+    But you still need it to be exactly item-query
+    Then you can declare an alias, and that alias is what will be used to find the parameter value
+    :param q:
+    :return:
+    """
+    results = {"items": [{"item_id": "Foo"}, {"item_id": "Bar"}]}
+    if q:
+        results.update({"q": q})
+    return results
+
+@router.get("/annotated/exclude/schema/items/")
+async def annotated_exclude_schema_items(hidden_query: Annotated[str | None, Query(include_in_schema=False)] = None,):
+    """
+    To exclude a query parameter from the generated OpenAPI schema (and thus, from the automatic documentation systems),
+    set the parameter include_in_schema of Query to False:
+    :param hidden_query:
+    :return:
+    """
+    if hidden_query:
+        return {"hidden_query": hidden_query}
+    else:
+        return {"hidden_query": "Not found"}
+
+@router.get("/annotated/custom/validation/items/")
+async def annotated_validation_items(id: Annotated[str | None, AfterValidator(check_valid_id)] = None,):
+    if id:
+        item = data.get(id)
+    else:
+        id, item = random.choice(list(data.items()))
+    return {"id": id, "name": item}
+
+@router.get("/query/param/pydantic/model/")
+async def read_pydantic_model(filter_query: Annotated[FilterParams, Query()]):
+    return filter_query
+
+@router.get("/cookies/items/")
+async def cookies_items(session_id: Annotated[str | None, Cookie()] = None):
+    """
+    Used to understand Cookies
+    :param session_id: Comes inside the cookies imported from fastapi
+    :return:
+    """
+    return { "session_id": session_id}
+
+@router.get("/header/items/")
+async def header_items(user_agent: Annotated[str | None, Header()] = None):
+    """
+    This is used to understand Header parameter
+    :param user_agent: Passed in Header
+    But automatically convert this param to User-Agent by fastapi to support the HTTP proxies
+    Can also disable this by Header(convert_underscores=False) but may affect the HTTP proxies
+    :return:
+    """
+    return {
+        "user_agent": user_agent
+    }
+
+@router.get("/duplicate/header/items/")
+async def header_items(x_token: Annotated[list[str] | None, Header()] = None):
+    """
+    This is used to understand Duplicate Header parameter
+    It is possible to receive duplicate headers. That means, the same header with multiple values.
+    :param x_token: Passed in Header (X-Token)
+    :return:
+    """
+    return {
+        "X-Token Values": x_token
+    }
+
+@router.get("/cookies/model/items/")
+async def cookies_model_items(cookies: Annotated[Cookies, Cookie()]):
+    """
+    Used to understand Cookies as model
+    :param cookies: Taken from the class Cookies
+    :return:
+    """
+    return cookies
+
+@router.get("/header/model/items/")
+async def header_model_items(headers: Annotated[CommonHeaders, Header()]):
+    """
+    Used to understand Header as model
+    :param headers: Taken from the class CommonHeaders
+    :return:
+    """
+    return headers
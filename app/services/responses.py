@@ -0,0 +1,185 @@
+from typing import Annotated, Any, Union
+
+from fastapi import APIRouter, Response, status, Depends
+from fastapi.responses import JSONResponse, RedirectResponse
+
+from app.core.routing import AppRoute
+from schemas import Item, UserIn, UserOut, BaseUser, BaseUserIn, BaseUserOut, PlaneItem, CarItem
+from utiles import fake_save_user
+from repositories import item_repository
+from response_cache import cache_response
+from negotiation import content_negotiation
+from serializers import precompiled_response
+from streaming import StreamFormat, stream_format, stream_response, stream_object_response
+
+router = APIRouter(route_class=AppRoute)
+
+
+@router.post("/without/tooling/user/", response_model=UserOut)
+async def create_user(user: UserIn) -> Any:
+    """
+    This is used to understand Body as UserIn model and Output response as UserOut
+    :param user:
+    :return: object of UserOut
+    This may have possibility of complain by mypy. Becuase UserIn and UserOut are different class.
+    """
+    return user
+
+@router.post("/with/tooling/user/")
+async def create_user(user: BaseUserIn) -> BaseUser:
+    """
+    Here this will filterout data based on class defined. Here Both classes are of same so mypy won't complain
+    :param user:
+    :return:
+    """
+    return user
+
+
+@router.get("/portal")
+async def get_portal(teleport: bool = False) -> Response:
+    """
+    This simple case is handled automatically by FastAPI because the return type annotation is the class
+    (or a subclass of) Response.
+    And tools will also be happy because both RedirectResponse and JSONResponse are subclasses of Response, so the
+    type annotation is correct.
+    :param teleport:
+    :return:
+    """
+    if teleport:
+        return RedirectResponse(url="https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+    return JSONResponse(content={"message": "Here's your interdimensional portal."})
+
+@router.get("/teleport")
+async def get_teleport() -> RedirectResponse:
+    """
+    You can also use a subclass of Response in the type annotation:
+    :return:
+    """
+    return RedirectResponse(url="https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+
+
+# @router.get("/invalid/annotation/portal")
+# async def get_portal(teleport: bool = False) -> Response | dict:
+#     """
+#     Invalid annotation
+#     Response and dict have no same class.
+#     like a union between different types where one or more of them are not valid Pydantic types,
+#     this will break the code so i am commenting it out. This is for example purpose/
+#     :param teleport:
+#     :return:
+#     """
+#     if teleport:
+#         return RedirectResponse(url="https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+#     return {"message": "Here's your interdimensional portal."}
+
+@router.get("/disable/annotation/portal", response_model=None)
+async def get_portal(teleport: bool = False) -> Response | dict:
+    """
+    The above invalid annotation will break the code so to avoid it we can use response_model=None
+    :param teleport:
+    :return:
+    """
+    if teleport:
+        return RedirectResponse(url="https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+    return {"message": "Here's your interdimensional portal."}
+
+@router.get("/exclude/unset/items/{item_id}", response_model=Item, response_model_exclude_unset=True)
+@content_negotiation
+@cache_response(ttl=60, tags=("items",))
+@precompiled_response
+async def read_item(item_id: str):
+    """
+    This will omit both default and none values from the response model.
+    response_model_exclude_unset=True will do the trick
+    :param item_id:
+    :return:
+    """
+    return await item_repository.get(item_id)
+
+@router.get("/exclude/default/items/{item_id}", response_model=Item, response_model_exclude_defaults=True)
+@content_negotiation
+@cache_response(ttl=60, tags=("items",))
+@precompiled_response
+async def read_item(item_id: str):
+    """
+    This will omit default values from the response model
+    response_model_exclude_defaults=True do the trick
+    :param item_id:
+    :return:
+    """
+    return await item_repository.get(item_id)
+
+@router.get("/exclude/none/items/{item_id}", response_model=Item, response_model_exclude_none=True)
+@content_negotiation
+@cache_response(ttl=60, tags=("items",))
+@precompiled_response
+async def read_item(item_id: str):
+    """
+    This will omit none values from the response model
+    response_model_exclude_none=True do the trick
+    :param item_id:
+    :return:
+    """
+    return await item_repository.get(item_id)
+
+@router.get("/include/items/{item_id}/name", response_model=Item, response_model_include={"name", "description"},
+)
+@content_negotiation
+@cache_response(ttl=60, tags=("items",))
+@precompiled_response
+async def read_item_name(item_id: str):
+    """
+    This will help you to include only specific fields on the response model.
+    response_model_include will help you for this. Defined in either {} or in []
+    :param item_id:
+    :return:
+    """
+    return await item_repository.get(item_id)
+
+
+@router.get("/include/items/{item_id}/public", response_model=Item, response_model_exclude={"tax"})
+@content_negotiation
+@cache_response(ttl=60, tags=("items",))
+@precompiled_response
+async def read_item_public_data(item_id: str):
+    return await item_repository.get(item_id)
+
+
+@router.post("/create/user/", response_model=BaseUserOut)
+async def create_user(user_in: BaseUserIn):
+    user_saved = fake_save_user(user_in)
+    return user_saved
+
+
+@router.get("/union/items/{item_id}", response_model=Union[PlaneItem, CarItem])
+@content_negotiation
+@cache_response(ttl=60, tags=("items",))
+@precompiled_response
+async def read_item(item_id: str):
+    return await item_repository.get(item_id)
+
+
+async def keyword_weights():
+    yield "foo", 2.3
+    yield "bar", 3.4
+
+@router.get("/keyword-weights/", response_model=dict[str, float])
+@cache_response(ttl=300, vary=("accept",))
+async def read_keyword_weights(fmt: Annotated[StreamFormat | None, Depends(stream_format)]):
+    """
+    :param fmt: json writes the object as the weights are read, ndjson sends one {"keyword", "weight"} per line
+    """
+    if fmt == "json":
+        return stream_object_response(keyword_weights())
+    if fmt == "ndjson":
+        return stream_response(({"keyword": keyword, "weight": weight} async for keyword, weight in keyword_weights()),
+                               fmt)
+    return {keyword: weight async for keyword, weight in keyword_weights()}
+
+@router.post("/status/code/items/", status_code=201)
+async def create_item(name: str):
+    return {"name": name}
+
+@router.post("/status/code/status/items/", status_code=status.HTTP_201_CREATED)
+async def create_item(name: str):
+    return {"name": name}
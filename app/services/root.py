@@ -0,0 +1,35 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.routing import AppRoute
+from metrics import render_metrics
+
+router = APIRouter(route_class=AppRoute)
+
+
+@router.get("/", summary="Root Route",
+    description="This is the root route for the Fast API app", response_description="The response description")
+async def root():
+    """
+    This is the root path for the Project. if description is given on route then it have priority rather than doc string
+    here.
+    :return:
+    Hello World as string
+    """
+    return {"message": "Hello World"}
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """
+    Prometheus scrape endpoint. The request histograms are filled by TimingMiddleware (see app/middlewares)
+    :return:
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@router.get("/deprecated/route/", deprecated=True)
+async def deprecated_route():
+    """
+    This will treat the route as deprecated.
+    :return:
+    """
+    return True
@@ -0,0 +1,64 @@
+"""
+Dependency timing check: turn DEPENDENCY_TIMING on, send a few requests to routes with Depends() graphs and print
+where the time goes per dependency (dependency_timing.py).
+
+Every route lives in an APIRouter included by app/main.py, so this also checks the instrumenting reaches the
+dependant FastAPI builds for the include. Exits with 1 when a route recorded no timing.
+
+    python benchmarks/dependencies.py
+    python benchmarks/dependencies.py -n 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# route template -> request kwargs, every one of them has sub dependencies
+ROUTES = {
+    "/dependency/dependable/items/": {"params": {"q": "foo"}},
+    "/dependency/class/items/": {"params": {"q": "foo", "limit": 2}},
+    "/dependency/list/items/": {"headers": {"X-Token": "fake-super-secret-token", "X-Key": "fake-super-secret-key"}},
+}
+
+
+async def run(requests: int) -> int:
+    sys.path.insert(0, ROOT)
+    # Before the route classes are created, DependencyTimingRoute reads it once
+    import varaibles
+    varaibles.DEPENDENCY_TIMING = True
+    from main import app
+    from dependency_timing import dependency_timings
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for path, kwargs in ROUTES.items():
+            for _ in range(requests):
+                response = await client.get(path, **kwargs)
+                response.raise_for_status()
+
+    missing = []
+    for path in ROUTES:
+        rows = dependency_timings(path)
+        if not rows:
+            missing.append(path)
+        for row in rows:
+            print(f"{path:32} {row['dependency']:28} {row['phase']:8} {row['calls']:6} calls  "
+                  f"mean {row['mean_seconds'] * 1e6:8.1f} us  max {row['max_seconds'] * 1e6:8.1f} us")
+    if missing:
+        print(f"no dependency timing recorded for {', '.join(missing)}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--requests", type=int, default=50, help="requests per route")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.requests)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Startup budget check: time `import main` in fresh interpreters and list the heavy modules it loaded.
+
+Each run imports fastapi first, then main, and the budget is on what main adds, as a ratio of the fastapi import
+of the same run: both scale with the machine (and its load), so the check doesn't pass or fail on noise. The app
+itself adds about 0.6x here.
+
+The auth (jwt, passlib) and SQL (sqlalchemy, sqlmodel) stacks and numpy (/aggregate/ routes) are only needed by the
+requests that use them, they must not come back as top-level imports. Exits with 1 when the median ratio is over
+the budget or when one of those modules is loaded by `import main`, so it can run in CI next to benchmarks/run.py.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget 0.8 --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFERRED_MODULES = ("jwt", "passlib", "sqlalchemy", "sqlmodel", "numpy")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import fastapi
+fastapi_seconds = time.perf_counter() - start
+start = time.perf_counter()
+import main
+print(json.dumps({"fastapi_seconds": fastapi_seconds, "seconds": time.perf_counter() - start,
+                  "modules": sorted(sys.modules)}))
+"""
+
+
+def measure() -> dict:
+    # A new interpreter every time, otherwise everything after the first run is already in sys.modules
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="max median time of `import main` on top of fastapi, as a ratio of `import fastapi`")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    median = statistics.median(run["seconds"] for run in runs)
+    fastapi_median = statistics.median(run["fastapi_seconds"] for run in runs)
+    ratio = statistics.median(run["seconds"] / run["fastapi_seconds"] for run in runs)
+    loaded = [name for name in DEFERRED_MODULES if name in runs[0]["modules"]]
+
+    print(f"import main: median {median * 1000:.0f} ms on top of import fastapi ({fastapi_median * 1000:.0f} ms), "
+          f"{ratio:.2f}x over {args.runs} runs (budget {args.budget:.2f}x)")
+    failed = False
+    if ratio > args.budget:
+        print("over budget, run `python -X importtime -c 'import main'` to see where the time goes")
+        failed = True
+    if loaded:
+        print(f"loaded at import time: {', '.join(loaded)}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Content negotiation benchmark: the same endpoint answering JSON and MessagePack (and CBOR with cbor2), negotiation.py,
+on large Offer and list[Item] payloads.
+
+Each case is served by a small app with the endpoint registered twice:
+    fastapi   plain APIRoute, JSON body and JSON response
+    app       the route classes of AppRoute with @content_negotiation, @json_body and @precompiled_response, the
+              request is sent in each format with the same Accept
+The endpoint echoes its body back with the body type as response_model, so each request is a decode, a validation, a
+serialization and an encode. The requests are sent straight to the ASGI app (no client, no socket).
+
+    python benchmarks/negotiation.py
+    python benchmarks/negotiation.py --size 10000 --runs 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.routing import APIRoute  # noqa: E402
+
+from fast_body import JSONBodyRoute, json_body  # noqa: E402
+from negotiation import FORMATS, NegotiatedRoute, content_negotiation  # noqa: E402
+from schemas import Item, Offer  # noqa: E402
+from serializers import PrecompiledRoute, precompiled_response  # noqa: E402
+
+
+class Route(NegotiatedRoute, PrecompiledRoute, JSONBodyRoute):
+    pass
+
+
+def payloads(size: int) -> dict[str, tuple[object, object]]:
+    items = [{"name": f"item {i}", "description": "A very nice Item", "price": 35.4, "tax": 3.2, "tags": ["a", "b"],
+              "images": [{"url": f"http://example.com/{i}.jpg", "name": "front"}]} for i in range(size)]
+    return {
+        "offer Offer": (Offer, {"name": "Offer", "price": 10.5, "items": items}),
+        "items list[Item]": (list[Item], [{**item, "images": None} for item in items]),
+    }
+
+
+def build_app(annotation) -> FastAPI:
+    app = FastAPI()
+
+    def add(path: str, route_class, *markers):
+        async def endpoint(body: annotation):  # type: ignore[valid-type]
+            return body
+        for marker in reversed(markers):
+            endpoint = marker(endpoint)
+        app.router.routes.append(route_class(path, endpoint, methods=["POST"], response_model=annotation))
+
+    add("/fastapi", APIRoute)
+    add("/app", Route, content_negotiation, json_body, precompiled_response)
+    return app
+
+
+def formats() -> dict[str, tuple[str, Callable]]:
+    """
+    :return: format name -> (media type, encoder), the first media type of each installed binary format
+    """
+    encoders = {"json": ("application/json", lambda data: json.dumps(data).encode())}
+    for media_type, binary in FORMATS.items():
+        encoders.setdefault(binary.name, (media_type, binary.dumps))
+    return encoders
+
+
+async def call(app: FastAPI, path: str, body: bytes, media_type: str) -> tuple[int, int]:
+    status = 0
+    size = 0
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.Event().wait()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        else:
+            size += len(message.get("body", b""))
+
+    headers = [(b"content-type", media_type.encode()), (b"accept", media_type.encode())]
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+             "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "", "headers": headers,
+             "server": ("bench", 80), "client": ("127.0.0.1", 1), "app": app}
+    await app(scope, receive, send)
+    return status, size
+
+
+async def bench(app: FastAPI, path: str, body: bytes, media_type: str, runs: int) -> tuple[float, int]:
+    status, size = await call(app, path, body, media_type)  # Warm up, and check it works
+    if status != 200:
+        raise RuntimeError(f"{path} answered {status} to {media_type}")
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await call(app, path, body, media_type)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), size
+
+
+async def run(size: int, runs: int):
+    encoders = formats()
+    print(f"{size} elements, median of {runs} requests, request/response size in KB")
+    print(f"{'case':<18} {'route':<8} {'format':<12} {'time':>9} {'request':>9} {'response':>9}")
+    for name, (annotation, data) in payloads(size).items():
+        app = build_app(annotation)
+        body = encoders["json"][1](data)
+        default, response_size = await bench(app, "/fastapi", body, "application/json", runs)
+        print(f"{name:<18} {'fastapi':<8} {'json':<12} {default * 1000:>7.1f}ms {len(body) / 1024:>9.0f} "
+              f"{response_size / 1024:>9.0f}")
+        for format_name, (media_type, dumps) in encoders.items():
+            body = dumps(data)
+            seconds, response_size = await bench(app, "/app", body, media_type, runs)
+            print(f"{'':<18} {'app':<8} {format_name:<12} {seconds * 1000:>7.1f}ms {len(body) / 1024:>9.0f} "
+                  f"{response_size / 1024:>9.0f}   x{default / seconds:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10_000, help="elements per body")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.size, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Latency / throughput benchmark of the app routes.
+
+Drives the app either in-process (httpx ASGITransport inside the app lifespan, no network, measures the app itself) or
+over a local uvicorn socket (measures what a client sees), then writes a JSON report. Keep the reports of two commits
+and pass the old one with --baseline to see the regressions.
+
+    python benchmarks/run.py                       # in-process, every scenario
+    python benchmarks/run.py --mode socket         # through uvicorn on 127.0.0.1
+    python benchmarks/run.py -s auth_me -n 2000 -c 32
+    python benchmarks/run.py --baseline benchmarks/results/<old commit>.json
+
+The login rate limit (rate_limit.py) would refuse all but the first few auth_token logins with 429. The app under test,
+in-process or the uvicorn child, gets LOGIN_RATE_LIMIT_PER_IP/_PER_USER buckets too large to empty, set in varaibles
+before main is imported, so the scenario times the login itself.
+
+Per scenario the report has requests/s, p50/p95/p99 latency in ms, the error count and, in-process only, the peak
+memory allocated while serving one request (tracemalloc, measured in a separate pass so it doesn't skew latency).
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+ITEM = {"name": "Foo", "description": "A very nice Item", "price": 35.4, "tax": 3.2, "tags": ["a", "b"]}
+IMAGES = [{"url": f"http://example.com/{i}.jpg", "name": f"image {i}"} for i in range(50)]
+UPLOAD = os.urandom(256 * 1024)
+
+# (attempts, seconds) of the login buckets of the app under test
+UNTHROTTLED_LOGINS = (10 ** 9, 1)
+
+# uvicorn main:app with the login buckets above, argv[1] is the port
+SERVER = f"""
+import sys
+import uvicorn
+import varaibles
+varaibles.LOGIN_RATE_LIMIT_PER_IP = varaibles.LOGIN_RATE_LIMIT_PER_USER = {UNTHROTTLED_LOGINS!r}
+uvicorn.run("main:app", host="127.0.0.1", port=int(sys.argv[1]), log_level="warning")
+"""
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    kwargs: dict = field(default_factory=dict)
+    requests: int | None = None  # Overrides --requests, for the slow ones
+    needs_token: bool = False
+
+
+SCENARIOS = [
+    # bcrypt verify dominates, keep the count low
+    Scenario("auth_token", "POST", "/jwt/token", {"data": {"username": "admin", "password": "secret"}}, requests=40),
+    Scenario("auth_me", "GET", "/users/me", needs_token=True),
+    Scenario("create_item", "POST", "/create/items/", {"json": ITEM}),
+    Scenario("images_multiple", "POST", "/images/multiple/", {"json": IMAGES}),
+    Scenario("upload_file", "POST", "/uploadfile/", {"files": {"file": ("bench.bin", UPLOAD)}}, requests=200),
+    Scenario("dependency_class", "GET", "/dependency/class/items/", {"params": {"q": "foo", "limit": 2}}),
+    Scenario("dependency_dependable", "GET", "/dependency/dependable/items/", {"params": {"q": "foo"}}),
+    Scenario("dependency_list", "GET", "/dependency/list/items/",
+             {"headers": {"X-Token": "fake-super-secret-token", "X-Key": "fake-super-secret-key"}}),
+    Scenario("response_model_item", "GET", "/exclude/unset/items/bar"),
+]
+
+
+def percentile(samples: list[float], q: float) -> float:
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+async def get_token(client: httpx.AsyncClient) -> str:
+    response = await client.post("/jwt/token", data={"username": "admin", "password": "secret"})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def request_kwargs(scenario: Scenario, token: str | None) -> dict:
+    kwargs = dict(scenario.kwargs)
+    if scenario.needs_token:
+        kwargs["headers"] = {**kwargs.get("headers", {}), "Authorization": f"Bearer {token}"}
+    return kwargs
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, total: int, concurrency: int,
+                       token: str | None) -> dict:
+    kwargs = request_kwargs(scenario, token)
+    latencies: list[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await client.request(scenario.method, scenario.path, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": total / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def measure_allocations(client: httpx.AsyncClient, scenario: Scenario, token: str | None,
+                              samples: int = 20) -> float:
+    """
+    :return: mean peak KiB traced while serving one request (client side included, it's the same for every route)
+    """
+    kwargs = request_kwargs(scenario, token)
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            await client.request(scenario.method, scenario.path, **kwargs)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks) / 1024
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(port: int) -> subprocess.Popen:
+    process = subprocess.Popen([sys.executable, "-c", SERVER, str(port)], cwd=ROOT)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn didn't start in 30s")
+
+
+async def run(args) -> dict:
+    scenarios = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    results = {}
+    async with contextlib.AsyncExitStack() as stack:
+        if args.mode == "socket":
+            port = free_port()
+            process = start_uvicorn(port)
+            stack.callback(process.wait)
+            stack.callback(process.terminate)
+            # Logins queue behind the bcrypt pool, httpx's default 5 s timeout is too short for auth_token
+            client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60,
+                                       limits=httpx.Limits(max_connections=args.concurrency))
+        else:
+            sys.path.insert(0, ROOT)
+            import varaibles
+            varaibles.LOGIN_RATE_LIMIT_PER_IP = varaibles.LOGIN_RATE_LIMIT_PER_USER = UNTHROTTLED_LOGINS
+            from main import app
+            # ASGITransport doesn't send the lifespan events, without the startup (warm_app_scoped, hashing
+            # calibration, prerendered OpenAPI) the first requests would pay for it like they don't behind uvicorn
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        await stack.enter_async_context(client)
+
+        token = await get_token(client)
+        for scenario in scenarios:
+            total = scenario.requests or args.requests
+            # Warm up caches / lazy imports before measuring
+            await run_scenario(client, scenario, min(total, args.warmup), args.concurrency, token)
+            result = await run_scenario(client, scenario, total, args.concurrency, token)
+            if args.mode == "inprocess":
+                result["peak_alloc_kib_per_request"] = await measure_allocations(client, scenario, token)
+            results[scenario.name] = result
+            print(f"{scenario.name:24} {result['throughput_rps']:9.1f} req/s  p50 {result['p50_ms']:7.2f} ms  "
+                  f"p95 {result['p95_ms']:7.2f} ms  p99 {result['p99_ms']:7.2f} ms  errors {result['errors']}")
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline['commit']} ({baseline_path})")
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        changes = []
+        for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            delta = (result[metric] - old[metric]) / old[metric] * 100 if old[metric] else 0.0
+            changes.append(f"{metric} {delta:+.1f}%")
+        print(f"{name:24} " + "  ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("inprocess", "socket"), default="inprocess")
+    parser.add_argument("-n", "--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("-s", "--scenario", action="append", choices=[s.name for s in SCENARIOS],
+                        help="run only this scenario, can be repeated")
+    parser.add_argument("-o", "--output", help="report path, default benchmarks/results/<commit>-<mode>.json")
+    parser.add_argument("--baseline", help="previous report to compare with")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "mode": args.mode,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}-{args.mode}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nsaved {output}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Request body validation benchmark: FastAPI's default body handling against @json_body (fast_body.py), validated and
+trusted, on large nested bodies.
+
+Each case is served by a small app with the same endpoint registered three times:
+    fastapi    plain APIRoute, json.loads + validation of the Python objects
+    json_body  @json_body, TypeAdapter.validate_json on the raw bytes
+    trusted    @json_body(trusted=True) with the X-Trusted-Client header, models built without validation
+The requests are sent straight to the ASGI app (no client, no socket), so the time is the route's: body parsing,
+validation, the endpoint and a small JSON response.
+
+    python benchmarks/validation.py
+    python benchmarks/validation.py --size 10000 --runs 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.routing import APIRoute  # noqa: E402
+
+import fast_body  # noqa: E402
+from fast_body import JSONBodyRoute, json_body, TRUSTED_CLIENT_HEADER  # noqa: E402
+from schemas import Image, Offer  # noqa: E402
+
+TOKEN = "benchmark"
+
+
+def payloads(size: int) -> dict[str, tuple[object, bytes]]:
+    images = [{"url": f"http://example.com/{i}.jpg", "name": f"image {i}"} for i in range(size)]
+    offer = {"name": "Offer", "price": 10.5, "items": [
+        {"name": f"item {i}", "price": 1.5, "tax": 0.2, "tags": ["a", "b"],
+         "images": [{"url": f"http://example.com/{i}.jpg", "name": "front"}]} for i in range(size)]}
+    weights = {str(i): i / 2 for i in range(size)}
+    return {
+        "images list[Image]": (list[Image], json.dumps(images).encode()),
+        "offer Offer": (Offer, json.dumps(offer).encode()),
+        "weights dict[int, float]": (dict[int, float], json.dumps(weights).encode()),
+    }
+
+
+def build_app(annotation) -> FastAPI:
+    app = FastAPI()
+
+    def add(path: str, route_class, marker=None):
+        async def endpoint(body: annotation):  # type: ignore[valid-type]
+            return {"received": len(body.items) if hasattr(body, "items") and not isinstance(body, dict) else len(body)}
+        if marker is not None:
+            endpoint = marker(endpoint)
+        app.router.routes.append(route_class(path, endpoint, methods=["POST"]))
+
+    add("/fastapi", APIRoute)
+    add("/json_body", JSONBodyRoute, json_body)
+    add("/trusted", JSONBodyRoute, json_body(trusted=True))
+    return app
+
+
+async def call(app: FastAPI, path: str, body: bytes, headers: list[tuple[bytes, bytes]]) -> int:
+    status = 0
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.Event().wait()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+             "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+             "headers": [(b"content-type", b"application/json"), *headers], "server": ("bench", 80),
+             "client": ("127.0.0.1", 1), "app": app}
+    await app(scope, receive, send)
+    return status
+
+
+async def bench(app: FastAPI, path: str, body: bytes, headers: list, runs: int) -> float:
+    status = await call(app, path, body, headers)  # Warm up, and check it works
+    if status != 200:
+        raise RuntimeError(f"{path} answered {status}")
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await call(app, path, body, headers)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+async def run(size: int, runs: int):
+    fast_body.TRUSTED_CLIENT_TOKEN = TOKEN
+    trusted_headers = [(TRUSTED_CLIENT_HEADER.encode(), TOKEN.encode())]
+    print(f"{size} elements, median of {runs} requests")
+    print(f"{'case':<26} {'fastapi':>10} {'json_body':>10} {'trusted':>10}")
+    for name, (annotation, body) in payloads(size).items():
+        app = build_app(annotation)
+        default = await bench(app, "/fastapi", body, [], runs)
+        validated = await bench(app, "/json_body", body, [], runs)
+        trusted = await bench(app, "/trusted", body, trusted_headers, runs)
+        print(f"{name:<26} {default * 1000:>8.1f}ms {validated * 1000:>8.1f}ms {trusted * 1000:>8.1f}ms"
+              f"   x{default / validated:.2f} / x{default / trusted:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10_000, help="elements per body")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.size, args.runs))
+
+
+if __name__ == "__main__":
+    main()
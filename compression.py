@@ -0,0 +1,381 @@
+import argparse
+import gzip
+import os
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from mimetypes import guess_type
+from typing import Callable, NamedTuple, Protocol
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from varaibles import (COMPRESSION_ENCODINGS, COMPRESSION_MIN_SIZE, COMPRESSION_LEVELS, COMPRESSION_STATIC_LEVELS,
+                       COMPRESSION_CACHE_BYTES, COMPRESSION_THREADPOOL_SIZE)
+
+"""
+Response compression (zstd, brotli, gzip).
+
+CompressionMiddleware is a plain ASGI middleware like TimingMiddleware. The coding is picked from Accept-Encoding: the
+client's q-values first, then the order of COMPRESSION_ENCODINGS. brotli needs `pip install brotli` and zstd
+`pip install zstandard`, the codings whose module isn't installed are skipped.
+
+    - bodies sent in one message (JSONResponse, the response cache, ...) are compressed if they have at least
+      COMPRESSION_MIN_SIZE bytes, below that the headers cost more than what is saved. Large bodies are compressed in
+      the thread pool (zlib, brotli and zstd release the GIL) so they don't block the event loop.
+    - streamed bodies (streaming.py) are compressed chunk by chunk and every chunk is flushed, nothing is buffered and
+      an NDJSON row still reaches the client when it's sent.
+    - a body with an ETag is compressed once at COMPRESSION_STATIC_LEVELS and kept in compressed_cache, the next
+      responses with the same ETag (@cache_response routes, the JWKS) reuse the compressed bytes. The ETag of a
+      compressed response is made weak, the bytes aren't the ones it was computed for.
+
+Responses that already have a Content-Encoding (/openapi.json), ranges and files (Accept-Ranges), media types that
+don't compress (images, archives, octet-stream) and Cache-Control: no-transform are sent as they are.
+
+Files below FILES_ROOT aren't compressed on the fly, they're sent with sendfile. Write their compressed siblings at
+build time instead and file_serving sends those:
+
+    python -m compression files/
+"""
+
+
+class Codec(NamedTuple):
+    name: str
+    suffix: str  # Of the pre-compressed static files
+    compress: Callable[[bytes, int], bytes]
+    compressor: Callable[[int], "StreamCompressor"]
+
+
+class StreamCompressor(Protocol):
+    """
+    Compresses a body chunk by chunk, every chunk is flushed so the client can decode it right away.
+    """
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        :return: the compressed data, flushed
+        """
+        ...
+
+    def finish(self) -> bytes:
+        """
+        :return: the end of the stream
+        """
+        ...
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+CODECS: dict[str, Codec] = {"gzip": Codec("gzip", ".gz", _gzip, _GzipCompressor)}
+
+try:
+    import brotli
+except ImportError:
+    pass
+else:
+    class _BrotliCompressor:
+        def __init__(self, level: int):
+            self._compressor = brotli.Compressor(quality=level)
+
+        def compress(self, data: bytes) -> bytes:
+            return self._compressor.process(data) + self._compressor.flush()
+
+        def finish(self) -> bytes:
+            return self._compressor.finish()
+
+    CODECS["br"] = Codec("br", ".br", lambda body, level: brotli.compress(body, quality=level), _BrotliCompressor)
+
+try:
+    import zstandard
+except ImportError:
+    pass
+else:
+    class _ZstdCompressor:
+        def __init__(self, level: int):
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+        def compress(self, data: bytes) -> bytes:
+            return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+        def finish(self) -> bytes:
+            return self._compressor.flush()
+
+    CODECS["zstd"] = Codec("zstd", ".zst",
+                           lambda body, level: zstandard.ZstdCompressor(level=level).compress(body), _ZstdCompressor)
+
+# Server preference, only the installed ones
+ENCODINGS = tuple(name for name in COMPRESSION_ENCODINGS if name in CODECS)
+
+COMPRESSIBLE_TYPES = {
+    "application/json", "application/x-ndjson", "application/javascript", "application/xml",
+    "application/yaml", "application/x-yaml", "image/svg+xml",
+    "application/msgpack", "application/x-msgpack", "application/vnd.msgpack", "application/cbor",
+}
+
+
+def compressible(content_type: str | None) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+            or media_type.endswith(("+json", "+xml")))
+
+
+@lru_cache(maxsize=512)
+def negotiate_encoding(accept_encoding: str, available: tuple[str, ...] = ENCODINGS) -> str | None:
+    """
+    Clients send a handful of different Accept-Encoding values, the result is cached per value.
+    :param accept_encoding: the Accept-Encoding header
+    :param available: codings of the server, in order of preference
+    :return: the coding to use, None for identity
+    """
+    qualities = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities["gzip" if name == "x-gzip" else name] = quality
+
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class CompressedBodyCache:
+    """
+    LRU of compressed bodies keyed by (ETag, coding, size), bounded by the total size of the compressed bodies.
+    Relies on the ETag identifying the body, as it should.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str, int], bytes] = OrderedDict()
+
+    def get(self, key: tuple[str, str, int]) -> bytes | None:
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key: tuple[str, str, int], body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._entries[key] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+
+compressed_cache = CompressedBodyCache(COMPRESSION_CACHE_BYTES)
+
+
+def _vary_on_accept_encoding(headers: MutableHeaders):
+    vary = headers.get("vary", "")
+    if "accept-encoding" not in vary.lower() and vary.strip() != "*":
+        headers.add_vary_header("Accept-Encoding")
+
+
+class CompressionMiddleware:
+    """
+    :param minimum_size: bodies sent in one message and smaller than this aren't compressed
+    :param encodings: codings to offer, in order of preference
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE, encodings: tuple[str, ...] = ENCODINGS,
+                 cache: CompressedBodyCache = compressed_cache):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = tuple(name for name in encodings if name in CODECS)
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        await self.app(scope, receive, _CompressionResponder(self, coding, send).send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, coding: str | None, send: Send):
+        self.middleware = middleware
+        self.coding = coding
+        self.codec = CODECS[coding] if coding else None
+        self._send = send
+        self.start: Message | None = None
+        self.compressor: StreamCompressor | None = None
+        self.passthrough = False
+
+    def _eligible(self, message: Message) -> bool:
+        headers = Headers(raw=message.get("headers", []))
+        if message["status"] < 200 or message["status"] in (204, 206, 304):
+            return False
+        if "content-encoding" in headers or "content-range" in headers or "accept-ranges" in headers:
+            return False
+        if "no-transform" in headers.get("cache-control", "").lower():
+            return False
+        return compressible(headers.get("content-type"))
+
+    async def send(self, message: Message):
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            if not self._eligible(message):
+                self.passthrough = True
+                await self._send(message)
+            elif self.codec is None:
+                # The response depends on Accept-Encoding even when it isn't compressed
+                self.passthrough = True
+                headers = MutableHeaders(raw=list(message.get("headers", [])))
+                _vary_on_accept_encoding(headers)
+                await self._send({**message, "headers": headers.raw})
+            else:
+                self.start = message
+            return
+
+        if message_type != "http.response.body":
+            # e.g. http.response.pathsend, send it unchanged
+            self.passthrough = True
+            if self.start is not None:
+                await self._send(self.start)
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            headers = MutableHeaders(raw=list(self.start.get("headers", [])))
+            _vary_on_accept_encoding(headers)
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self._send({**self.start, "headers": headers.raw})
+                await self._send(message)
+                return
+
+            headers["content-encoding"] = self.coding
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["etag"] = "W/" + etag
+            if not more_body:
+                body = await self._compress(body, etag)
+                headers["content-length"] = str(len(body))
+                self.passthrough = True
+                await self._send({**self.start, "headers": headers.raw})
+                await self._send({**message, "body": body})
+                return
+
+            del headers["content-length"]
+            self.compressor = self.codec.compressor(COMPRESSION_LEVELS[self.coding])
+            await self._send({**self.start, "headers": headers.raw})
+
+        data = self.compressor.compress(body) if body else b""
+        if not more_body:
+            data += self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _compress(self, body: bytes, etag: str | None) -> bytes:
+        cache = self.middleware.cache
+        if etag:
+            key = (etag, self.coding, len(body))
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+            level = COMPRESSION_STATIC_LEVELS[self.coding]
+        else:
+            level = COMPRESSION_LEVELS[self.coding]
+        if len(body) >= COMPRESSION_THREADPOOL_SIZE:
+            compressed = await run_in_threadpool(self.codec.compress, body, level)
+        else:
+            compressed = self.codec.compress(body, level)
+        if etag:
+            cache.put(key, compressed)
+        return compressed
+
+
+def precompress_file(path: str, encodings: tuple[str, ...] = ENCODINGS) -> list[str]:
+    """
+    Write the compressed siblings (<path>.gz, .br, .zst) of a file at the highest levels, skipping the ones that are
+    up to date or wouldn't be smaller.
+    :return: paths written
+    """
+    stat_result = os.stat(path)
+    written = []
+    body = None
+    for name in encodings:
+        codec = CODECS[name]
+        target = path + codec.suffix
+        if os.path.exists(target) and os.stat(target).st_mtime_ns >= stat_result.st_mtime_ns:
+            continue
+        if body is None:
+            with open(path, "rb") as file:
+                body = file.read()
+        compressed = codec.compress(body, {"gzip": 9, "br": 11, "zstd": 19}[name])
+        if len(compressed) >= len(body):
+            continue
+        with open(target, "wb") as file:
+            file.write(compressed)
+        written.append(target)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the .gz/.br/.zst siblings of the compressible files of a "
+                                                 "directory, file_serving sends them to the clients accepting them")
+    parser.add_argument("directory", help="e.g. files/ (FILES_ROOT)")
+    args = parser.parse_args()
+
+    suffixes = tuple(codec.suffix for codec in CODECS.values())
+    for root, _, names in os.walk(args.directory):
+        for name in names:
+            path = os.path.join(root, name)
+            if name.endswith(suffixes) or not compressible(guess_type(name)[0]):
+                continue
+            if os.path.getsize(path) < COMPRESSION_MIN_SIZE:
+                continue
+            for target in precompress_file(path):
+                print(f"Wrote {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,29 @@
+import database
+
 
 class MySuperContextManager:
     def __init__(self):
-        self.db = DBSession()
+        self.db = database.SessionLocal()
 
     def __enter__(self):
         return self.db
 
     def __exit__(self, exc_type, exc_value, traceback):
         self.db.close()
+
+
+class MyAsyncContextManager:
+    """
+    Same as MySuperContextManager but for the async session, use it with `async with`.
+    Rolls back if the block raised so the connection goes back to the pool clean.
+    """
+    def __init__(self):
+        self.db = database.AsyncSessionLocal()
+
+    async def __aenter__(self):
+        return self.db
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            await self.db.rollback()
+        await self.db.close()
@@ -0,0 +1,133 @@
+import re
+from collections import OrderedDict
+from typing import Iterable
+
+from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from varaibles import CORS_PREFLIGHT_CACHE_SIZE
+
+"""
+CORSMiddleware with cheap origin checks and cached preflight responses.
+
+Browsers send an OPTIONS preflight before every request with a custom header (X-Token, X-Key, X-Tag...) or a JSON
+body, the preflight has to be answered before the real request even leaves the browser. Starlette's CORSMiddleware
+walks the origins list and builds a PlainTextResponse for each of them. CachedCORSMiddleware:
+    - matches origins with a set for the exact ones and one compiled pattern for the wildcard ones
+      ("https://*.example.com", one label per *)
+    - keeps the rendered preflight (status + raw headers + body) per (origin, method, requested headers), a repeated
+      preflight is found by scanning the raw request headers and sent from the cache in two send() calls
+    - sends Access-Control-Max-Age (CORS_MAX_AGE) so the browsers cache the answer and send fewer preflights. Chrome
+      caps it at 2 hours, Firefox at 24.
+
+Everything else (the simple/actual requests) is Starlette's code with the faster is_allowed_origin.
+"""
+
+
+class OriginMatcher:
+    """
+    :param origins: allowed origins, "scheme://host[:port]", a * matches one DNS label ("https://*.example.com")
+    """
+
+    def __init__(self, origins: Iterable[str]):
+        self.exact: set[str] = set()
+        patterns = []
+        for origin in origins:
+            origin = origin.rstrip("/").lower()
+            if origin == "*":
+                continue  # Handled by CORSMiddleware.allow_all_origins
+            if "*" in origin:
+                patterns.append(re.escape(origin).replace(r"\*", r"[^./:]+"))
+            else:
+                self.exact.add(origin)
+        self.pattern = re.compile("|".join(patterns)) if patterns else None
+
+    def __call__(self, origin: str) -> bool:
+        origin = origin.lower()
+        return origin in self.exact or (self.pattern is not None and self.pattern.fullmatch(origin) is not None)
+
+
+class PreflightCache:
+    """
+    LRU of rendered preflight responses. Refused preflights are cached too, the size bounds what arbitrary origins
+    can fill.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[int, list[tuple[bytes, bytes]], bytes]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple) -> tuple[int, list[tuple[bytes, bytes]], bytes] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple, entry: tuple[int, list[tuple[bytes, bytes]], bytes]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+preflight_cache = PreflightCache(CORS_PREFLIGHT_CACHE_SIZE)
+
+_PREFLIGHT_HEADERS = {
+    b"origin": 0,
+    b"access-control-request-method": 1,
+    b"access-control-request-headers": 2,
+    b"access-control-request-private-network": 3,
+}
+
+
+class CachedCORSMiddleware(CORSMiddleware):
+    """
+    Same arguments as CORSMiddleware, plus the cache of the preflight responses.
+    """
+
+    def __init__(self, app: ASGIApp, allow_origins: Iterable[str] = (), cache: PreflightCache = preflight_cache,
+                 **kwargs):
+        allow_origins = tuple(allow_origins)
+        super().__init__(app, allow_origins=allow_origins, **kwargs)
+        self.origin_matcher = OriginMatcher(allow_origins)
+        self.cache = cache
+
+    def is_allowed_origin(self, origin: str) -> bool:
+        if self.allow_all_origins:
+            return True
+        if self.allow_origin_regex is not None and self.allow_origin_regex.fullmatch(origin):
+            return True
+        return self.origin_matcher(origin)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"] == "OPTIONS":
+            # origin, method, headers, private network: first value of each, like Headers.get
+            key = [None, None, None, None]
+            for name, value in scope["headers"]:
+                index = _PREFLIGHT_HEADERS.get(name)
+                if index is not None and key[index] is None:
+                    key[index] = value
+            if key[0] is not None and key[1] is not None:
+                key = tuple(key)
+                entry = self.cache.get(key)
+                if entry is None:
+                    response = self.preflight_response(request_headers=Headers(scope=scope))
+                    entry = (response.status_code, response.raw_headers, response.body)
+                    self.cache.put(key, entry)
+                status_code, raw_headers, body = entry
+                await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+                await send({"type": "http.response.body", "body": body})
+                return
+        await super().__call__(scope, receive, send)
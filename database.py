@@ -1,5 +1,4 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import os
 
 
 POSTGRES_USER = "fastapi"
@@ -9,7 +8,86 @@ POSTGRES_HOST = "localhost"  # or "db" if using Docker
 POSTGRES_PORT = "5432"
 
 DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+# Async driver for the routes. For tests point it to sqlite, e.g. ASYNC_DATABASE_URL="sqlite+aiosqlite:///./test.db"
+ASYNC_DATABASE_URL = os.environ.get(
+    "ASYNC_DATABASE_URL",
+    f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}",
+)
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+# Connection pool of the async engine
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))  # Seconds, keep it below the server idle timeout
+
+
+def make_async_engine(url: str = ASYNC_DATABASE_URL, **kwargs):
+    """
+    Create the async engine used by the routes.
+    sqlite (aiosqlite) doesn't use a QueuePool so the pool sizing options are only passed to real servers.
+    :param url: async database url, postgresql+asyncpg://... or sqlite+aiosqlite://...
+    :param kwargs: extra create_async_engine options, override the defaults above
+    :return: AsyncEngine
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if not url.startswith("sqlite"):
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_recycle=DB_POOL_RECYCLE)
+    options.update(kwargs)
+    return create_async_engine(url, **options)
+
+
+def _engine():
+    from sqlalchemy import create_engine
+
+    return create_engine(DATABASE_URL)
+
+
+def _session_local():
+    from sqlalchemy.orm import sessionmaker
+
+    return sessionmaker(autocommit=False, autoflush=False, bind=_get("engine"))
+
+
+def _base():
+    from sqlalchemy.orm import declarative_base
+
+    return declarative_base()
+
+
+def _async_session_local():
+    from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+    # expire_on_commit=False so objects can still be read after commit without an implicit (blocking) refresh
+    return async_sessionmaker(bind=_get("async_engine"), class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+# engine, SessionLocal, Base, async_engine and AsyncSessionLocal are created on first access: the in-memory
+# repositories never touch them, so importing the app doesn't load sqlalchemy and the database drivers.
+_lazy = {
+    "engine": _engine,
+    "SessionLocal": _session_local,
+    "Base": _base,
+    "async_engine": make_async_engine,
+    "AsyncSessionLocal": _async_session_local,
+}
+
+
+def __getattr__(name: str):
+    factory = _lazy.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = factory()
+    return value
+
+
+def _get(name: str):
+    # Module __getattr__ only runs for `database.x` / `from database import x`, not for names used in this module
+    return globals()[name] if name in globals() else __getattr__(name)
+
+
+async def dispose_engines():
+    # Nothing to close if no request used the database
+    if "async_engine" in globals():
+        await _get("async_engine").dispose()
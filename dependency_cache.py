@@ -0,0 +1,98 @@
+import functools
+import hashlib
+import inspect
+import time
+from collections import OrderedDict
+from typing import Callable
+
+"""
+Declaring how long the result of a dependency lives.
+
+app_scoped: the dependency takes no parameters and its result never changes (settings, keys, CryptContext...). It's
+computed once, at startup by warm_app_scoped() (called in the lifespan) or on the first request, and then every
+request gets the same object. Don't return something a request could mutate.
+
+    @app_scoped
+    def header_secrets():
+        ...
+
+    async def verify_token(secrets: Annotated[HeaderSecrets, Depends(header_secrets)]):
+
+Nothing is needed for once per request: FastAPI already solves a Depends(func) once per request, even if it appears in
+several sub dependency trees (the default use_cache=True).
+
+NegativeCache remembers recently rejected values, e.g. bad X-Token headers, so repeated bad requests are refused
+with a dict lookup.
+"""
+
+_app_scoped: list[Callable] = []
+
+
+def app_scoped(func: Callable) -> Callable:
+    """
+    Decorator for parameterless dependencies computed once per application.
+    """
+    if inspect.signature(func).parameters:
+        raise TypeError(f"app_scoped dependency {func.__name__} can't take parameters")
+    is_coroutine = inspect.iscoroutinefunction(func)
+    missing = object()
+    value = missing
+
+    @functools.wraps(func)
+    async def app_scoped_dependency():
+        nonlocal value
+        if value is missing:
+            value = await func() if is_coroutine else func()
+        return value
+
+    def reset():
+        nonlocal value
+        value = missing
+
+    app_scoped_dependency.reset = reset
+    _app_scoped.append(app_scoped_dependency)
+    return app_scoped_dependency
+
+
+async def warm_app_scoped():
+    """
+    Compute every app_scoped dependency, call it at startup so the first requests don't pay for them.
+    """
+    for dependency in _app_scoped:
+        await dependency()
+
+
+class NegativeCache:
+    """
+    Bounded LRU of recently rejected values with a TTL.
+    Values are stored as a digest so a client sending huge headers can't make the entries big.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[bytes, float] = OrderedDict()
+
+    @staticmethod
+    def _key(value: str) -> bytes:
+        return hashlib.blake2b(value.encode(), digest_size=16).digest()
+
+    def __contains__(self, value: str) -> bool:
+        key = self._key(value)
+        expires_at = self._entries.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False
+        return True
+
+    def add(self, value: str):
+        key = self._key(value)
+        self._entries[key] = time.monotonic() + self.ttl
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
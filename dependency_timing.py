@@ -0,0 +1,204 @@
+import functools
+import inspect
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.dependencies.models import Dependant
+from fastapi import routing as fastapi_routing
+from fastapi.routing import APIRoute
+
+from metrics import collectors
+from varaibles import DEPENDENCY_TIMING
+
+"""
+Per dependency timing of the Depends graph.
+
+With DEPENDENCY_TIMING = True, DependencyTimingRoute replaces the callable of every sub dependency of the route
+(query_or_cookie_extractor -> query_extractor, get_current_active_user -> get_current_user -> oauth2_scheme, ...)
+by a wrapper that records the wall time and the number of calls, per route template. Generator dependencies
+(get_username, get_db) are recorded twice: "setup" up to the yield and "teardown" after the response.
+
+When it's False nothing is wrapped and the route handler is the plain FastAPI one, so it costs nothing.
+Note: app.dependency_overrides are looked up by the callable, override dependencies with timing off.
+
+The numbers are on /metrics (dependency_duration_seconds) and dependency_timings(route) returns them as dicts.
+"""
+
+current_route: ContextVar[str | None] = ContextVar("current_route", default=None)
+
+# (route, dependency, phase) -> [calls, total seconds, max seconds]
+_timings: dict[tuple[str, str, str], list] = {}
+# original callable -> timed wrapper. One wrapper per callable keeps FastAPI's per request dependency cache working.
+_wrappers: dict = {}
+
+
+def _record(dependency: str, phase: str, seconds: float):
+    key = (current_route.get() or "<unknown>", dependency, phase)
+    timing = _timings.get(key)
+    if timing is None:
+        _timings[key] = [1, seconds, seconds]
+    else:
+        timing[0] += 1
+        timing[1] += seconds
+        if seconds > timing[2]:
+            timing[2] = seconds
+
+
+def _dependency_name(call: Callable) -> str:
+    return getattr(call, "__name__", None) or type(call).__name__
+
+
+def _is(check: Callable, call: Callable) -> bool:
+    if inspect.isclass(call):
+        return False
+    return check(call) or check(getattr(call, "__call__", None))
+
+
+def timed(call: Callable) -> Callable:
+    """
+    :return: a wrapper of the same kind (function, coroutine, generator, async generator) that records its timing
+    """
+    wrapper = _wrappers.get(call)
+    if wrapper is not None:
+        return wrapper
+    name = _dependency_name(call)
+
+    if _is(inspect.isasyncgenfunction, call):
+        @functools.wraps(call)
+        async def wrapper(*args, **kwargs):
+            context = asynccontextmanager(call)(*args, **kwargs)
+            start = time.perf_counter()
+            value = await context.__aenter__()
+            _record(name, "setup", time.perf_counter() - start)
+            try:
+                yield value
+            except BaseException as exc:
+                start = time.perf_counter()
+                try:
+                    suppress = await context.__aexit__(type(exc), exc, exc.__traceback__)
+                finally:
+                    _record(name, "teardown", time.perf_counter() - start)
+                if not suppress:
+                    raise
+            else:
+                start = time.perf_counter()
+                await context.__aexit__(None, None, None)
+                _record(name, "teardown", time.perf_counter() - start)
+
+    elif _is(inspect.isgeneratorfunction, call):
+        @functools.wraps(call)
+        def wrapper(*args, **kwargs):
+            context = contextmanager(call)(*args, **kwargs)
+            start = time.perf_counter()
+            value = context.__enter__()
+            _record(name, "setup", time.perf_counter() - start)
+            try:
+                yield value
+            except BaseException as exc:
+                start = time.perf_counter()
+                try:
+                    suppress = context.__exit__(type(exc), exc, exc.__traceback__)
+                finally:
+                    _record(name, "teardown", time.perf_counter() - start)
+                if not suppress:
+                    raise
+            else:
+                start = time.perf_counter()
+                context.__exit__(None, None, None)
+                _record(name, "teardown", time.perf_counter() - start)
+
+    elif _is(inspect.iscoroutinefunction, call):
+        @functools.wraps(call)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                _record(name, "call", time.perf_counter() - start)
+
+    else:
+        @functools.wraps(call)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                _record(name, "call", time.perf_counter() - start)
+
+    _wrappers[call] = wrapper
+    return wrapper
+
+
+def _instrument(dependant: Dependant):
+    for sub_dependant in dependant.dependencies:
+        if sub_dependant.call is not None and sub_dependant.call not in _wrappers.values():
+            sub_dependant.call = timed(sub_dependant.call)
+        _instrument(sub_dependant)
+
+
+def _effective_route(route: APIRoute):
+    """
+    FastAPI builds the handler of a route of an included router from a copy of the route made for the include
+    (own dependant, prefixed path), set in a context variable while get_route_handler runs.
+    :return: that copy, or the route itself when it isn't being included
+    """
+    context_var = getattr(fastapi_routing, "_effective_route_context_var", None)
+    context = context_var.get() if context_var is not None else None
+    if context is not None and context.original_route is route:
+        return context
+    return route
+
+
+class DependencyTimingRoute(APIRoute):
+    """
+    Instruments the dependencies of the route when DEPENDENCY_TIMING is on.
+    The instrumenting is done in get_route_handler, on the dependant the handler resolves: for an included router
+    it's not self.dependant.
+    """
+    dependency_timing = DEPENDENCY_TIMING
+
+    def get_route_handler(self) -> Callable:
+        if not self.dependency_timing:
+            return super().get_route_handler()
+        route = _effective_route(self)
+        _instrument(route.dependant)
+        route_handler = super().get_route_handler()
+        path = route.path
+
+        async def dependency_timing_route_handler(request: Request) -> Response:
+            # Not reset on purpose: the generator teardowns run after the handler returned
+            current_route.set(path)
+            return await route_handler(request)
+
+        return dependency_timing_route_handler
+
+
+def dependency_timings(route: str | None = None) -> list[dict]:
+    """
+    :param route: route template, e.g. "/users/me". None for every route
+    :return: one dict per (route, dependency, phase), slowest total first
+    """
+    rows = [
+        {"route": key[0], "dependency": key[1], "phase": key[2], "calls": calls,
+         "total_seconds": total, "mean_seconds": total / calls, "max_seconds": maximum}
+        for key, (calls, total, maximum) in _timings.items()
+        if route is None or key[0] == route
+    ]
+    return sorted(rows, key=lambda row: row["total_seconds"], reverse=True)
+
+
+def render_dependency_metrics() -> list[str]:
+    lines = ["# HELP dependency_duration_seconds Time spent resolving dependencies",
+             "# TYPE dependency_duration_seconds summary"]
+    for (route, dependency, phase), (calls, total, _) in sorted(_timings.items()):
+        labels = f'route="{route}",dependency="{dependency}",phase="{phase}"'
+        lines.append(f"dependency_duration_seconds_sum{{{labels}}} {total}")
+        lines.append(f"dependency_duration_seconds_count{{{labels}}} {calls}")
+    return lines
+
+
+if DEPENDENCY_TIMING:
+    collectors.append(render_dependency_metrics)
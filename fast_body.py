@@ -0,0 +1,253 @@
+import gc
+import hmac
+import re
+import types
+import typing
+from contextlib import contextmanager
+from typing import Annotated, Any, Callable
+
+from fastapi import Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pydantic_core import from_json
+
+from varaibles import TRUSTED_CLIENT_TOKEN, JSON_BODY_GC_PAUSE_SIZE
+
+"""
+Fast path for large JSON request bodies.
+
+For a body parameter FastAPI json.loads the request into dicts and lists, then validates those Python objects field
+by field. For endpoints marked with @json_body, JSONBodyRoute builds a TypeAdapter of the body type once, when the
+route is created, and validates the raw bytes with validate_json: pydantic-core parses and validates in one pass and
+the intermediate dicts are never built. The validated value is handed to FastAPI as the parsed JSON of the request,
+its own validation then only sees models that are already built and returns right away.
+
+    @router.post("/images/multiple/")
+    @json_body
+    async def create_multiple_images(images: list[Image]):
+
+Building tens of thousands of models triggers the cyclic garbage collector again and again (all of them are tracked
+and all of them survive), it was about half the time of a 10k items Offer. The collector is paused while a body of
+JSON_BODY_GC_PAUSE_SIZE bytes or more is validated, the load is synchronous so no other request runs meanwhile.
+
+Errors are the same RequestValidationError (loc "body", ...) as without the marker, invalid JSON included (loc
+("body", position), "JSON decode error", the body isn't echoed back), and the OpenAPI schema doesn't change. Only for routes with one JSON body parameter that isn't embedded. A body already decoded by NegotiatedRoute
+(MessagePack, CBOR) is validated with validate_python of the same TypeAdapter.
+
+Trusted clients: with @json_body(trusted=True), a request carrying `X-Trusted-Client: <TRUSTED_CLIENT_TOKEN>` (an
+internal service sending payloads it validated itself) skips validation, the models are built with the equivalent of
+model_construct from the parsed JSON. Nothing is checked or converted, e.g. an HttpUrl field keeps the str it was sent
+as, and serializing such a model back warns about the unexpected type. Measure before using it: pydantic-core
+validation is fast, building models from Python only wins when validation does expensive work per field, like the
+HttpUrl parsing of list[Image] (see benchmarks/validation.py). No route uses it yet.
+"""
+
+TRUSTED_CLIENT_HEADER = "x-trusted-client"
+
+
+def json_body(func: Callable | None = None, *, trusted: bool = False):
+    """
+    Opt-in marker for JSONBodyRoute, put it under the @router.post decorator.
+    :param trusted: skip the validation for requests of trusted clients, see the module docstring
+    """
+
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__json_body__ = {"trusted": trusted}
+        return endpoint
+
+    return decorator(func) if func is not None else decorator
+
+
+@contextmanager
+def paused_gc(size: int | None = None):
+    """
+    Pause the cyclic garbage collector while a large body is turned into Python objects (or back), see above.
+    :param size: of the body in bytes, paused from JSON_BODY_GC_PAUSE_SIZE. None always pauses.
+    """
+    if (size is not None and size < JSON_BODY_GC_PAUSE_SIZE) or not gc.isenabled():
+        yield
+        return
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+
+_JSON_ERROR_POSITION = re.compile(r" at line (\d+) column (\d+)$")
+
+
+def json_decode_error(body: bytes, error: str) -> RequestValidationError:
+    """
+    The error FastAPI raises for a body that isn't JSON, from the message of pydantic-core (jiter).
+    jiter reports the line and the 1-based byte column, FastAPI the character offset in the body.
+    :param error: e.g. "expected value at line 1 column 6"
+    """
+    match = _JSON_ERROR_POSITION.search(error)
+    position = 0
+    if match is not None:
+        error = error[:match.start()]
+        if error.startswith("EOF"):
+            offset = len(body)
+        else:
+            offset = 0
+            for _ in range(int(match[1]) - 1):
+                offset = body.find(b"\n", offset) + 1
+            offset = max(offset + int(match[2]) - 1, 0)
+        position = len(body[:offset].decode("utf-8", "ignore"))
+    return RequestValidationError(
+        [{"type": "json_invalid", "loc": ("body", position), "msg": "JSON decode error", "input": {},
+          "ctx": {"error": error}}], body=None)
+
+
+def _is_json(content_type: str | None) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type == "application/json" or (
+        media_type.startswith("application/") and media_type.endswith("+json"))
+
+
+def _is_trusted(request: Request) -> bool:
+    token = request.headers.get(TRUSTED_CLIENT_HEADER)
+    return TRUSTED_CLIENT_TOKEN is not None and token is not None and hmac.compare_digest(token, TRUSTED_CLIENT_TOKEN)
+
+
+def compile_constructor(annotation: Any) -> Callable[[Any], Any] | None:
+    """
+    Build, once, a function turning parsed JSON into the annotation without validating anything: models are created
+    like model_construct (defaults filled, fields_set kept), lists/sets/dicts are rebuilt with their items constructed,
+    int and float dict keys are converted from the JSON strings. Other values are used as they are.
+    :return: the constructor, None when the JSON value can be used as it is
+    """
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is Annotated:
+        return compile_constructor(args[0])
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _model_constructor(annotation)
+    if origin in (list, set, frozenset) and args:
+        item = compile_constructor(args[0])
+        if item is None:
+            return None if origin is list else origin
+        if origin is list:
+            return lambda data: [item(value) for value in data]
+        return lambda data: origin(item(value) for value in data)
+    if origin is dict and args:
+        key = args[0] if args[0] in (int, float) else None
+        value = compile_constructor(args[1])
+        if key is None and value is None:
+            return None
+        key = key or (lambda k: k)
+        value = value or (lambda v: v)
+        return lambda data: {key(k): value(v) for k, v in data.items()}
+    if origin in (typing.Union, types.UnionType):
+        options = [arg for arg in args if arg is not type(None)]
+        if len(options) == 1:
+            option = compile_constructor(options[0])
+            if option is not None:
+                return lambda data: None if data is None else option(data)
+    return None
+
+
+_model_constructors: dict[type[BaseModel], Callable[[dict], BaseModel]] = {}
+
+
+def _model_constructor(model: type[BaseModel]) -> Callable[[dict], BaseModel]:
+    if model in _model_constructors:
+        return _model_constructors[model]
+    fields = {}  # JSON key -> (field name, constructor)
+    defaults = []  # (field name, default factory, default, mutable)
+    for name, field in model.model_fields.items():
+        key = field.validation_alias if isinstance(field.validation_alias, str) else field.alias or name
+        fields[key] = (name, None)
+        if not field.is_required():
+            default = None if field.default_factory is not None else field.default
+            defaults.append((name, field.default_factory, default, isinstance(default, (list, set, dict))))
+    new = model.__new__
+    set_attribute = object.__setattr__
+
+    def construct(data: dict) -> BaseModel:
+        values = {}
+        for key, value in data.items():
+            field = fields.get(key)
+            if field is not None:
+                values[field[0]] = value if field[1] is None or value is None else field[1](value)
+        fields_set = set(values)
+        for name, default_factory, default, mutable in defaults:
+            if name not in values:
+                values[name] = default_factory() if default_factory is not None else \
+                    default.copy() if mutable else default
+        instance = new(model)
+        set_attribute(instance, "__dict__", values)
+        set_attribute(instance, "__pydantic_fields_set__", fields_set)
+        set_attribute(instance, "__pydantic_extra__", None)
+        set_attribute(instance, "__pydantic_private__", None)
+        return instance
+
+    # Registered before the fields are compiled so self-referencing models work
+    _model_constructors[model] = construct
+    for key, (name, _) in list(fields.items()):
+        fields[key] = (name, compile_constructor(model.model_fields[name].annotation))
+    return construct
+
+
+class JSONBodyRoute(APIRoute):
+    """
+    APIRoute validating the body of endpoints marked with @json_body from the raw bytes.
+    """
+
+    def get_route_handler(self) -> Callable:
+        route_handler = super().get_route_handler()
+        options = getattr(self.endpoint, "__json_body__", None)
+        if options is None:
+            return route_handler
+        if self.body_field is None or len(self.dependant.body_params) != 1 or self._embed_body_fields:
+            raise ValueError(f"{self.path}: @json_body needs exactly one JSON body parameter, not embedded")
+        field_info = self.body_field.field_info
+        adapter = TypeAdapter(Annotated[field_info.annotation, field_info])
+        construct = compile_constructor(field_info.annotation) if options["trusted"] else None
+        construct = construct or (lambda data: data)
+
+        def load(body: bytes, trusted: bool) -> Any:
+            if trusted:
+                try:
+                    return construct(from_json(body))
+                except ValueError as exc:
+                    raise json_decode_error(body, str(exc))
+            try:
+                return adapter.validate_json(body)
+            except ValidationError as exc:
+                errors = exc.errors(include_url=False)
+                if errors[0]["type"] == "json_invalid":
+                    # Only error when there is one, pydantic's has the whole body as input
+                    raise json_decode_error(body, errors[0]["ctx"]["error"])
+                raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in errors],
+                                             body=body)
+
+        def load_parsed(data: Any, trusted: bool) -> Any:
+            if trusted:
+                return construct(data)
+            try:
+                return adapter.validate_python(data)
+            except ValidationError as exc:
+                errors = exc.errors(include_url=False)
+                raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in errors],
+                                             body=data)
+
+        async def json_body_route_handler(request: Request) -> Response:
+            if hasattr(request, "_json"):
+                # Already parsed, a MessagePack/CBOR body decoded by NegotiatedRoute (negotiation.py)
+                with paused_gc(len(await request.body())):
+                    request._json = load_parsed(request._json, options["trusted"] and _is_trusted(request))
+            elif _is_json(request.headers.get("content-type")):
+                body = await request.body()
+                if body:
+                    trusted = options["trusted"] and _is_trusted(request)
+                    # Starlette caches the parsed body in _json, FastAPI's handler takes it from there
+                    with paused_gc(len(body)):
+                        request._json = load(body, trusted)
+            return await route_handler(request)
+
+        return json_body_route_handler
@@ -0,0 +1,306 @@
+import os
+import posixpath
+import re
+import stat
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from mimetypes import guess_type
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from compression import CODECS, ENCODINGS, negotiate_encoding
+from varaibles import FILES_ROOT, FILE_CACHE_SIZE, FILE_STAT_TTL, FILE_CHUNK_SIZE
+
+"""
+Serving files from FILES_ROOT for /files/{file_path:path}.
+
+Opened files are kept in a small LRU together with their stat result, so a hot file is opened and stat'ed once per
+FILE_STAT_TTL instead of on every request. Entries are reference counted: an evicted file is closed only once the
+responses still reading from it are done.
+
+Whole files are sent with the ASGI `http.response.pathsend` extension when the server supports it, the server then
+uses sendfile and the bytes never go through Python. Ranges (and servers without the extension) are read with
+os.pread on the cached descriptor, chunk by chunk, in the thread pool.
+
+Files aren't compressed on the fly. When a file has pre-compressed siblings (data.json.br, .gz, .zst, written by
+`python -m compression files/`) a client accepting one of those codings gets the sibling, with Content-Encoding, its
+own ETag and still sendfile and ranges. Which siblings exist is checked when the file is opened.
+"""
+
+
+class OpenFile:
+    __slots__ = ("path", "fd", "stat", "checked_at", "refs", "evicted", "etag", "last_modified", "encodings")
+
+    def __init__(self, path: str, fd: int, stat_result: os.stat_result):
+        self.path = path
+        self.fd = fd
+        self.stat = stat_result
+        self.checked_at = time.monotonic()
+        self.refs = 0
+        self.evicted = False
+        self.etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        self.last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        self.encodings: tuple[str, ...] = ()  # Codings with a pre-compressed sibling
+
+    def same_file(self, stat_result: os.stat_result) -> bool:
+        return (self.stat.st_ino, self.stat.st_mtime_ns, self.stat.st_size) == \
+            (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+
+
+class FileCache:
+    """
+    LRU of open descriptors + stat results, keyed by the path relative to root.
+    acquire() and release() must be called in pairs.
+    """
+
+    def __init__(self, root: str, maxsize: int = 256, stat_ttl: float = 2.0):
+        self.root = os.path.realpath(root)
+        self.maxsize = maxsize
+        self.stat_ttl = stat_ttl
+        self._entries: OrderedDict[str, OpenFile] = OrderedDict()
+
+    def _resolve(self, relative_path: str) -> str:
+        path = os.path.realpath(os.path.join(self.root, relative_path))
+        if not path.startswith(self.root + os.sep):
+            raise FileNotFoundError(relative_path)
+        return path
+
+    def _open(self, relative_path: str) -> OpenFile:
+        # Runs in the thread pool
+        path = self._resolve(relative_path)
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            stat_result = os.fstat(fd)
+            if not stat.S_ISREG(stat_result.st_mode):
+                raise FileNotFoundError(relative_path)
+        except BaseException:
+            os.close(fd)
+            raise
+        open_file = OpenFile(path, fd, stat_result)
+        open_file.encodings = tuple(name for name in ENCODINGS if os.path.isfile(path + CODECS[name].suffix))
+        return open_file
+
+    async def acquire(self, relative_path: str) -> OpenFile:
+        """
+        :param relative_path: path below root, must already be normalised (see normalise_path)
+        :raises FileNotFoundError: missing file, not a regular file or outside root
+        """
+        entry = self._entries.get(relative_path)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < self.stat_ttl:
+            self._entries.move_to_end(relative_path)
+            entry.refs += 1
+            return entry
+
+        if entry is not None:
+            try:
+                stat_result = await run_in_threadpool(os.stat, entry.path)
+            except FileNotFoundError:
+                self._evict(relative_path)
+                raise
+            if entry.same_file(stat_result):
+                entry.checked_at = now
+                self._entries.move_to_end(relative_path)
+                entry.refs += 1
+                return entry
+
+        new_entry = await run_in_threadpool(self._open, relative_path)
+        if relative_path in self._entries:
+            self._evict(relative_path)
+        self._entries[relative_path] = new_entry
+        while len(self._entries) > self.maxsize:
+            self._evict(next(iter(self._entries)))
+        new_entry.refs += 1
+        return new_entry
+
+    def release(self, entry: OpenFile):
+        entry.refs -= 1
+        if entry.evicted and entry.refs == 0:
+            os.close(entry.fd)
+
+    def _evict(self, relative_path: str):
+        entry = self._entries.pop(relative_path)
+        entry.evicted = True
+        if entry.refs == 0:
+            os.close(entry.fd)
+
+    def clear(self):
+        for relative_path in list(self._entries):
+            self._evict(relative_path)
+
+
+def normalise_path(file_path: str) -> str:
+    """
+    :return: file_path without "." parts and duplicate slashes
+    :raises FileNotFoundError: if it tries to go above the root
+    """
+    path = posixpath.normpath("/" + file_path.replace("\\", "/")).lstrip("/")
+    if not path or path == ".":
+        raise FileNotFoundError(file_path)
+    return path
+
+
+# Only digits, int() would also take signs, spaces and underscores
+_BYTE_RANGE = re.compile(r"\s*bytes\s*=\s*([0-9]*)-([0-9]*)\s*", re.IGNORECASE)
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single `bytes=` range.
+    :return: (start, end) inclusive, or None to ignore the header (multiple ranges, unknown unit or an invalid range
+    like bytes=5-3, RFC 9110 section 14.2)
+    :raises ValueError: the range is valid but can't be satisfied
+    """
+    match = _BYTE_RANGE.fullmatch(header)
+    if match is None or match[1] == match[2] == "":
+        return None
+    if match[1] == "":
+        # Suffix range, the last `length` bytes. bytes=-0 asks for nothing and an empty file has no last bytes
+        length = int(match[2])
+        if length == 0 or size == 0:
+            raise ValueError("Range not satisfiable")
+        return max(size - length, 0), size - 1
+    start = int(match[1])
+    end = int(match[2]) if match[2] else size - 1
+    if match[2] and end < start:
+        return None
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
+
+
+class RangedFileResponse(Response):
+    """
+    Response for an OpenFile of the FileCache.
+    Handles HEAD, If-None-Match / If-Modified-Since (304), Range with If-Range (206 / 416).
+    """
+
+    chunk_size = FILE_CHUNK_SIZE
+
+    def __init__(self, entry: OpenFile, cache: FileCache, media_type: str | None = None,
+                 content_encoding: str | None = None):
+        self.entry = entry
+        self.cache = cache
+        self.status_code = 200
+        self.media_type = media_type or guess_type(entry.path)[0] or "application/octet-stream"
+        self.background = None
+        self.init_headers({
+            "accept-ranges": "bytes",
+            "etag": entry.etag,
+            "last-modified": entry.last_modified,
+            "content-type": self.media_type,
+        })
+        if content_encoding is not None:
+            self.headers["content-encoding"] = content_encoding
+
+    def _not_modified(self, headers: Headers) -> bool:
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            return if_none_match.strip() == "*" or self.entry.etag in [tag.strip() for tag in if_none_match.split(",")]
+        if_modified_since = headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(if_modified_since).timestamp() >= int(self.entry.stat.st_mtime)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _range(self, headers: Headers, size: int) -> tuple[int, int] | None:
+        range_header = headers.get("range")
+        if range_header is None:
+            return None
+        if_range = headers.get("if-range")
+        if if_range is not None and if_range.strip() not in (self.entry.etag, self.entry.last_modified):
+            return None
+        return parse_range(range_header, size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self._send(scope, send)
+        finally:
+            self.cache.release(self.entry)
+
+    async def _send(self, scope: Scope, send: Send):
+        headers = Headers(scope=scope)
+        size = self.entry.stat.st_size
+        head_only = scope["method"] == "HEAD"
+
+        if self._not_modified(headers):
+            self.status_code = 304
+            del self.headers["content-type"]
+            await send({"type": "http.response.start", "status": 304, "headers": self.raw_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        try:
+            byte_range = self._range(headers, size)
+        except ValueError:
+            await send({"type": "http.response.start", "status": 416,
+                        "headers": [(b"content-range", f"bytes */{size}".encode())]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if byte_range is None:
+            start, end = 0, size - 1
+        else:
+            start, end = byte_range
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+        self.headers["content-length"] = str(end - start + 1)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        if head_only or size == 0:
+            await send({"type": "http.response.body", "body": b""})
+        elif byte_range is None and "http.response.pathsend" in scope.get("extensions", {}):
+            await send({"type": "http.response.pathsend", "path": self.entry.path})
+        else:
+            offset = start
+            while offset <= end:
+                length = min(self.chunk_size, end - offset + 1)
+                chunk = await run_in_threadpool(os.pread, self.entry.fd, length, offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": offset <= end})
+            if offset <= end:
+                # File got shorter while sending, end the body
+                await send({"type": "http.response.body", "body": b""})
+
+
+file_cache = FileCache(FILES_ROOT, maxsize=FILE_CACHE_SIZE, stat_ttl=FILE_STAT_TTL)
+
+
+async def serve_file(file_path: str, accept_encoding: str = "") -> RangedFileResponse:
+    """
+    :param file_path: path relative to FILES_ROOT
+    :param accept_encoding: Accept-Encoding of the request, to send a pre-compressed sibling
+    :raises HTTPException: 404 if there is no such file
+    """
+    try:
+        relative_path = normalise_path(file_path)
+        entry = await file_cache.acquire(relative_path)
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        raise HTTPException(status_code=404, detail="File not found")
+    if not entry.encodings:
+        return RangedFileResponse(entry, file_cache)
+
+    media_type = guess_type(entry.path)[0]
+    coding = negotiate_encoding(accept_encoding, entry.encodings)
+    response = None
+    if coding is not None:
+        try:
+            encoded = await file_cache.acquire(relative_path + CODECS[coding].suffix)
+        except (FileNotFoundError, PermissionError):
+            pass  # Removed since the file was opened, send the file itself
+        else:
+            file_cache.release(entry)
+            response = RangedFileResponse(encoded, file_cache, media_type, content_encoding=coding)
+    if response is None:
+        response = RangedFileResponse(entry, file_cache, media_type)
+    response.headers["vary"] = "Accept-Encoding"
+    return response
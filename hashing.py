@@ -0,0 +1,237 @@
+import asyncio
+import hmac
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import NamedTuple
+
+from fastapi import HTTPException, status
+
+from varaibles import (PWD_HASH_EXECUTOR, PWD_HASH_WORKERS, PWD_HASH_QUEUE_DEPTH, PWD_HASH_RETRY_AFTER,
+                       PWD_HASH_LATENCY_SAMPLES, PWD_HASH_SCHEME, PWD_HASH_ROUNDS, PWD_HASH_ARGON2_MEMORY_COST)
+
+"""
+Password hashing policy.
+
+HashPolicy says which scheme and cost new hashes get: bcrypt with `rounds`, or argon2 (needs argon2-cffi) with
+`rounds` as time_cost. Hashes made with another scheme, or a cost below `min_rounds`, are still verified, and
+verify_and_update() returns a new hash for them after a successful login. Rehashing only goes up: a hash above the
+cost of this worker is kept, workers calibrated to different costs don't rehash each other's hashes back and forth. This covers the old
+"fakehashed<password>" values of fake_users_db too.
+
+PasswordHasher.calibrate() measures a verify on this machine at startup and picks the highest cost whose verify stays
+under the latency budget, between a floor (security) and a ceiling (CPU per login). Each +1 of bcrypt rounds doubles
+the time, argon2 grows linearly with time_cost.
+"""
+
+logger = logging.getLogger(__name__)
+
+# Prefix of utiles.fake_password_hasher hashes, accepted once and then replaced by a real hash
+LEGACY_FAKE_PREFIX = "fakehashed"
+
+
+class HashPolicy(NamedTuple):
+    scheme: str = "bcrypt"  # "bcrypt" or "argon2"
+    rounds: int = 12  # bcrypt log2 cost, argon2 time_cost
+    memory_cost: int = 65536  # argon2 only, KiB
+    min_rounds: int | None = None  # Hashes below this cost are rehashed, None: below `rounds`
+
+    def context_settings(self) -> dict:
+        floor = self.rounds if self.min_rounds is None else min(self.min_rounds, self.rounds)
+        if self.scheme == "argon2":
+            # bcrypt stays to verify the existing hashes, deprecated="auto" marks them for rehashing
+            return {"schemes": ["argon2", "bcrypt"], "deprecated": "auto", "argon2__default_rounds": self.rounds,
+                    "argon2__min_rounds": floor, "argon2__memory_cost": self.memory_cost}
+        if self.scheme == "bcrypt":
+            # default_rounds, not rounds: passlib takes rounds as the max too and would downgrade costlier hashes
+            return {"schemes": ["bcrypt"], "deprecated": "auto", "bcrypt__default_rounds": self.rounds,
+                    "bcrypt__min_rounds": floor}
+        raise ValueError(f"Unknown password hash scheme {self.scheme!r}")
+
+
+_pwd_contexts: dict = {}
+
+
+def get_pwd_context(policy: HashPolicy = HashPolicy()):
+    """
+    The CryptContext of a policy is built on its first hash/verify, in the worker, so importing the app doesn't load
+    passlib. The policy is passed along with each call so process pool workers use the calibrated one too.
+    """
+    context = _pwd_contexts.get(policy)
+    if context is None:
+        from passlib.context import CryptContext
+
+        context = _pwd_contexts[policy] = CryptContext(**policy.context_settings())
+    return context
+
+# Latency of the last hash/verify awaited in the current request (seconds).
+last_hash_latency: ContextVar[float | None] = ContextVar("last_hash_latency", default=None)
+
+
+def _verify(plain_password: str, hashed_password: str, policy: HashPolicy) -> bool:
+    # Module level so that it can be pickled for a ProcessPoolExecutor.
+    return _verify_and_update(plain_password, hashed_password, policy)[0]
+
+
+def _hash(password: str, policy: HashPolicy) -> str:
+    return get_pwd_context(policy).hash(password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str, policy: HashPolicy) -> tuple[bool, str | None]:
+    context = get_pwd_context(policy)
+    if hashed_password.startswith(LEGACY_FAKE_PREFIX):
+        valid = hmac.compare_digest((LEGACY_FAKE_PREFIX + plain_password).encode(), hashed_password.encode())
+        return valid, context.hash(plain_password) if valid else None
+    try:
+        return context.verify_and_update(plain_password, hashed_password)
+    except ValueError:
+        # Not a hash passlib knows (passlib.exc.UnknownHashError), same as a wrong password
+        logger.warning("Stored password hash could not be identified")
+        return False, None
+
+
+def _measure_verify(policy: HashPolicy, samples: int = 3) -> float:
+    hashed = _hash("calibration password", policy)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        _verify("calibration password", hashed, policy)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def calibrate_policy(scheme: str, budget: float, min_rounds: int, max_rounds: int,
+                     memory_cost: int = PWD_HASH_ARGON2_MEMORY_COST) -> tuple[HashPolicy, float]:
+    """
+    :param budget: target verify latency in seconds
+    :param min_rounds: never go below this cost, even if a verify is slower than the budget. Also the floor below
+        which stored hashes are rehashed, the same for every worker whatever cost it picks
+    :param max_rounds: never go above this cost
+    :return: the chosen policy and its measured verify latency
+    """
+    base = HashPolicy(scheme, min_rounds, memory_cost, min_rounds=min_rounds)
+    base_seconds = _measure_verify(base)
+    rounds = min_rounds
+    for candidate in range(min_rounds + 1, max_rounds + 1):
+        if scheme == "bcrypt":
+            estimate = base_seconds * 2 ** (candidate - min_rounds)
+        else:
+            estimate = base_seconds * candidate / min_rounds
+        if estimate > budget:
+            break
+        rounds = candidate
+    policy = base._replace(rounds=rounds)
+    return policy, base_seconds if rounds == min_rounds else _measure_verify(policy)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt (or argon2) outside the event loop.
+    bcrypt at cost 12 takes a few hundred ms, so calling it inside an `async def` route stalls every other request on
+    the worker. The work is sent to a bounded pool and once `max_workers + queue_depth` calls are pending, new calls are
+    rejected with 503 and a Retry-After header instead of queueing forever.
+    """
+
+    def __init__(self, max_workers: int = 4, queue_depth: int = 32, kind: str = "thread",
+                 retry_after: int = 1, latency_samples: int = 1024, policy: HashPolicy = HashPolicy()):
+        if kind not in ("thread", "process"):
+            raise ValueError('kind must be "thread" or "process"')
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self.kind = kind
+        self.retry_after = retry_after
+        self.policy = policy
+        self.latencies: deque[float] = deque(maxlen=latency_samples)
+        self._pending = 0
+        self._executor: Executor | None = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so importing this module doesn't spawn threads/processes.
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pwd-hash")
+        return self._executor
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) in the pool.
+        :param fn: picklable callable when kind is "process"
+        :return: result of fn
+        :raises HTTPException: 503 with Retry-After if the queue is full
+        """
+        if self._pending >= self.max_workers + self.queue_depth:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many login attempts in progress, try again later",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._pending -= 1
+            elapsed = time.perf_counter() - start
+            self.latencies.append(elapsed)
+            last_hash_latency.set(elapsed)
+            logger.debug("%s took %.1f ms (pending=%d)", fn.__name__, elapsed * 1000, self._pending)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(_verify, plain_password, hashed_password, self.policy)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(_hash, password, self.policy)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        :return: (valid, new hash to store or None). A new hash is returned when the stored one doesn't follow the
+        policy (other scheme or cost, legacy fake hash)
+        """
+        return await self.run(_verify_and_update, plain_password, hashed_password, self.policy)
+
+    async def calibrate(self, budget: float, min_rounds: int, max_rounds: int) -> HashPolicy:
+        """
+        Pick the cost of self.policy for this machine, see calibrate_policy. Runs in the pool, call it at startup.
+        """
+        loop = asyncio.get_running_loop()
+        self.policy, seconds = await loop.run_in_executor(
+            self._get_executor(), calibrate_policy, self.policy.scheme, budget, min_rounds, max_rounds,
+            self.policy.memory_cost)
+        logger.info("Password hashing: %s cost %d, verify takes %.0f ms (budget %.0f ms)",
+                    self.policy.scheme, self.policy.rounds, seconds * 1000, budget * 1000)
+        return self.policy
+
+    def stats(self) -> dict:
+        """
+        :return: pending count and latency percentiles (ms) over the recent samples
+        """
+        samples = sorted(self.latencies)
+        result = {"pending": self._pending, "samples": len(samples)}
+        if samples:
+            for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+                result[f"{name}_ms"] = samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=PWD_HASH_WORKERS,
+    queue_depth=PWD_HASH_QUEUE_DEPTH,
+    kind=PWD_HASH_EXECUTOR,
+    retry_after=PWD_HASH_RETRY_AFTER,
+    latency_samples=PWD_HASH_LATENCY_SAMPLES,
+    policy=HashPolicy(PWD_HASH_SCHEME, PWD_HASH_ROUNDS, PWD_HASH_ARGON2_MEMORY_COST),
+)
@@ -0,0 +1,251 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import secrets
+import threading
+from typing import Any, NamedTuple
+
+from token_cache import token_cache
+from varaibles import (SECRET_KEY, ALGORITHM, JWT_SIGNING_ALGORITHM, JWT_KEYS_DIR, JWT_ACTIVE_KID,
+                       JWT_ACCEPT_LEGACY_HS256, JWT_EPHEMERAL_KEY)
+
+"""
+Key ring for the access tokens.
+
+With JWT_SIGNING_ALGORITHM = "RS256" or "EdDSA" (needs `pip install "pyjwt[crypto]"`) tokens are signed with a private
+key and carry its `kid` in the header. Other services verify them locally with the public keys published on
+/.well-known/jwks.json, they never need a secret of ours.
+
+Keys are PEM files in JWT_KEYS_DIR:
+    <kid>.pem      private key, can sign and verify
+    <kid>.pub.pem  public key only, a retired key that still verifies the tokens it signed until they expire
+The active (signing) key is JWT_ACTIVE_KID, or the last private kid in sort order, so name them by date. To rotate:
+add the new key with `python -m jwt_keys generate`, restart, and once ACCESS_TOKEN_EXPIRE_MINUTES have passed replace
+the old <kid>.pem by its .pub.pem (or delete it). Nobody is logged out.
+
+Without a private key file the ring signs with SECRET_KEY (HS256) like before, it's shared by every worker and
+survives restarts, and a warning says to generate a key. JWT_EPHEMERAL_KEY = True generates a key at startup
+instead, for development only: each worker has its own and tokens don't survive a restart.
+
+The verifier of each kid (algorithm + parsed key) is built once, verifying a token is a dict lookup on the kid and the
+signature check. Tokens without kid are the HS256 tokens of SECRET_KEY, still accepted while
+JWT_ACCEPT_LEGACY_HS256 is on. With JWT_SIGNING_ALGORITHM = "HS256" the ring only has SECRET_KEY, like before.
+"""
+
+logger = logging.getLogger(__name__)
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "EdDSA")
+LEGACY_KID = "legacy-hs256"
+
+
+class Verifier(NamedTuple):
+    algorithm: str
+    key: Any  # cryptography public key object, or the secret for HS256
+    public_jwk: dict | None  # None for symmetric keys, they're never published
+
+
+class KeyRing:
+    """
+    kid -> Verifier, plus the private key of the active kid. Loaded on first use, or at startup by the signing_keys
+    app_scoped dependency.
+    """
+
+    def __init__(self, algorithm: str = JWT_SIGNING_ALGORITHM, keys_dir: str | None = JWT_KEYS_DIR,
+                 active_kid: str | None = JWT_ACTIVE_KID, accept_legacy_hs256: bool = JWT_ACCEPT_LEGACY_HS256,
+                 ephemeral_key: bool = JWT_EPHEMERAL_KEY):
+        self.algorithm = algorithm
+        self.ephemeral_key = ephemeral_key
+        self.keys_dir = keys_dir
+        self.configured_kid = active_kid
+        self.accept_legacy_hs256 = accept_legacy_hs256
+        self.active_kid: str | None = None
+        self._signing_key: Any = None
+        self._verifiers: dict[str, Verifier] = {}
+        self._private_keys: dict[str, Any] = {}
+        self._jwks: bytes = b'{"keys":[]}'
+        self._jwks_etag = ""
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            if self.algorithm == "HS256":
+                self._add(LEGACY_KID, "HS256", SECRET_KEY, SECRET_KEY)
+                self._activate(LEGACY_KID)
+            elif self.algorithm in ASYMMETRIC_ALGORITHMS:
+                self._load_files()
+                if self.active_kid is None and self.ephemeral_key:
+                    logger.warning("No JWT signing key in %r, using an ephemeral %s key", self.keys_dir, self.algorithm)
+                    self.add_private_key(f"ephemeral-{secrets.token_hex(4)}", generate_private_key(self.algorithm))
+                elif self.active_kid is None:
+                    logger.warning("No JWT signing key in %r, signing with HS256 until one is added with "
+                                   "`python -m jwt_keys generate <kid>`", self.keys_dir)
+                    self._add(LEGACY_KID, "HS256", SECRET_KEY, SECRET_KEY)
+                    self._activate(LEGACY_KID)
+            else:
+                raise ValueError(f"Unsupported JWT_SIGNING_ALGORITHM {self.algorithm!r}")
+            self._render_jwks()
+            self._loaded = True
+
+    def _load_files(self):
+        if not self.keys_dir or not os.path.isdir(self.keys_dir):
+            return
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+
+        private_kids = []
+        for name in sorted(os.listdir(self.keys_dir)):
+            path = os.path.join(self.keys_dir, name)
+            with open(path, "rb") as file:
+                pem = file.read()
+            if name.endswith(".pub.pem"):
+                kid = name.removesuffix(".pub.pem")
+                public_key = load_pem_public_key(pem)
+                self._add(kid, _algorithm_of(public_key), public_key, None)
+            elif name.endswith(".pem"):
+                kid = name.removesuffix(".pem")
+                private_kids.append(kid)
+                self.add_private_key(kid, load_pem_private_key(pem, password=None), activate=False)
+        if private_kids:
+            self._activate(self.configured_kid or private_kids[-1])
+
+    def _add(self, kid: str, algorithm: str, verify_key: Any, signing_key: Any):
+        public_jwk = None
+        if algorithm in ASYMMETRIC_ALGORITHMS:
+            from jwt.algorithms import get_default_algorithms
+
+            public_jwk = {**get_default_algorithms()[algorithm].to_jwk(verify_key, as_dict=True),
+                          "kid": kid, "alg": algorithm, "use": "sig"}
+        self._verifiers[kid] = Verifier(algorithm, verify_key, public_jwk)
+        if signing_key is not None:
+            self._private_keys[kid] = signing_key
+
+    def _activate(self, kid: str):
+        if kid not in self._private_keys:
+            raise ValueError(f"No private key for JWT kid {kid!r}")
+        self.active_kid = kid
+        self._signing_key = self._private_keys[kid]
+
+    def add_private_key(self, kid: str, private_key: Any, activate: bool = True):
+        """
+        Add a key that signs and verifies. With activate, new tokens are signed with it.
+        """
+        self._add(kid, _algorithm_of(private_key), private_key.public_key(), private_key)
+        if activate:
+            self._activate(kid)
+        if self._loaded:
+            self._render_jwks()
+
+    def remove(self, kid: str):
+        """
+        Stop accepting the tokens of kid, e.g. a leaked key. The token cache is cleared too, it would keep serving
+        the tokens of kid it already verified.
+        """
+        if kid == self.active_kid:
+            raise ValueError("Can't remove the active key, activate another one first")
+        self._verifiers.pop(kid, None)
+        self._private_keys.pop(kid, None)
+        self._render_jwks()
+        token_cache.clear()
+
+    def _render_jwks(self):
+        keys = [verifier.public_jwk for verifier in self._verifiers.values() if verifier.public_jwk is not None]
+        self._jwks = json.dumps({"keys": keys}, separators=(",", ":")).encode()
+        self._jwks_etag = '"' + hashlib.blake2b(self._jwks, digest_size=16).hexdigest() + '"'
+
+    @property
+    def jwks(self) -> tuple[bytes, str]:
+        """
+        :return: the encoded JWKS document and its ETag
+        """
+        self.load()
+        return self._jwks, self._jwks_etag
+
+    def encode(self, claims: dict) -> str:
+        import jwt
+
+        self.load()
+        headers = None if self.active_kid == LEGACY_KID else {"kid": self.active_kid}
+        return jwt.encode(claims, self._signing_key, algorithm=self._verifiers[self.active_kid].algorithm,
+                          headers=headers)
+
+    def decode(self, token: str) -> dict:
+        """
+        :raises jwt.InvalidTokenError: bad signature, expired, unknown kid...
+        """
+        import jwt
+
+        self.load()
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            if not (self.accept_legacy_hs256 or self.active_kid == LEGACY_KID):
+                raise jwt.InvalidTokenError("Token without kid")
+            return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        verifier = self._verifiers.get(kid)
+        if verifier is None:
+            raise jwt.InvalidTokenError(f"Unknown kid {kid!r}")
+        # The algorithm comes from our key, never from the token header
+        return jwt.decode(token, verifier.key, algorithms=[verifier.algorithm])
+
+
+def _algorithm_of(key) -> str:
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return "RS256"
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return "EdDSA"
+    raise ValueError(f"Unsupported JWT key type {type(key).__name__}")
+
+
+def generate_private_key(algorithm: str):
+    if algorithm == "RS256":
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if algorithm == "EdDSA":
+        from cryptography.hazmat.primitives.asymmetric import ed25519
+
+        return ed25519.Ed25519PrivateKey.generate()
+    raise ValueError(f"Can't generate a key for {algorithm!r}")
+
+
+key_ring = KeyRing()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the JWT signing keys of JWT_KEYS_DIR")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate = commands.add_parser("generate", help="write a new private key <kid>.pem")
+    generate.add_argument("kid", help="key id, e.g. the date: 2026-10-17")
+    generate.add_argument("--algorithm", choices=ASYMMETRIC_ALGORITHMS, default=JWT_SIGNING_ALGORITHM)
+    retire = commands.add_parser("retire", help="replace <kid>.pem by <kid>.pub.pem, it only verifies from now on")
+    retire.add_argument("kid")
+    args = parser.parse_args()
+
+    from cryptography.hazmat.primitives import serialization
+
+    os.makedirs(JWT_KEYS_DIR, exist_ok=True)
+    private_path = os.path.join(JWT_KEYS_DIR, f"{args.kid}.pem")
+    if args.command == "generate":
+        pem = generate_private_key(args.algorithm).private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+        with open(os.open(private_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as file:
+            file.write(pem)
+        print(f"Wrote {private_path}")
+    else:
+        with open(private_path, "rb") as file:
+            private_key = serialization.load_pem_private_key(file.read(), password=None)
+        pem = private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                    serialization.PublicFormat.SubjectPublicKeyInfo)
+        with open(os.path.join(JWT_KEYS_DIR, f"{args.kid}.pub.pem"), "wb") as file:
+            file.write(pem)
+        os.remove(private_path)
+        print(f"{args.kid} only verifies now")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import time
+from bisect import bisect_left
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+"""
+Request metrics in the Prometheus text format.
+
+TimingMiddleware is a plain ASGI middleware: it only looks at the messages going to the server, it doesn't wrap the
+response body like the @app.middleware("http") / BaseHTTPMiddleware call_next does. It records
+    http_request_duration_seconds     whole request, as seen by the outermost middleware
+    http_handler_duration_seconds     FastAPI route handler (validation + endpoint + serialization), set by TimedRoute
+    http_middleware_duration_seconds  the difference, time spent in the middleware stack and routing
+labelled with the route template (/items/{item_id}) and not the raw path, so the number of series stays bounded.
+"""
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HANDLER_SECONDS_KEY = "metrics.handler_seconds"
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...],
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            prefix = label_text + "," if label_text else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return lines
+
+    def clear(self):
+        self._series.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "Time to serve a request",
+                             ("method", "route", "status"))
+HANDLER_DURATION = Histogram("http_handler_duration_seconds", "Time spent in the route handler",
+                             ("method", "route"))
+MIDDLEWARE_DURATION = Histogram("http_middleware_duration_seconds",
+                                "Time spent in the middleware stack and routing", ("method", "route"))
+
+# Extra "name value" gauges added to /metrics, e.g. cache counters. name -> callable returning a number
+gauges: dict[str, Callable[[], float]] = {}
+# Other modules rendering their own lines, e.g. dependency_timing
+collectors: list[Callable[[], list[str]]] = []
+
+
+def render_metrics() -> str:
+    lines = []
+    for histogram in (REQUEST_DURATION, HANDLER_DURATION, MIDDLEWARE_DURATION):
+        lines.extend(histogram.render())
+    for collector in collectors:
+        lines.extend(collector())
+    for name, value in sorted(gauges.items()):
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value()}")
+    return "\n".join(lines) + "\n"
+
+
+def route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class TimingMiddleware:
+    """
+    Pure ASGI replacement of the add_process_time_header middleware.
+    Still sets X-Process-Time (time until the response headers are sent).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-process-time", str(time.perf_counter() - start).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            total = time.perf_counter() - start
+            method = scope["method"]
+            route = route_template(scope)
+            REQUEST_DURATION.observe(total, method, route, str(status_code))
+            handler_seconds = scope.get(HANDLER_SECONDS_KEY)
+            if handler_seconds is not None:
+                HANDLER_DURATION.observe(handler_seconds, method, route)
+                MIDDLEWARE_DURATION.observe(max(total - handler_seconds, 0.0), method, route)
+
+
+class TimedRoute(APIRoute):
+    """
+    Measures the route handler and leaves the result in the scope for TimingMiddleware.
+    """
+
+    def get_route_handler(self) -> Callable:
+        route_handler = super().get_route_handler()
+
+        async def timed_route_handler(request: Request) -> Response:
+            start = time.perf_counter()
+            try:
+                return await route_handler(request)
+            finally:
+                request.scope[HANDLER_SECONDS_KEY] = time.perf_counter() - start
+
+        return timed_route_handler
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Boolean, Column, Float, Integer, JSON, String, ForeignKey
 from sqlalchemy.orm import relationship
-from .database import Base
+from database import Base
 
 class User(Base):
     __tablename__ = "users"
@@ -20,4 +20,31 @@ class Item(Base):
     description = Column(String, index=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
 
-    owner = relationship("User", back_populates="items")
\ No newline at end of file
+    owner = relationship("User", back_populates="items")
+
+
+# Tables of the repositories with REPOSITORY_BACKEND = "sql" (repositories.py). Same keys and fields as the in-memory
+# demo data: items by their string id with the fields of schemas.Item, users by username like fake_users_db.
+class StoredItem(Base):
+    __tablename__ = "stored_items"
+
+    id = Column(String, primary_key=True, index=True)
+    name = Column(String, index=True)
+    description = Column(String)
+    price = Column(Float)
+    tax = Column(Float)
+    # Lists like the defaults of schemas.Item, a record without them would read back None
+    tags = Column(JSON, default=list)
+    tags_set = Column(JSON, default=list)
+    image = Column(JSON)
+    images = Column(JSON)
+
+
+class StoredUser(Base):
+    __tablename__ = "stored_users"
+
+    username = Column(String, primary_key=True, index=True)
+    email = Column(String, unique=True, index=True)
+    full_name = Column(String)
+    hashed_password = Column(String)
+    disabled = Column(Boolean)
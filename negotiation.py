@@ -0,0 +1,234 @@
+import functools
+import inspect
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, NamedTuple
+
+from fastapi import Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from pydantic_core import to_jsonable_python
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from fast_body import paused_gc
+from serializers import ResponseSerializer
+from varaibles import BINARY_FORMATS
+
+"""
+MessagePack (and CBOR) request and response bodies, negotiated with Content-Type and Accept.
+
+Internal services exchanging bulk Item/Offer payloads spend most of the request in JSON parsing and encoding. For
+endpoints marked with @content_negotiation, NegotiatedRoute:
+    - decodes an application/msgpack (application/x-msgpack, application/vnd.msgpack) or application/cbor body to
+      Python objects and hands them to FastAPI as the parsed JSON of the request, the pydantic validation (and the
+      errors) are the same as for a JSON body. @json_body routes validate them with their TypeAdapter.
+    - encodes the response in the format preferred by Accept. With a response_model the value is validated and dumped
+      by a ResponseSerializer (same include/exclude options as the JSON response), without one it is converted like
+      jsonable_encoder would. JSON stays the default: a binary format is used when the client asks for it with a
+      higher quality than application/json, or names it when JSON only matches a wildcard.
+    - adds Vary: Accept. @cache_response keeps one entry per negotiated format.
+
+    @router.post("/offers/")
+    @content_negotiation
+    @json_body
+    async def create_offer(offer: Offer):
+
+msgpack (`pip install msgpack`) and cbor2 (`pip install cbor2`) are optional, BINARY_FORMATS lists the ones the server
+offers, in order of preference, the missing ones are left out. Dict keys may be ints in MessagePack, e.g. the
+dict[int, float] of /index-weights/. See benchmarks/negotiation.py for the numbers against the JSON path.
+"""
+
+
+class BinaryFormat(NamedTuple):
+    name: str
+    loads: Callable[[bytes], Any]
+    dumps: Callable[[Any], bytes]
+    # Raised by loads for a malformed body. TypeError: e.g. a MessagePack map with an array key (unhashable)
+    decode_errors: tuple[type[Exception], ...] = (ValueError, TypeError)
+
+
+# media type -> format, only the installed ones, in order of preference
+FORMATS: dict[str, BinaryFormat] = {}
+
+for _name in BINARY_FORMATS:
+    if _name == "msgpack":
+        try:
+            import msgpack
+        except ImportError:
+            continue
+        _format = BinaryFormat("MessagePack", functools.partial(msgpack.unpackb, strict_map_key=False), msgpack.packb)
+        for _media_type in ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack"):
+            FORMATS[_media_type] = _format
+    elif _name == "cbor":
+        try:
+            import cbor2
+        except ImportError:
+            continue
+        FORMATS["application/cbor"] = BinaryFormat("CBOR", cbor2.loads, cbor2.dumps,
+                                                   (ValueError, TypeError, cbor2.CBORDecodeError))
+
+# Set by NegotiatedRoute for the endpoint: (format, media type) of the response, None for JSON
+response_format: ContextVar[tuple[BinaryFormat, str] | None] = ContextVar("response_format", default=None)
+
+
+def request_format(content_type: str | None) -> BinaryFormat | None:
+    """
+    :return: the binary format of a request body, None for JSON and everything else
+    """
+    if not content_type:
+        return None
+    return FORMATS.get(content_type.split(";", 1)[0].strip().lower())
+
+
+@lru_cache(maxsize=512)
+def negotiate(accept: str | None) -> tuple[BinaryFormat, str] | None:
+    """
+    Clients send a handful of different Accept values, the result is cached per value.
+    :param accept: the Accept header
+    :return: the binary format and media type of the response, None for JSON
+    """
+    if not accept or not FORMATS:
+        return None
+    ranges = []
+    for item in accept.split(","):
+        media_range, _, params = item.partition(";")
+        main_type, _, sub_type = media_range.strip().lower().partition("/")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((main_type, sub_type, quality))
+
+    def preference(media_type: str) -> tuple[float, int]:
+        # Quality of the most specific range matching the media type, and how specific it is
+        main_type, _, sub_type = media_type.partition("/")
+        best = (0.0, -1)
+        for range_main, range_sub, quality in ranges:
+            if range_main == main_type and range_sub == sub_type:
+                specificity = 2
+            elif range_main == main_type and range_sub == "*":
+                specificity = 1
+            elif range_main == "*":
+                specificity = 0
+            else:
+                continue
+            if specificity > best[1]:
+                best = (quality, specificity)
+        return best
+
+    best, best_preference = None, preference("application/json")
+    for media_type, binary in FORMATS.items():
+        quality, specificity = preference(media_type)
+        if quality > 0 and (quality, specificity) > best_preference:
+            best, best_preference = (binary, media_type), (quality, specificity)
+    return best
+
+
+def decode_body(binary: BinaryFormat, body: bytes) -> Any:
+    """
+    :raises RequestValidationError: like FastAPI does for invalid JSON
+    """
+    try:
+        return binary.loads(body)
+    except binary.decode_errors as exc:
+        raise RequestValidationError(
+            [{"type": f"{binary.name.lower()}_invalid", "loc": ("body",), "msg": f"{binary.name} decode error",
+              "input": {}, "ctx": {"error": str(exc) or type(exc).__name__}}], body=None)
+
+
+def _vary_on_accept(response: Response):
+    vary = response.headers.get("vary")
+    if vary is None:
+        response.headers["vary"] = "Accept"
+    elif "accept" not in (value.strip().lower() for value in vary.split(",")):
+        response.headers["vary"] = f"{vary}, Accept"
+
+
+def content_negotiation(func: Callable) -> Callable:
+    """
+    Opt-in marker for NegotiatedRoute, put it under the @router decorator (above @json_body and
+    @precompiled_response).
+    """
+    func.__content_negotiation__ = True
+    return func
+
+
+class NegotiatedRoute(APIRoute):
+    """
+    APIRoute reading and writing MessagePack/CBOR bodies for endpoints marked with @content_negotiation.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        negotiated = getattr(endpoint, "__content_negotiation__", False)
+        if negotiated:
+            endpoint = self._negotiated_endpoint(endpoint)
+        self.response_serializer: ResponseSerializer | None = None
+        super().__init__(path, endpoint, **kwargs)
+        if negotiated and self.response_model is not None:
+            self.response_serializer = ResponseSerializer(
+                self.response_model,
+                include=self.response_model_include,
+                exclude=self.response_model_exclude,
+                by_alias=self.response_model_by_alias,
+                exclude_unset=self.response_model_exclude_unset,
+                exclude_defaults=self.response_model_exclude_defaults,
+                exclude_none=self.response_model_exclude_none,
+            )
+
+    def _negotiated_endpoint(self, endpoint: Callable) -> Callable:
+        is_coroutine = inspect.iscoroutinefunction(endpoint)
+
+        # functools.wraps keeps the signature, FastAPI still sees the original parameters
+        @functools.wraps(endpoint)
+        async def negotiated_endpoint(*args, **kwargs):
+            if is_coroutine:
+                content = await endpoint(*args, **kwargs)
+            else:
+                content = await run_in_threadpool(endpoint, *args, **kwargs)
+            negotiated = response_format.get()
+            if negotiated is None or isinstance(content, Response):
+                return content
+            binary, media_type = negotiated
+            # The intermediate Python data is the size of the response, unlike dump_json
+            with paused_gc():
+                if self.response_serializer is not None:
+                    data = self.response_serializer.to_python(content)
+                else:
+                    data = to_jsonable_python(content)
+                body = binary.dumps(data)
+            return Response(body, status_code=self.status_code or 200, media_type=media_type)
+
+        return negotiated_endpoint
+
+    def get_route_handler(self) -> Callable:
+        route_handler = super().get_route_handler()
+        if not getattr(self.endpoint, "__content_negotiation__", False):
+            return route_handler
+        has_body = self.body_field is not None
+
+        async def negotiated_route_handler(request: Request) -> Response:
+            binary = request_format(request.headers.get("content-type")) if has_body else None
+            if binary is not None:
+                body = await request.body()
+                if body:
+                    # Starlette caches the parsed body in _json, FastAPI only takes it from there for JSON requests
+                    with paused_gc(len(body)):
+                        request._json = decode_body(binary, body)
+                    request._headers = Headers(raw=[
+                        *((name, value) for name, value in request.headers.raw if name != b"content-type"),
+                        (b"content-type", b"application/json"),
+                    ])
+            token = response_format.set(negotiate(request.headers.get("accept")))
+            try:
+                response = await route_handler(request)
+            finally:
+                response_format.reset(token)
+            _vary_on_accept(response)
+            return response
+
+        return negotiated_route_handler
@@ -0,0 +1,178 @@
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+from typing import NamedTuple
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from starlette.routing import Route
+
+from response_cache import etag_matches
+from varaibles import OPENAPI_CACHE_FILE
+
+"""
+Pre-rendered /openapi.json.
+
+FastAPI keeps the generated schema in app.openapi_schema, but the first /openapi.json (or /docs) request on every worker
+still walks all the routes and models to build it, and every request json encodes the whole document again.
+PrerenderedOpenAPI builds the document once, in the lifespan, and keeps it as bytes, gzip compressed bytes and an
+ETag. /openapi.json sends them as they are and answers a matching If-None-Match with a 304.
+
+With OPENAPI_CACHE_FILE set, the document is loaded from that file instead of being generated. Write it at build time:
+
+    python -m openapi_cache openapi.json
+
+The file stores a fingerprint of the route table and the app version, a file that doesn't match the app (a route was
+added, the version was bumped) is ignored and the schema is generated as usual. Changing a schema field doesn't change
+the fingerprint, rebuild the file in the same step as the image.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class OpenAPIDocument(NamedTuple):
+    body: bytes
+    gzip_body: bytes
+    etag: str
+
+
+def encode_document(schema: dict) -> OpenAPIDocument:
+    # Same encoding as FastAPI's JSONResponse, so the bytes don't change when the cache is turned on
+    body = json.dumps(schema, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    return OpenAPIDocument(body, gzip.compress(body, compresslevel=9, mtime=0), etag)
+
+
+def _iter_routes(routes):
+    for route in routes:
+        # Newer FastAPI versions keep included routers as one entry instead of copying their routes
+        original_router = getattr(route, "original_router", None)
+        if original_router is not None:
+            yield from _iter_routes(original_router.routes)
+        else:
+            yield route
+
+
+def routes_fingerprint(app: FastAPI) -> str:
+    """
+    :return: digest of the app version and of the (path, methods, endpoint) of every route in the schema
+    """
+    routes = sorted(
+        (route.path, sorted(getattr(route, "methods", None) or ()),
+         f"{route.endpoint.__module__}.{route.endpoint.__qualname__}")
+        for route in _iter_routes(app.routes)
+        if getattr(route, "include_in_schema", False) and hasattr(route, "endpoint")
+    )
+    payload = json.dumps([app.title, app.version, app.openapi_version, routes])
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _accepts_gzip(request: Request) -> bool:
+    accept_encoding = request.headers.get("accept-encoding", "")
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class PrerenderedOpenAPI:
+    """
+    Builds the OpenAPI document of the app once and serves it as pre-encoded bytes.
+    :param app: application whose /openapi.json is served
+    :param path: file the document is loaded from / saved to, None to keep it in memory only
+    """
+
+    def __init__(self, app: FastAPI, path: str | None = None):
+        self.app = app
+        self.path = path
+        self.document: OpenAPIDocument | None = None
+
+    def build(self) -> OpenAPIDocument:
+        self.document = encode_document(self.app.openapi())
+        return self.document
+
+    def load(self) -> OpenAPIDocument | None:
+        """
+        :return: the document of self.path, None if there is no file or it doesn't match the routes of the app
+        """
+        if not self.path or not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as file:
+            stored = json.load(file)
+        if stored.get("fingerprint") != routes_fingerprint(self.app):
+            logger.warning("%s doesn't match the routes of the app, generating the OpenAPI schema", self.path)
+            return None
+        self.app.openapi_schema = stored["openapi"]
+        self.document = encode_document(stored["openapi"])
+        return self.document
+
+    def save(self, path: str | None = None):
+        path = path or self.path
+        document = self.document or self.build()
+        content = b'{"fingerprint":"' + routes_fingerprint(self.app).encode() + b'","openapi":' + document.body + b"}"
+        with open(path, "wb") as file:
+            file.write(content)
+
+    def prepare(self) -> OpenAPIDocument:
+        """
+        Load the document from the file, or generate it. Called in the lifespan so the first request doesn't pay.
+        """
+        return self.load() or self.build()
+
+    def invalidate(self):
+        """
+        Forget the document, e.g. after adding routes at runtime. The next request generates it again.
+        """
+        self.document = None
+        self.app.openapi_schema = None
+
+    async def endpoint(self, request: Request) -> Response:
+        root_path = request.scope.get("root_path", "").rstrip("/")
+        if root_path and self.app.root_path_in_servers:
+            # Behind a proxy with a prefix the servers entry depends on the request, let FastAPI build it
+            schema = dict(self.app.openapi())
+            server_urls = {server.get("url") for server in schema.get("servers", [])}
+            if root_path not in server_urls:
+                schema["servers"] = [{"url": root_path}] + schema.get("servers", [])
+            return JSONResponse(schema)
+
+        document = self.document or self.prepare()
+        headers = {"etag": document.etag, "vary": "Accept-Encoding", "cache-control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), document.etag):
+            return Response(status_code=304, headers=headers)
+        if _accepts_gzip(request):
+            headers["content-encoding"] = "gzip"
+            return Response(document.gzip_body, media_type="application/json", headers=headers)
+        return Response(document.body, media_type="application/json", headers=headers)
+
+
+def install_openapi_cache(app: FastAPI, path: str | None = OPENAPI_CACHE_FILE) -> PrerenderedOpenAPI:
+    """
+    Replace the /openapi.json route FastAPI adds in its constructor by PrerenderedOpenAPI.endpoint.
+    /docs and /redoc keep working, they only load /openapi.json from the browser.
+    """
+    cache = PrerenderedOpenAPI(app, path)
+    if app.openapi_url:
+        for index, route in enumerate(app.router.routes):
+            if isinstance(route, Route) and route.path == app.openapi_url:
+                app.router.routes[index] = Route(app.openapi_url, cache.endpoint, include_in_schema=False)
+                break
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the OpenAPI document of the app to a file for OPENAPI_CACHE_FILE")
+    parser.add_argument("output", help="file to write, e.g. openapi.json")
+    args = parser.parse_args()
+
+    from main import app
+    PrerenderedOpenAPI(app).save(args.output)
+    print(f"OpenAPI schema written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
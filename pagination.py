@@ -0,0 +1,62 @@
+import base64
+import json
+
+"""
+Opaque cursors for keyset pagination.
+A cursor is the urlsafe base64 of the JSON encoded sort key of the last record on the page. The client sends it back
+as `cursor` and the repository seeks straight to it (see repositories.Repository.page), so deep pages cost the same
+as the first one. Clients must not build or parse cursors themselves.
+"""
+
+
+def encode_cursor(*sort_key) -> str:
+    """
+    :param sort_key: values of the last record, e.g. its key or (created_at, key)
+    :return: cursor string
+    """
+    raw = json.dumps(list(sort_key), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    """
+    :param cursor: value produced by encode_cursor
+    :return: the sort key as a list
+    :raises ValueError: if the cursor is not one of ours
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_key = json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(sort_key, list) or not sort_key:
+        raise ValueError("Invalid cursor")
+    return sort_key
+
+
+def next_cursor(page: list[tuple], limit: int) -> str | None:
+    """
+    :param page: (key, record) pairs returned by Repository.page/find_by
+    :param limit: the limit used for the page
+    :return: cursor of the next page, None when this was the last one
+    """
+    if len(page) < limit or not page:
+        return None
+    return encode_cursor(page[-1][0])
+
+
+def after_key(cursor: str | None, key_type: type = int):
+    """
+    Key to pass as `after` to Repository.page for a single-key cursor.
+    :param key_type: type of the keys of the paged repository, int for the from_list ones. A key of another type
+        can't be compared with them (bisect raises TypeError) so the cursor is refused
+    :return: None when there is no cursor (first page)
+    :raises ValueError: if the cursor is invalid
+    """
+    if cursor is None:
+        return None
+    key = decode_cursor(cursor)[0]
+    # bool is an int for isinstance, but never a key
+    if not isinstance(key, key_type) or isinstance(key, bool):
+        raise ValueError("Invalid cursor")
+    return key
@@ -0,0 +1,165 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Annotated, NamedTuple
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi.security import OAuth2PasswordRequestForm
+
+from varaibles import (LOGIN_RATE_LIMIT_PER_IP, LOGIN_RATE_LIMIT_PER_USER, RATE_LIMIT_STORE_SIZE,
+                       RATE_LIMIT_TRUST_FORWARDED)
+
+"""
+Token bucket rate limiting for the login routes.
+
+Every (policy, key) has a bucket of `capacity` tokens refilled at capacity / window tokens per second, a request takes
+one token and is refused with 429 when the bucket is empty. /token and /jwt/token check two buckets before looking at
+the password: one per client IP, one per username (so a password guessed from many IPs is throttled too). The check
+is a dependency of the route, it runs before the user lookup and bcrypt.
+
+The buckets live in a BucketStore. MemoryBucketStore keeps them in the worker, which is enough for one process and is
+the stand-in for tests. With several workers/hosts use a shared store (e.g. Redis with the refill + take done in one
+Lua script) implementing BucketStore.take and set it with `login_limiter.store = ...`.
+
+Responses carry the RateLimit headers of the IETF draft (RateLimit-Limit / -Remaining / -Reset / RateLimit-Policy)
+of the most restrictive bucket, and Retry-After on 429.
+"""
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float  # Seconds until the bucket is full again
+    retry_after: float  # Seconds until a token is available, 0 if allowed
+
+
+class RateLimitPolicy(NamedTuple):
+    name: str
+    capacity: int
+    window: float  # Seconds to refill an empty bucket
+
+    @property
+    def refill_rate(self) -> float:
+        return self.capacity / self.window
+
+
+class BucketStore(ABC):
+    @abstractmethod
+    async def take(self, key: str, capacity: int, refill_rate: float, cost: float = 1.0) -> Decision:
+        """
+        Refill the bucket of key for the time elapsed since the last call and take `cost` tokens if there are enough.
+        Must be atomic for a given key.
+        """
+
+
+class MemoryBucketStore(BucketStore):
+    """
+    Buckets of this process, key -> (tokens, updated_at) in an LRU.
+    A bucket idle long enough to be full again is the same as no bucket, so those are dropped as the LRU is walked,
+    and the size never goes above maxsize (the least recently used buckets go first).
+    """
+
+    def __init__(self, maxsize: int = 100_000, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        # key -> (tokens, updated_at, full_at)
+        self._buckets: OrderedDict[str, tuple[float, float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _evict(self, now: float):
+        while self._buckets:
+            key, (_, _, full_at) = next(iter(self._buckets.items()))
+            if full_at > now and len(self._buckets) <= self.maxsize:
+                return
+            del self._buckets[key]
+
+    async def take(self, key: str, capacity: int, refill_rate: float, cost: float = 1.0) -> Decision:
+        now = self.clock()
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            tokens = float(capacity)
+        else:
+            tokens = min(float(capacity), bucket[0] + (now - bucket[1]) * refill_rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        reset_after = (capacity - tokens) / refill_rate
+        self._buckets[key] = (tokens, now, now + reset_after)
+        self._evict(now)
+        retry_after = 0.0 if allowed else (cost - tokens) / refill_rate
+        return Decision(allowed, capacity, int(tokens), reset_after, retry_after)
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class RateLimiter:
+    """
+    Checks several (policy, key) buckets in order and stops at the first one that refuses, so a request refused
+    for its IP doesn't also use a token of the username.
+    """
+
+    def __init__(self, store: BucketStore):
+        self.store = store
+        self.rejected = 0
+
+    async def check(self, *checks: tuple[RateLimitPolicy, str]) -> tuple[Decision, RateLimitPolicy]:
+        """
+        :param checks: (policy, key) pairs, e.g. (per_ip, "203.0.113.7")
+        :return: the refusing decision, or the one with the fewest remaining tokens, and its policy
+        """
+        result = None
+        for policy, key in checks:
+            decision = await self.store.take(f"{policy.name}:{key}", policy.capacity, policy.refill_rate)
+            if not decision.allowed:
+                self.rejected += 1
+                return decision, policy
+            if result is None or decision.remaining < result[0].remaining:
+                result = decision, policy
+        return result
+
+
+def rate_limit_headers(decision: Decision, policy: RateLimitPolicy) -> dict[str, str]:
+    headers = {
+        "RateLimit-Limit": str(decision.limit),
+        "RateLimit-Remaining": str(decision.remaining),
+        "RateLimit-Reset": str(math.ceil(decision.reset_after)),
+        "RateLimit-Policy": f"{policy.capacity};w={math.ceil(policy.window)}",
+    }
+    if not decision.allowed:
+        headers["Retry-After"] = str(math.ceil(decision.retry_after))
+    return headers
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            return forwarded_for.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+login_per_ip = RateLimitPolicy("login-ip", *LOGIN_RATE_LIMIT_PER_IP)
+login_per_user = RateLimitPolicy("login-user", *LOGIN_RATE_LIMIT_PER_USER)
+login_limiter = RateLimiter(MemoryBucketStore(maxsize=RATE_LIMIT_STORE_SIZE))
+
+
+async def login_rate_limit(request: Request, response: Response,
+                           form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
+    """
+    Dependency of the login routes. Shares the parsed form with the route (same Depends, cached per request).
+    :raises HTTPException: 429 with Retry-After and the RateLimit headers
+    """
+    decision, policy = await login_limiter.check(
+        (login_per_ip, client_ip(request)),
+        (login_per_user, form_data.username.lower()),
+    )
+    headers = rate_limit_headers(decision, policy)
+    if not decision.allowed:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many login attempts",
+                            headers=headers)
+    response.headers.update(headers)
@@ -0,0 +1,208 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_right, insort
+from typing import Any, AsyncIterator, Iterable
+
+from varaibles import REPOSITORY_BACKEND, items, yield_items, fake_items_db, fake_users_db
+
+"""
+Repositories sit in front of the stores used by the routes so the routes don't care if the data lives in a dict or in
+a table.
+Every method is async because the SQL backend has to await the database, the in-memory one just returns.
+
+page() and find_by() use keyset pagination: pass the key of the last record you got as `after` and you get the next
+records in key order. Seeking to `after` is a binary search (in memory) or an index range scan (SQL), so page 10_000
+costs the same as page 1.
+"""
+
+
+class Repository(ABC):
+    indexes: tuple[str, ...] = ()
+
+    @abstractmethod
+    async def get(self, key) -> dict | None:
+        """
+        :param key: primary key
+        :return: the record or None if it doesn't exist
+        """
+
+    @abstractmethod
+    async def put(self, key, record: dict) -> dict:
+        """
+        Insert or replace the record stored under key.
+        """
+
+    @abstractmethod
+    async def update(self, key, changes: dict) -> dict | None:
+        """
+        Merge changes into the stored record.
+        :return: the updated record or None if key doesn't exist
+        """
+
+    @abstractmethod
+    async def delete(self, key) -> bool:
+        """
+        :return: True if something got deleted
+        """
+
+    @abstractmethod
+    async def page(self, after=None, limit: int = 100, offset: int = 0) -> list[tuple[Any, dict]]:
+        """
+        Records in key order.
+        :param after: key of the last record of the previous page, None to start from the beginning
+        :param limit: max number of records
+        :param offset: records to skip after `after`. Only for the old skip/limit routes, prefer `after`
+        :return: list of (key, record)
+        """
+
+    @abstractmethod
+    async def find_by(self, index: str, value, after=None, limit: int = 100) -> list[tuple[Any, dict]]:
+        """
+        Records whose secondary index `index` equals value, in key order.
+        :return: list of (key, record)
+        """
+
+    @abstractmethod
+    async def count(self) -> int:
+        pass
+
+    async def scan(self, after=None, batch_size: int = 1000) -> AsyncIterator[tuple[Any, dict]]:
+        """
+        Every record after `after` in key order, read with page() batch_size records at a time. Used to stream big
+        collections: the memory used is one batch whatever the size of the store.
+        :return: async iterator of (key, record)
+        """
+        while True:
+            page = await self.page(after=after, limit=batch_size)
+            for row in page:
+                yield row
+            if len(page) < batch_size:
+                return
+            after = page[-1][0]
+
+    async def get_many(self, keys: Iterable) -> dict:
+        """
+        :return: key -> record for the keys that exist
+        """
+        records = {}
+        for key in keys:
+            record = await self.get(key)
+            if record is not None:
+                records[key] = record
+        return records
+
+    async def put_many(self, records: dict) -> list[dict]:
+        """
+        Insert or replace every record of key -> record in one go, all or nothing.
+        """
+        return [await self.put(key, record) for key, record in records.items()]
+
+    def _check_index(self, index: str):
+        if index not in self.indexes:
+            raise ValueError(f"{type(self).__name__} has no index {index!r}, available: {self.indexes}")
+
+
+class InMemoryRepository(Repository):
+    """
+    Dict backed repository.
+    Records are kept in a dict for O(1) get, and the keys are also kept in a sorted list so page() can bisect to
+    `after` instead of scanning. Each secondary index maps a value to a sorted list of keys.
+    Keys of one repository must be comparable with each other (all str or all int).
+    """
+
+    def __init__(self, records: dict | None = None, indexes: Iterable[str] = ()):
+        self.indexes = tuple(indexes)
+        self._records: dict = {}
+        self._keys: list = []
+        self._index: dict[str, dict[Any, list]] = {name: {} for name in self.indexes}
+        for key, record in (records or {}).items():
+            self._insert(key, dict(record))
+
+    @classmethod
+    def from_list(cls, records: list[dict], indexes: Iterable[str] = ()):
+        """
+        Use the position in the list as key so page() keeps the list order.
+        """
+        return cls(dict(enumerate(records)), indexes=indexes)
+
+    def _insert(self, key, record: dict):
+        self._records[key] = record
+        insort(self._keys, key)
+        for name in self.indexes:
+            if name in record:
+                insort(self._index[name].setdefault(record[name], []), key)
+
+    def _remove(self, key) -> dict | None:
+        record = self._records.pop(key, None)
+        if record is None:
+            return None
+        self._keys.pop(bisect_right(self._keys, key) - 1)
+        for name in self.indexes:
+            if name in record:
+                keys = self._index[name][record[name]]
+                keys.pop(bisect_right(keys, key) - 1)
+                if not keys:
+                    del self._index[name][record[name]]
+        return record
+
+    @staticmethod
+    def _seek(keys: list, records: dict, after, limit: int, offset: int = 0) -> list[tuple[Any, dict]]:
+        start = 0 if after is None else bisect_right(keys, after)
+        start += offset
+        return [(key, records[key]) for key in keys[start:start + limit]]
+
+    async def get(self, key) -> dict | None:
+        return self._records.get(key)
+
+    async def put(self, key, record: dict) -> dict:
+        self._remove(key)
+        self._insert(key, dict(record))
+        return self._records[key]
+
+    async def update(self, key, changes: dict) -> dict | None:
+        record = self._remove(key)
+        if record is None:
+            return None
+        self._insert(key, {**record, **changes})
+        return self._records[key]
+
+    async def delete(self, key) -> bool:
+        return self._remove(key) is not None
+
+    async def get_many(self, keys: Iterable) -> dict:
+        return {key: self._records[key] for key in keys if key in self._records}
+
+    async def put_many(self, records: dict) -> list[dict]:
+        # Nothing is awaited in between, no other request sees half of the batch
+        for key, record in records.items():
+            self._remove(key)
+            self._insert(key, dict(record))
+        return [self._records[key] for key in records]
+
+    async def page(self, after=None, limit: int = 100, offset: int = 0) -> list[tuple[Any, dict]]:
+        return self._seek(self._keys, self._records, after, limit, offset)
+
+    async def find_by(self, index: str, value, after=None, limit: int = 100) -> list[tuple[Any, dict]]:
+        self._check_index(index)
+        return self._seek(self._index[index].get(value, []), self._records, after, limit)
+
+    async def count(self) -> int:
+        return len(self._records)
+
+
+if REPOSITORY_BACKEND == "sql":
+    # Only items and users move to SQL, in the stored_items/stored_users tables keyed like the demo data (the int
+    # ids of models.Item/models.User don't fit the routes). The tables start empty.
+    # Imported here so the in-memory backend doesn't load sqlalchemy
+    import models
+    from database import AsyncSessionLocal
+    from sql_repository import SqlRepository
+
+    item_repository = SqlRepository(models.StoredItem, AsyncSessionLocal, indexes={"name": models.StoredItem.name},
+                                    key_in_record=False)
+    user_repository = SqlRepository(models.StoredUser, AsyncSessionLocal, indexes={"email": models.StoredUser.email})
+else:
+    item_repository = InMemoryRepository(items, indexes=("name",))
+    user_repository = InMemoryRepository(fake_users_db, indexes=("email",))
+
+yield_item_repository = InMemoryRepository(yield_items, indexes=("owner",))
+fake_item_repository = InMemoryRepository.from_list(fake_items_db, indexes=("item_name",))
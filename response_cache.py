@@ -0,0 +1,166 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from negotiation import negotiate
+from varaibles import RESPONSE_CACHE_SIZE
+
+"""
+Response cache for idempotent GET routes.
+
+Mark the endpoint with @cache_response under the @app.get decorator:
+
+    @app.get("/models/{model_name}")
+    @cache_response(ttl=300)
+    async def get_model(model_name: ModelName):
+
+and use CachedRoute as the route class of the app/router. The cache is checked before FastAPI parses and validates
+the parameters, so a hit skips validation, the handler and the serialization of the response and just sends the
+stored bytes. Every cached response gets an ETag, a request with a matching If-None-Match gets an empty 304.
+
+The key is the path, the sorted query parameters, the headers listed in `vary` and, for @content_negotiation routes,
+the negotiated response format. Only 200 responses with a body and without cookies are stored. Call
+response_cache.invalidate_tag() when the data behind tagged routes changes.
+"""
+
+
+class CachePolicy(NamedTuple):
+    ttl: float
+    vary: tuple[str, ...]
+    tags: tuple[str, ...]
+
+
+class CachedResponse(NamedTuple):
+    status_code: int
+    raw_headers: list[tuple[bytes, bytes]]
+    body: bytes
+    etag: str
+    expires_at: float
+    tags: tuple[str, ...]
+
+
+class ResponseCache:
+    """
+    Size bounded LRU of rendered responses with a TTL per entry.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+
+    def get(self, key: tuple) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple, response: Response, policy: CachePolicy) -> CachedResponse:
+        etag = '"' + hashlib.blake2b(response.body, digest_size=16).hexdigest() + '"'
+        raw_headers = [(name, value) for name, value in response.raw_headers if name != b"etag"]
+        raw_headers.append((b"etag", etag.encode()))
+        entry = CachedResponse(response.status_code, raw_headers, response.body, etag,
+                               time.monotonic() + policy.ttl, policy.tags)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def invalidate_tag(self, tag: str) -> int:
+        """
+        Drop every entry stored by a route with this tag.
+        :return: number of entries removed
+        """
+        keys = [key for key, entry in self._entries.items() if tag in entry.tags]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+response_cache = ResponseCache(maxsize=RESPONSE_CACHE_SIZE)
+
+
+def cache_response(ttl: float = 60, vary: tuple[str, ...] = (), tags: tuple[str, ...] = ()):
+    """
+    Mark an endpoint as cacheable.
+    :param ttl: seconds an entry stays valid
+    :param vary: request headers that change the response, they become part of the key
+    :param tags: names used with response_cache.invalidate_tag()
+    """
+    policy = CachePolicy(ttl, tuple(header.lower() for header in vary), tuple(tags))
+
+    def decorator(func: Callable) -> Callable:
+        func.__response_cache__ = policy
+        return func
+
+    return decorator
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Weak comparison of If-None-Match, W/"x" (e.g. set by the compression middleware) matches "x".
+    """
+    if if_none_match is None:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+class CachedRoute(APIRoute):
+    """
+    APIRoute that serves endpoints marked with @cache_response from response_cache.
+    """
+
+    def get_route_handler(self) -> Callable:
+        route_handler = super().get_route_handler()
+        policy: CachePolicy | None = getattr(self.endpoint, "__response_cache__", None)
+        if policy is None:
+            return route_handler
+        negotiated = getattr(self.endpoint, "__content_negotiation__", False)
+
+        async def cached_route_handler(request: Request) -> Response:
+            if request.method not in ("GET", "HEAD"):
+                return await route_handler(request)
+            key = (
+                request.url.path,
+                tuple(sorted(request.query_params.multi_items())),
+                tuple(request.headers.get(header) for header in policy.vary),
+                negotiate(request.headers.get("accept")) if negotiated else None,
+            )
+            entry = response_cache.get(key)
+            if entry is None:
+                response = await route_handler(request)
+                cacheable = (
+                    response.status_code == 200
+                    and isinstance(getattr(response, "body", None), bytes)
+                    and b"set-cookie" not in (name for name, _ in response.raw_headers)
+                )
+                if not cacheable:
+                    return response
+                entry = response_cache.put(key, response, policy)
+
+            if etag_matches(request.headers.get("if-none-match"), entry.etag):
+                return Response(status_code=304, headers={"etag": entry.etag})
+            response = Response(status_code=entry.status_code)
+            response.body = entry.body
+            response.raw_headers = list(entry.raw_headers)
+            return response
+
+        return cached_route_handler
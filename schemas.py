@@ -3,8 +3,6 @@ from enum import Enum
 from typing import Literal
 from pydantic import BaseModel, Field, HttpUrl, EmailStr
 
-from sqlmodel import Field, Session, SQLModel, create_engine, select
-
 
 class ModelName(str, Enum):
     alexnet = "alexnet"
@@ -36,8 +34,9 @@ class Item(BaseModel):
     )
     price: float = Field(gt=0, description="The price must be greater than zero")
     tax: float | None = Field(default=None,  examples=[3.2])
-    tags: list = [] #Normal list without type
-    tags_set: set[str] = set()
+    # default_factory instead of [] / set(): pydantic deep copies a mutable default for every item it validates
+    tags: list = Field(default_factory=list) #Normal list without type
+    tags_set: set[str] = Field(default_factory=set)
     image: Image | None = None #Nested model "image": {
         # "url": "http://example.com/baz.jpg",
         # "name": "The Foo live"
@@ -53,6 +52,59 @@ class Item(BaseModel):
     #     }
     # ]
 
+class BulkItem(Item):
+    """
+    Item of the bulk create payload, with the key it's stored under.
+    """
+    id: str = Field(min_length=1, max_length=64)
+
+class BulkItemUpdate(BaseModel):
+    """
+    Partial Item of the bulk patch payload, only the fields that are sent are changed.
+    """
+    id: str = Field(min_length=1, max_length=64)
+    name: str | None = None
+    description: str | None = Field(default=None, max_length=300)
+    price: float | None = Field(default=None, gt=0)
+    tax: float | None = None
+    tags: list | None = None
+    tags_set: set[str] | None = None
+    image: Image | None = None
+    images: list[Image] | None = None
+
+class BulkItemResult(BaseModel):
+    index: int # Position of the row in the payload
+    id: str | None = None
+    status: Literal["created", "updated", "conflict", "not_found", "invalid", "skipped"]
+    errors: list[dict] | None = None
+
+class BulkItemsResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: list[BulkItemResult]
+
+class WeightEntry(BaseModel):
+    key: int | str # Position or int64 key of the binary format, key of the JSON map
+    weight: float
+
+class WeightsSummary(BaseModel):
+    count: int
+    total: float
+    mean: float | None
+    min: float | None
+    max: float | None
+    top: list[WeightEntry] # Largest weights first
+
+class PricesSummary(BaseModel):
+    count: int
+    with_tax: int # Items with a tax
+    total_price: float
+    total_tax: float
+    total_price_with_tax: float
+    mean_price_with_tax: float | None
+    min_price_with_tax: float | None
+    max_price_with_tax: float | None
+
 class Offer(BaseModel):
     """
     Arbitrarily deeply nested models
@@ -135,6 +187,8 @@ class Tags(Enum):
     exceptions = "Exceptions"
     dependency = "Dependency"
     auth = "Auth"
+    bulk = "Bulk"
+    aggregation = "Aggregation"
 
 class Token(BaseModel):
     access_token: str
@@ -143,10 +197,3 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: str | None = None
-
-
-class Hero(SQLModel, table=True):
-    id: int | None = Field(default=None, primary_key=True)
-    name: str = Field(index=True)
-    age: int | None = Field(default=None, index=True)
-    secret_name: str
\ No newline at end of file
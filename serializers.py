@@ -0,0 +1,120 @@
+import functools
+import inspect
+from typing import Any, Callable
+
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.exceptions import ResponseValidationError
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+"""
+Precompiled response serializers.
+
+By default FastAPI validates the value returned by a response_model route, dumps it to Python objects with the
+include/exclude rules, runs jsonable_encoder on the result and finally json.dumps it.
+For endpoints marked with @precompiled_response, PrecompiledRoute builds a TypeAdapter for the response_model and
+fixes the include/exclude/exclude_* options once when the route is created. Each call is then a validate_python and a
+dump_json done by pydantic-core, and the bytes go straight into the response.
+
+    @app.get("/exclude/unset/items/{item_id}", response_model=Item, response_model_exclude_unset=True)
+    @precompiled_response
+    async def read_item(item_id: str):
+
+The route keeps its response_model so the OpenAPI schema doesn't change.
+"""
+
+
+class PrecompiledJSONResponse(Response):
+    """
+    JSON response whose content is already encoded bytes.
+    """
+    media_type = "application/json"
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+
+class ResponseSerializer:
+    def __init__(self, response_model: Any, include=None, exclude=None, by_alias: bool = True,
+                 exclude_unset: bool = False, exclude_defaults: bool = False, exclude_none: bool = False):
+        self.adapter = TypeAdapter(response_model)
+        self.dump_options = {
+            "include": include,
+            "exclude": exclude,
+            "by_alias": by_alias,
+            "exclude_unset": exclude_unset,
+            "exclude_defaults": exclude_defaults,
+            "exclude_none": exclude_none,
+        }
+
+    def _validate(self, content: Any) -> Any:
+        try:
+            return self.adapter.validate_python(content, from_attributes=True)
+        except ValidationError as exc:
+            raise ResponseValidationError(errors=exc.errors(include_url=False), body=content)
+
+    def serialize(self, content: Any) -> bytes:
+        """
+        :param content: value returned by the endpoint (dict, model or object with attributes)
+        :raises ResponseValidationError: same error FastAPI raises when the value doesn't match the response_model
+        """
+        return self.adapter.dump_json(self._validate(content), **self.dump_options)
+
+    def to_python(self, content: Any) -> Any:
+        """
+        Same as serialize but returns the JSON compatible Python data (dicts, lists, str...) instead of the bytes, for
+        the other encodings (negotiation.py).
+        """
+        return self.adapter.dump_python(self._validate(content), mode="json", **self.dump_options)
+
+
+def precompiled_response(func: Callable) -> Callable:
+    """
+    Opt-in marker for PrecompiledRoute, put it under the @app.get decorator.
+    The route must declare an explicit response_model.
+    """
+    func.__precompiled_response__ = True
+    return func
+
+
+class PrecompiledRoute(APIRoute):
+    """
+    APIRoute that serializes endpoints marked with @precompiled_response with a ResponseSerializer.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if getattr(endpoint, "__precompiled_response__", False):
+            endpoint = self._wrap_endpoint(path, endpoint, kwargs)
+        super().__init__(path, endpoint, **kwargs)
+
+    @staticmethod
+    def _wrap_endpoint(path: str, endpoint: Callable, kwargs: dict) -> Callable:
+        response_model = kwargs.get("response_model")
+        if response_model is None or isinstance(response_model, DefaultPlaceholder):
+            raise ValueError(f"{path}: @precompiled_response needs an explicit response_model")
+        serializer = ResponseSerializer(
+            response_model,
+            include=kwargs.get("response_model_include"),
+            exclude=kwargs.get("response_model_exclude"),
+            by_alias=kwargs.get("response_model_by_alias", True),
+            exclude_unset=kwargs.get("response_model_exclude_unset", False),
+            exclude_defaults=kwargs.get("response_model_exclude_defaults", False),
+            exclude_none=kwargs.get("response_model_exclude_none", False),
+        )
+        status_code = kwargs.get("status_code") or 200
+        is_coroutine = inspect.iscoroutinefunction(endpoint)
+
+        # functools.wraps keeps the signature, FastAPI still sees the original parameters
+        @functools.wraps(endpoint)
+        async def precompiled_endpoint(*args, **endpoint_kwargs):
+            if is_coroutine:
+                content = await endpoint(*args, **endpoint_kwargs)
+            else:
+                content = await run_in_threadpool(endpoint, *args, **endpoint_kwargs)
+            if isinstance(content, Response):
+                return content
+            return PrecompiledJSONResponse(serializer.serialize(content), status_code=status_code)
+
+        return precompiled_endpoint
@@ -0,0 +1,115 @@
+from typing import Any
+
+from sqlalchemy import select, insert, update, delete, func
+
+from repositories import Repository
+
+"""
+SQL backend of the repositories, used when REPOSITORY_BACKEND = "sql".
+Kept out of repositories.py so the app doesn't import sqlalchemy when it runs on the in-memory stores.
+"""
+
+
+class SqlRepository(Repository):
+    """
+    Repository on top of a SQLAlchemy model, e.g. models.Item or models.User.
+    Opens one AsyncSession per call from session_factory.
+    :param model: declarative model class
+    :param session_factory: async_sessionmaker, normally database.AsyncSessionLocal
+    :param indexes: index name -> indexed column of the model, e.g. {"owner": models.Item.owner_id}
+    :param key_column: column used as key and for ordering, defaults to the primary key
+    :param key_in_record: False when the records don't carry their key, e.g. the items, the key column is then left
+        out of the returned records
+    Records are the columns of the model, put() raises TypeError for a field that isn't one.
+    """
+
+    def __init__(self, model, session_factory, indexes: dict | None = None, key_column=None,
+                 key_in_record: bool = True):
+        self.model = model
+        self.session_factory = session_factory
+        self._columns = dict(indexes or {})
+        self.indexes = tuple(self._columns)
+        self.key_column = key_column if key_column is not None else model.__mapper__.primary_key[0]
+        self._record_columns = [column.key for column in model.__table__.columns
+                                if key_in_record or column.key != self.key_column.key]
+
+    def _to_dict(self, obj) -> dict:
+        return {key: getattr(obj, key) for key in self._record_columns}
+
+    def _keyed(self, rows) -> list[tuple[Any, dict]]:
+        return [(getattr(obj, self.key_column.key), self._to_dict(obj)) for obj in rows]
+
+    async def get(self, key) -> dict | None:
+        async with self.session_factory() as db:
+            obj = (await db.execute(select(self.model).where(self.key_column == key))).scalar_one_or_none()
+            return None if obj is None else self._to_dict(obj)
+
+    async def put(self, key, record: dict) -> dict:
+        async with self.session_factory() as db:
+            obj = await db.merge(self.model(**{**record, self.key_column.key: key}))
+            await db.commit()
+            return self._to_dict(obj)
+
+    async def get_many(self, keys) -> dict:
+        keys = list(keys)
+        async with self.session_factory() as db:
+            rows = (await db.execute(select(self.model).where(self.key_column.in_(keys)))).scalars()
+            return dict(self._keyed(rows))
+
+    async def put_many(self, records: dict) -> list[dict]:
+        """
+        One transaction: a SELECT of the existing keys, then one executemany INSERT for the new rows and one
+        UPDATE by primary key for the others, instead of a merge and a commit per record.
+        """
+        if self.key_column is not self.model.__mapper__.primary_key[0]:
+            # The bulk UPDATE below matches rows by primary key
+            return await super().put_many(records)
+        key_name = self.key_column.key
+        rows = [{**record, key_name: key} for key, record in records.items()]
+        async with self.session_factory() as db:
+            statement = select(self.key_column).where(self.key_column.in_(list(records)))
+            existing = set((await db.execute(statement)).scalars())
+            new_rows = [row for row in rows if row[key_name] not in existing]
+            changed_rows = [row for row in rows if row[key_name] in existing]
+            if new_rows:
+                await db.execute(insert(self.model), new_rows)
+            if changed_rows:
+                await db.execute(update(self.model), changed_rows)
+            await db.commit()
+        return [{key: row.get(key) for key in self._record_columns} for row in rows]
+
+    async def update(self, key, changes: dict) -> dict | None:
+        async with self.session_factory() as db:
+            statement = update(self.model).where(self.key_column == key).values(**changes).returning(self.model)
+            obj = (await db.execute(statement)).scalar_one_or_none()
+            await db.commit()
+            return None if obj is None else self._to_dict(obj)
+
+    async def delete(self, key) -> bool:
+        async with self.session_factory() as db:
+            result = await db.execute(delete(self.model).where(self.key_column == key))
+            await db.commit()
+            return result.rowcount > 0
+
+    def _page_query(self, after, limit: int):
+        statement = select(self.model).order_by(self.key_column).limit(limit)
+        if after is not None:
+            statement = statement.where(self.key_column > after)
+        return statement
+
+    async def page(self, after=None, limit: int = 100, offset: int = 0) -> list[tuple[Any, dict]]:
+        statement = self._page_query(after, limit)
+        if offset:
+            statement = statement.offset(offset)
+        async with self.session_factory() as db:
+            return self._keyed((await db.execute(statement)).scalars())
+
+    async def find_by(self, index: str, value, after=None, limit: int = 100) -> list[tuple[Any, dict]]:
+        self._check_index(index)
+        statement = self._page_query(after, limit).where(self._columns[index] == value)
+        async with self.session_factory() as db:
+            return self._keyed((await db.execute(statement)).scalars())
+
+    async def count(self) -> int:
+        async with self.session_factory() as db:
+            return (await db.execute(select(func.count()).select_from(self.model))).scalar_one()
@@ -0,0 +1,110 @@
+from typing import Annotated, AsyncIterable, AsyncIterator, Iterable, Literal
+
+from fastapi import Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+
+from varaibles import STREAM_CHUNK_SIZE
+
+"""
+Streaming JSON responses for collection routes.
+
+The rows come from an (async) iterator, e.g. Repository.scan(), and are encoded one at a time, so the memory used
+doesn't depend on the size of the collection and the first bytes leave before the last row is read. Two formats:
+    ndjson  one JSON document per line, application/x-ndjson
+    json    a normal JSON array (or object) written incrementally, application/json
+
+Small rows are grouped into chunks of about STREAM_CHUNK_SIZE bytes. StreamingResponse awaits send() for each chunk and
+the server only returns from send() when the transport can take more data, so a slow client slows down the reads from
+the store instead of making the buffers grow. If the client disconnects the generator is closed.
+
+Routes opt in with the stream_format dependency: ?stream=ndjson|json, or Accept: application/x-ndjson.
+"""
+
+StreamFormat = Literal["ndjson", "json"]
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def stream_format(
+    request: Request,
+    stream: Annotated[StreamFormat | None, Query(description="Stream the collection as NDJSON or a JSON array")] = None,
+) -> StreamFormat | None:
+    """
+    Dependency returning the requested streaming format, None for the normal response.
+    """
+    if stream is not None:
+        return stream
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return "ndjson"
+    return None
+
+
+async def _aiter(rows: Iterable | AsyncIterable) -> AsyncIterator:
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:
+            yield row
+
+
+async def _chunked(parts: AsyncIterator[bytes], chunk_size: int) -> AsyncIterator[bytes]:
+    # The first part goes out alone so the client gets the first row as soon as it's read
+    async for part in parts:
+        yield part
+        break
+    buffer = bytearray()
+    async for part in parts:
+        buffer += part
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def ndjson_lines(rows: Iterable | AsyncIterable) -> AsyncIterator[bytes]:
+    async for row in _aiter(rows):
+        yield to_json(row) + b"\n"
+
+
+async def json_array(rows: Iterable | AsyncIterable) -> AsyncIterator[bytes]:
+    separator = b"["
+    async for row in _aiter(rows):
+        yield separator + to_json(row)
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
+async def json_object(pairs: Iterable | AsyncIterable) -> AsyncIterator[bytes]:
+    """
+    :param pairs: (key, value) pairs, the keys must be strings
+    """
+    separator = b"{"
+    async for key, value in _aiter(pairs):
+        yield separator + to_json(key) + b":" + to_json(value)
+        separator = b","
+    yield b"{}" if separator == b"{" else b"}"
+
+
+def stream_response(rows: Iterable | AsyncIterable, fmt: StreamFormat, status_code: int = 200,
+                    headers: dict | None = None, chunk_size: int = STREAM_CHUNK_SIZE) -> StreamingResponse:
+    """
+    :param rows: rows to send, anything pydantic_core.to_json can encode (dicts, models, ...)
+    :param fmt: "ndjson" for one row per line, "json" for a JSON array
+    """
+    if fmt == "ndjson":
+        return StreamingResponse(_chunked(ndjson_lines(rows), chunk_size), status_code=status_code,
+                                 headers=headers, media_type=NDJSON_MEDIA_TYPE)
+    return StreamingResponse(_chunked(json_array(rows), chunk_size), status_code=status_code,
+                             headers=headers, media_type="application/json")
+
+
+def stream_object_response(pairs: Iterable | AsyncIterable, status_code: int = 200, headers: dict | None = None,
+                           chunk_size: int = STREAM_CHUNK_SIZE) -> StreamingResponse:
+    """
+    JSON object written incrementally from (key, value) pairs.
+    """
+    return StreamingResponse(_chunked(json_object(pairs), chunk_size), status_code=status_code,
+                             headers=headers, media_type="application/json")
@@ -0,0 +1,103 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+from varaibles import TOKEN_CACHE_SIZE
+
+
+class CachedToken(NamedTuple):
+    claims: dict
+    user: Any
+    expires_at: float
+
+
+class TokenCache:
+    """
+    Bounded LRU of already verified JWTs.
+    Keyed by a sha256 digest of the token so the raw bearer token is never kept in memory as a key.
+    An entry is dropped once the token's `exp` has passed, when it falls off the LRU end or when
+    invalidate_user() is called for its `sub` (e.g. the user got disabled).
+    The cached user object is shared between requests, treat it as read only.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, CachedToken] = OrderedDict()
+        self._by_user: dict[str, set[bytes]] = {}
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, token: str) -> CachedToken | None:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.time():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, token: str, claims: dict, user: Any):
+        """
+        :param token: raw JWT
+        :param claims: decoded payload, must contain `exp` and `sub`
+        :param user: resolved user for `sub`
+        """
+        expires_at = claims.get("exp")
+        if expires_at is None:
+            # Never cache tokens without an expiry, they'd live until evicted by size.
+            return
+        key = self._key(token)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = CachedToken(claims=claims, user=user, expires_at=float(expires_at))
+        self._by_user.setdefault(claims["sub"], set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, username: str) -> int:
+        """
+        Drop every cached token issued to username.
+        :return: number of entries removed
+        """
+        keys = self._by_user.pop(username, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_user.clear()
+
+    def _remove(self, key: bytes):
+        entry = self._entries.pop(key)
+        keys = self._by_user.get(entry.claims["sub"])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry.claims["sub"]]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+token_cache = TokenCache(maxsize=TOKEN_CACHE_SIZE)
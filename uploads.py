@@ -0,0 +1,146 @@
+import hashlib
+import os
+import uuid
+from typing import AsyncIterator
+
+from fastapi import HTTPException, Request, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from varaibles import (UPLOAD_DIR, UPLOAD_CHUNK_SIZE, UPLOAD_MAX_REQUEST_BYTES, UPLOAD_MAX_INFLIGHT_BYTES,
+                       UPLOAD_RETRY_AFTER)
+
+"""
+Streaming ingest for uploads.
+The body is consumed chunk by chunk, each chunk updates the sha256 and size and is appended to a temp file in
+UPLOAD_DIR, so memory per request stays at about UPLOAD_CHUNK_SIZE whatever the size of the file.
+The temp file is linked to its final name only when the whole body arrived, a failed upload leaves nothing behind.
+An existing upload is never overwritten, a second upload with the same name is a 409.
+
+Two limits apply:
+    UPLOAD_MAX_REQUEST_BYTES: max size of one upload -> 413
+    UPLOAD_MAX_INFLIGHT_BYTES: max bytes of all the uploads in progress on this worker -> 503 + Retry-After
+"""
+
+
+class InflightBytes:
+    """
+    Counter of the bytes accepted by uploads that are still in progress.
+    Only touched from the event loop so no lock is needed.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.current = 0
+
+    def reserve(self, size: int):
+        if self.current + size > self.limit:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many uploads in progress, try again later",
+                headers={"Retry-After": str(UPLOAD_RETRY_AFTER)},
+            )
+        self.current += size
+
+    def release(self, size: int):
+        self.current -= size
+
+
+inflight_bytes = InflightBytes(UPLOAD_MAX_INFLIGHT_BYTES)
+
+
+def safe_filename(filename: str | None) -> str:
+    """
+    Strip any directory part so a client can't write outside UPLOAD_DIR.
+    """
+    name = os.path.basename((filename or "").replace("\\", "/"))
+    if name in ("", ".", ".."):
+        raise HTTPException(status_code=400, detail="Invalid filename")
+    return name
+
+
+async def _rechunk(stream: AsyncIterator[bytes], chunk_size: int) -> AsyncIterator[bytes]:
+    # The server hands us whatever it read from the socket, write in fixed size blocks instead.
+    buffer = bytearray()
+    async for data in stream:
+        buffer += data
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _publish(temp_path: str, path: str):
+    # link fails when path exists, unlike os.replace which would silently overwrite an earlier upload
+    try:
+        os.link(temp_path, path)
+    except FileExistsError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"{os.path.basename(path)} already exists")
+    os.remove(temp_path)
+
+
+async def store_stream(stream: AsyncIterator[bytes], filename: str | None, expected_size: int | None = None,
+                       directory: str = UPLOAD_DIR, chunk_size: int = UPLOAD_CHUNK_SIZE,
+                       max_bytes: int = UPLOAD_MAX_REQUEST_BYTES) -> dict:
+    """
+    Write stream to directory/filename without holding it in memory.
+    :param stream: async iterator of bytes, e.g. request.stream()
+    :param filename: client filename, sanitised
+    :param expected_size: Content-Length when known, lets us refuse too large uploads before reading them
+    :return: {"filename", "size", "sha256"}
+    :raises HTTPException: 409 when an upload with that name already exists
+    """
+    name = safe_filename(filename)
+    if expected_size is not None and expected_size > max_bytes:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail="Upload too large")
+
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    reserved = 0
+    out = await run_in_threadpool(open, temp_path, "wb")
+    try:
+        if expected_size:
+            inflight_bytes.reserve(expected_size)
+            reserved = expected_size
+        async for chunk in _rechunk(stream, chunk_size):
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail="Upload too large")
+            if size > reserved:
+                inflight_bytes.reserve(size - reserved)
+                reserved = size
+            digest.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+        await run_in_threadpool(out.close)
+        await run_in_threadpool(_publish, temp_path, os.path.join(directory, name))
+    except BaseException:
+        out.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        inflight_bytes.release(reserved)
+    return {"filename": name, "size": size, "sha256": digest.hexdigest()}
+
+
+async def store_request_body(request: Request, filename: str) -> dict:
+    """
+    Store the raw request body (application/octet-stream upload).
+    """
+    content_length = request.headers.get("content-length")
+    expected_size = int(content_length) if content_length and content_length.isdigit() else None
+    return await store_stream(request.stream(), filename, expected_size=expected_size)
+
+
+async def _iter_upload(file: UploadFile, chunk_size: int) -> AsyncIterator[bytes]:
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+
+async def store_upload_file(file: UploadFile) -> dict:
+    """
+    Store a multipart UploadFile. Starlette already spooled it to disk, we copy it in chunks.
+    """
+    return await store_stream(_iter_upload(file, UPLOAD_CHUNK_SIZE), file.filename, expected_size=file.size)
@@ -1,13 +1,19 @@
-from typing import Annotated
+import hmac
+from typing import Annotated, NamedTuple
 from fastapi import Depends, Cookie, Header
 from fastapi.exceptions import HTTPException
 from datetime import timedelta, datetime, timezone
-import jwt
 
 from schemas import BaseUserIn, BaseUserInDB, BaseUser
 from exceptions import OwnerError
-from context_manager import MySuperContextManager
-from varaibles import fake_users_db, SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from context_manager import MyAsyncContextManager
+from varaibles import (ACCESS_TOKEN_EXPIRE_MINUTES, X_TOKEN_SECRET, X_KEY_SECRET,
+                       BAD_HEADER_CACHE_SIZE, BAD_HEADER_CACHE_TTL)
+from repositories import user_repository
+from pagination import after_key
+from dependency_cache import app_scoped, NegativeCache
+from jwt_keys import key_ring
+from token_cache import token_cache
 
 
 
@@ -27,8 +33,16 @@ def fake_save_user(user_in: BaseUserIn):
     return user_in_db
 
 
-async def common_parameters(q: str | None = None, skip: int = 0, limit: int = 100):
-    return {"q": q, "skip": skip, "limit": limit}
+async def common_parameters(q: str | None = None, skip: int = 0, limit: int = 100, cursor: str | None = None):
+    """
+    :param cursor: opaque keyset cursor, takes over from skip when given
+    :return: "after" is the decoded key to pass to Repository.page
+    """
+    try:
+        after = after_key(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"q": q, "skip": skip, "limit": limit, "cursor": cursor, "after": after}
 
 def query_extractor(q: str | None = None):
     return q
@@ -46,13 +60,38 @@ def query_or_cookie_extractor(q: Annotated[str, Depends(query_extractor)],
         return last_query
     return q
 
-async def verify_token(x_token: Annotated[str, Header()]):
-    if x_token != "fake-super-secret-token":
+class HeaderSecrets(NamedTuple):
+    x_token: bytes
+    x_key: bytes
+
+
+@app_scoped
+def header_secrets():
+    """
+    Expected header values, encoded once for the whole app.
+    """
+    return HeaderSecrets(x_token=X_TOKEN_SECRET.encode(), x_key=X_KEY_SECRET.encode())
+
+
+bad_tokens = NegativeCache(maxsize=BAD_HEADER_CACHE_SIZE, ttl=BAD_HEADER_CACHE_TTL)
+bad_keys = NegativeCache(maxsize=BAD_HEADER_CACHE_SIZE, ttl=BAD_HEADER_CACHE_TTL)
+
+
+async def verify_token(x_token: Annotated[str, Header()],
+                       secrets: Annotated[HeaderSecrets, Depends(header_secrets)]):
+    """
+    compare_digest takes the same time wherever the strings differ, so the secret can't be guessed from timings.
+    Known bad values are refused from bad_tokens without comparing again.
+    """
+    if x_token in bad_tokens or not hmac.compare_digest(x_token.encode(), secrets.x_token):
+        bad_tokens.add(x_token)
         raise HTTPException(status_code=400, detail="X-Token header invalid")
 
 
-async def verify_key(x_key: Annotated[str, Header()]):
-    if x_key != "fake-super-secret-key":
+async def verify_key(x_key: Annotated[str, Header()],
+                     secrets: Annotated[HeaderSecrets, Depends(header_secrets)]):
+    if x_key in bad_keys or not hmac.compare_digest(x_key.encode(), secrets.x_key):
+        bad_keys.add(x_key)
         raise HTTPException(status_code=400, detail="X-Key header invalid")
     return x_key
 
@@ -76,7 +115,11 @@ def get_username():
 
 
 async def get_db():
-    with MySuperContextManager() as db:
+    """
+    One AsyncSession per request, closed after the response is sent.
+    Use `await db.execute(select(...))` in the route so the query doesn't block the event loop.
+    """
+    async with MyAsyncContextManager() as db:
         yield db
 
 
@@ -85,15 +128,29 @@ def fake_decode_token(token):
         username=token + "fakedecoded", email="john@example.com", full_name="John Doe"
     )
 
-def get_user(db, username: str):
-    if username in db:
-        user_dict = db[username]
+async def get_user(db, username: str):
+    """
+    :param db: a Repository of users keyed by username
+    """
+    user_dict = await db.get(username)
+    if user_dict is not None:
         return BaseUserInDB(**user_dict)
 
-def fake_decode_token(token):
+async def update_user(db, username: str, changes: dict):
+    """
+    Every change of a user goes through here: the cached tokens of the user hold the old record, they're dropped
+    and the next request verifies its token and reads the user again.
+    :param db: a Repository of users keyed by username
+    :return: the updated record or None if the user doesn't exist
+    """
+    user_dict = await db.update(username, changes)
+    token_cache.invalidate_user(username)
+    return user_dict
+
+async def fake_decode_token(token):
     # This doesn't provide any security at all
     # Check the next version
-    user = get_user(fake_users_db, token)
+    user = await get_user(user_repository, token)
     return user
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -103,6 +160,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    # Signed with the active key of the ring, its kid goes in the header
+    encoded_jwt = key_ring.encode(to_encode)
     return encoded_jwt
 
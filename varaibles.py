@@ -1,27 +1,123 @@
+from fastapi import HTTPException
 
-
-
-
-
-
-
-
-
-
-
+from app.core.variables import data, base_items, items, yield_items, fake_items_db, fake_users_db
+from pagination import after_key
 
 
 class CommonQueryParams:
-    def __init__(self, q: str | None = None, skip: int = 0, limit: int = 100):
+    def __init__(self, q: str | None = None, skip: int = 0, limit: int = 100, cursor: str | None = None):
+        """
+        :param cursor: next_cursor of the previous page. When given, skip is ignored and the page starts after the
+        cursor (keyset pagination), so deep pages are as cheap as the first one.
+        """
         self.q = q
         self.skip = skip
         self.limit = limit
+        self.cursor = cursor
+        try:
+            self.after = after_key(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 SECRET_KEY = "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Access token signing, see jwt_keys.py. "RS256"/"EdDSA" need pyjwt[crypto], "HS256" signs with SECRET_KEY as before.
+JWT_SIGNING_ALGORITHM = "EdDSA"
+JWT_KEYS_DIR = "keys"  # <kid>.pem private keys, <kid>.pub.pem retired keys that still verify
+JWT_ACTIVE_KID = None  # None: the last private kid in sort order
+# Development only: without a private key in JWT_KEYS_DIR, sign with a key generated at startup instead of HS256. Each
+# worker gets its own and it's lost on restart, so the tokens of one worker fail on the others.
+JWT_EPHEMERAL_KEY = False
+JWT_ACCEPT_LEGACY_HS256 = True  # Keep accepting the HS256 tokens issued before the switch, turn off after they expired
+JWKS_MAX_AGE = 300  # Seconds downstream services may cache /.well-known/jwks.json
+
+# Password hashing pool. bcrypt releases the GIL so threads are enough, use "process" to move it off the interpreter.
+PWD_HASH_EXECUTOR = "thread"
+PWD_HASH_WORKERS = 4
+PWD_HASH_QUEUE_DEPTH = 32  # Requests waiting for a worker before we answer 503
+PWD_HASH_RETRY_AFTER = 1  # Seconds, sent in the Retry-After header
+PWD_HASH_LATENCY_SAMPLES = 1024
+# Hashing policy, see hashing.py. "argon2" needs argon2-cffi, bcrypt hashes are then migrated on login.
+PWD_HASH_SCHEME = "bcrypt"
+PWD_HASH_ROUNDS = 12  # bcrypt cost / argon2 time_cost used when calibration is off
+PWD_HASH_ARGON2_MEMORY_COST = 65536  # KiB
+PWD_HASH_CALIBRATE = True  # Measure at startup and pick the rounds within the budget below
+PWD_HASH_VERIFY_BUDGET = 0.25  # Seconds per verify
+PWD_HASH_MIN_ROUNDS = 10  # Floor and ceiling of the calibration, bcrypt cost (argon2 time_cost: use ~2 and ~6)
+PWD_HASH_MAX_ROUNDS = 14
+
+# Login throttling (rate_limit.py): (attempts, seconds to refill them)
+LOGIN_RATE_LIMIT_PER_IP = (20, 60)
+LOGIN_RATE_LIMIT_PER_USER = (10, 300)
+RATE_LIMIT_STORE_SIZE = 100_000  # Buckets kept in memory per worker
+RATE_LIMIT_TRUST_FORWARDED = False  # Use X-Forwarded-For as client IP, only behind a proxy that sets it
+
+TOKEN_CACHE_SIZE = 10_000  # Verified JWTs kept by get_current_user
+
+# "memory" keeps the demo data in dicts, "sql" serves items and users from the models tables (see repositories.py)
+REPOSITORY_BACKEND = "memory"
+
+# Streaming uploads (uploads.py)
+UPLOAD_DIR = "uploads"
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB, memory used per upload
+UPLOAD_MAX_REQUEST_BYTES = 5 * 1024 ** 3  # 5 GiB per upload
+UPLOAD_MAX_INFLIGHT_BYTES = 20 * 1024 ** 3  # All the uploads in progress on one worker
+UPLOAD_RETRY_AFTER = 5  # Seconds
+
+# File serving for /files/{file_path:path} (file_serving.py)
+FILES_ROOT = "files"
+FILE_CACHE_SIZE = 256  # Open descriptors kept
+FILE_STAT_TTL = 2.0  # Seconds before a cached file is stat'ed again to notice changes
+FILE_CHUNK_SIZE = 256 * 1024
+
+RESPONSE_CACHE_SIZE = 1024  # Responses kept by @cache_response routes
+
+BULK_MAX_ITEMS = 5000  # Rows accepted by one /bulk/items/ request
+BULK_MAX_BODY_SIZE = 8 * 1024 * 1024  # Bytes accepted by one /bulk/items/ request, refused before reading
+
+# Streaming responses (streaming.py)
+STREAM_CHUNK_SIZE = 64 * 1024  # Rows are sent in chunks of about this many bytes
+STREAM_BATCH_SIZE = 1000  # Records read from the repository at a time
+
+# Response compression (compression.py)
+COMPRESSION_ENCODINGS = ("zstd", "br", "gzip")  # Preference order, zstd needs zstandard and br needs brotli installed
+COMPRESSION_MIN_SIZE = 1024  # Bytes, smaller bodies are sent as they are
+COMPRESSION_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}  # Bodies compressed on every response
+COMPRESSION_STATIC_LEVELS = {"zstd": 10, "br": 9, "gzip": 9}  # Bodies with an ETag, compressed once and cached
+COMPRESSION_CACHE_BYTES = 32 * 1024 * 1024  # Compressed bodies kept, by size
+COMPRESSION_THREADPOOL_SIZE = 256 * 1024  # Bodies from this size are compressed in the thread pool
+
+# Expected X-Token / X-Key headers of verify_token / verify_key, and how long rejected values are remembered
+X_TOKEN_SECRET = "fake-super-secret-token"
+X_KEY_SECRET = "fake-super-secret-key"
+BAD_HEADER_CACHE_SIZE = 10_000
+BAD_HEADER_CACHE_TTL = 300  # Seconds
+
+# Internal services sending `X-Trusted-Client: <token>` skip the body validation of @json_body(trusted=True) routes
+# (fast_body.py). None turns it off.
+TRUSTED_CLIENT_TOKEN = None
+JSON_BODY_GC_PAUSE_SIZE = 256 * 1024  # Bytes, the cyclic GC is paused while larger @json_body bodies are validated
+
+# /aggregate/ routes (aggregation.py)
+AGGREGATION_MAX_BODY_SIZE = 256 * 1024 * 1024  # Bytes, 16M float64 price/tax pairs
+AGGREGATION_MAX_TOP_K = 1000
+AGGREGATION_THREADPOOL_SIZE = 1024 * 1024  # Bodies from this size are aggregated in the thread pool
+
+# Binary formats of @content_negotiation routes (negotiation.py), in order of preference. Need msgpack / cbor2.
+BINARY_FORMATS = ("msgpack", "cbor")
+
+# Build /openapi.json once at startup and serve it as pre-encoded (gzip) bytes with an ETag, see openapi_cache.py
+OPENAPI_PRERENDER = True
+OPENAPI_CACHE_FILE = None  # e.g. "openapi.json", written at build time by `python -m openapi_cache openapi.json`
+
+DEPENDENCY_TIMING = False  # Time every Depends() per route, see dependency_timing.py. Off it costs nothing.
+
+# CORS (cors.py). origins may have wildcard entries, "https://*.example.com"
+CORS_MAX_AGE = 7200  # Seconds browsers keep a preflight answer, Chrome caps it at 7200
+CORS_PREFLIGHT_CACHE_SIZE = 1024  # Rendered preflight responses kept
 
 origins = [
     "http://localhost.tiangolo.com",